@@ -0,0 +1,88 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+# Set once the current request has written to the primary, so its later reads
+# (and those of the client's next requests, see PrimaryPinningMiddleware) don't
+# hit a replica that hasn't caught up yet.
+_written = ContextVar('written', default=False)
+_pinned = ContextVar('pinned', default=False)
+
+
+def get_replicas():
+    return [alias for alias in settings.DATABASES if alias != 'default']
+
+
+def use_primary():
+    return _written.get() or _pinned.get()
+
+
+# Reads of API models go to a random replica, everything else to the primary.
+# Auth and session tables always stay on the primary so a login is visible to the
+# very next request.
+class PrimaryReplicaRouter:
+    route_app_labels = {'api'}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels:
+            return 'default'
+        replicas = get_replicas()
+        if not replicas or use_primary() or connections['default'].in_atomic_block:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _written.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    # Replicas get their schema through replication.
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+# Scope the router's state to a request. A request that wrote sets a short-lived
+# cookie, and requests carrying it read from the primary until replication lag
+# (REPLICA_PIN_SECONDS) has passed. Runs in sync and async mode; the state lives in
+# context variables, which sync_to_async carries to and from its threads.
+class PrimaryPinningMiddleware:
+    cookie_name = 'use_primary'
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        written = _written.set(False)
+        pinned = _pinned.set(self.cookie_name in request.COOKIES)
+        try:
+            return self.pin(self.get_response(request))
+        finally:
+            _written.reset(written)
+            _pinned.reset(pinned)
+
+    async def __acall__(self, request):
+        written = _written.set(False)
+        pinned = _pinned.set(self.cookie_name in request.COOKIES)
+        try:
+            return self.pin(await self.get_response(request))
+        finally:
+            _written.reset(written)
+            _pinned.reset(pinned)
+
+    def pin(self, response):
+        if _written.get() and get_replicas():
+            response.set_cookie(
+                self.cookie_name, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
@@ -49,7 +49,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the other middleware.
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'PawKeeper.db_router.PrimaryPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -82,12 +85,95 @@ WSGI_APPLICATION = 'PawKeeper.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Connections are kept open for CONN_MAX_AGE seconds and checked before reuse.
+# Read replicas are listed comma-separated in DATABASE_REPLICA_URLS; API reads are
+# spread across them and writes go to the primary (see PawKeeper.db_router).
+
+CONN_MAX_AGE = int(os.getenv('CONN_MAX_AGE', 60))
+
 DATABASES = {
-    'default': dj_database_url.parse(os.getenv('DATABASE_URL'))
+    'default': dj_database_url.parse(os.getenv('DATABASE_URL'), conn_max_age=CONN_MAX_AGE, conn_health_checks=True)
+}
+
+for index, url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(','))):
+    DATABASES[f'replica_{index}'] = {
+        **dj_database_url.parse(url.strip(), conn_max_age=CONN_MAX_AGE, conn_health_checks=True),
+        # Tests read replicas from the primary's test database.
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['PawKeeper.db_router.PrimaryReplicaRouter']
+
+# Seconds a client keeps reading from the primary after a write.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Local memory is per process; point this at a shared backend (Redis, Memcached)
+# when running several workers so reference-data invalidation reaches all of them.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pawkeeper',
+    }
 }
 
 AUTH_USER_MODEL = 'authentication.CustomUser'
 
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    # Keyset pagination on every list endpoint; small reference tables can opt into
+    # api.pagination.ReferencePagination for page numbers.
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 100,
+    # Signed tokens first: they authenticate without touching the database.
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'authentication.tokens.SignedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    # Token buckets guarding registration and login (authentication.throttles).
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('AUTH_IP_THROTTLE_RATE', '20/min'),
+        'auth_email': os.getenv('AUTH_EMAIL_THROTTLE_RATE', '5/min'),
+    },
+}
+
+# ?include= expansion of related collections: how many levels deep includes may
+# nest, and how many rows each embedded collection holds unless its serializer
+# sets a limit of its own.
+API_INCLUDE_MAX_DEPTH = int(os.getenv('API_INCLUDE_MAX_DEPTH', 2))
+API_INCLUDE_ROW_LIMIT = int(os.getenv('API_INCLUDE_ROW_LIMIT', 50))
+
+# Seconds an API token stays valid.
+AUTH_TOKEN_MAX_AGE = int(os.getenv('AUTH_TOKEN_MAX_AGE', 24 * 60 * 60))
+
+# Seconds a process reuses a token's user without re-reading it, which bounds how
+# long a revoked token keeps working in other processes.
+AUTH_PRINCIPAL_CACHE_SECONDS = int(os.getenv('AUTH_PRINCIPAL_CACHE_SECONDS', 30))
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.0/topics/auth/passwords/
+
+PASSWORD_HASHERS = [
+    'authentication.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# PBKDF2 work factor for new hashes.
+PASSWORD_HASHING_ITERATIONS = int(os.getenv('PASSWORD_HASHING_ITERATIONS', 1_000_000))
+
+# Threads hashing passwords per process (0 hashes on the request thread), and how
+# many more hashes may wait for them before requests get a 503.
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', 2))
+PASSWORD_HASHING_QUEUE = int(os.getenv('PASSWORD_HASHING_QUEUE', 32))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
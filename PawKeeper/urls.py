@@ -17,7 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from api.metrics import metrics_view
+
 urlpatterns = [
+    path('metrics', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
     path('auth/', include('authentication.urls')),
@@ -0,0 +1,148 @@
+import math
+import statistics
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Pets, WeighIns, BreedWeightStats
+
+# Lower bounds of the age bands, in months.
+AGE_BANDS = [0, 3, 6, 12, 24, 48, 84, 120]
+PERCENTILES = [5, 25, 50, 75, 95]
+DAYS_PER_MONTH = 365.25 / 12
+# Days after which a weigh-in counts half as much in the smoothed curve.
+SMOOTHING_HALF_LIFE = 30
+# Robust z-score above which a weigh-in is flagged as an anomaly.
+ANOMALY_THRESHOLD = 3.5
+
+
+def get_age_band(birthdate, date):
+    months = (date - birthdate).days / DAYS_PER_MONTH
+    if months < 0:
+        return None
+    return max(band for band in AGE_BANDS if band <= months)
+
+
+# Smoothed curve, weekly rate of change and anomaly flags of a pet's weigh-ins.
+# The curve is an exponential moving average whose weight decays with the days
+# between weigh-ins. A weigh-in is an anomaly when its distance from the curve
+# before it is far outside the usual distance (median absolute deviation).
+def get_weight_trend(weigh_ins):
+    points, residuals = [], []
+    smoothed = previous = None
+    for date, weight in weigh_ins:
+        weight = float(weight)
+        if smoothed is None:
+            smoothed, rate, residual = weight, None, 0.0
+        else:
+            days = (date - previous).days
+            residual = weight - smoothed
+            alpha = 1 - 0.5 ** (days / SMOOTHING_HALF_LIFE) if days > 0 else 1.0
+            last = smoothed
+            smoothed += alpha * residual
+            rate = (smoothed - last) / days * 7 if days > 0 else None
+        points.append({'date': date, 'weight': weight, 'smoothed': round(smoothed, 3),
+                       'weekly_change': None if rate is None else round(rate, 3)})
+        residuals.append(residual)
+        previous = date
+
+    scores = [0.0] * len(points)
+    if len(points) > 2:
+        median = statistics.median(residuals[1:])
+        deviation = statistics.median(abs(residual - median) for residual in residuals[1:])
+        if deviation > 0:
+            scores[1:] = [0.6745 * abs(residual - median) / deviation for residual in residuals[1:]]
+    for point, score in zip(points, scores):
+        point['anomaly'] = score > ANOMALY_THRESHOLD
+    return points
+
+
+# Linear-interpolated percentile (as numpy.percentile) of a {weight: count} histogram.
+def get_percentiles(counts, percentiles=PERCENTILES):
+    values = sorted((float(weight), count) for weight, count in counts.items())
+    total = sum(count for weight, count in values)
+    result = {}
+    for percentile in percentiles:
+        rank = percentile / 100 * (total - 1)
+        result[f'p{percentile}'] = round(
+            get_ranked_value(values, math.floor(rank)) * (1 - rank % 1)
+            + get_ranked_value(values, math.ceil(rank)) * (rank % 1), 3
+        )
+    return result
+
+
+def get_ranked_value(values, rank):
+    seen = 0
+    for weight, count in values:
+        seen += count
+        if rank < seen:
+            return weight
+    return values[-1][0]
+
+
+def add_to_bands(bands, birthdate, date, weight):
+    band = get_age_band(birthdate, date)
+    if band is not None:
+        counts = bands.setdefault(str(band), {})
+        key = f'{float(weight):.2f}'
+        counts[key] = counts.get(key, 0) + 1
+
+
+# Recount a breed's weigh-ins from scratch.
+def rebuild_breed_stats(breed_id):
+    with transaction.atomic():
+        stats, created = BreedWeightStats.objects.get_or_create(breed_id=breed_id)
+        stats = BreedWeightStats.objects.select_for_update().get(pk=stats.pk)
+        weigh_ins = WeighIns.objects.filter(pet__breed_id=breed_id)
+        bands = {}
+        for date, weight, birthdate in weigh_ins.values_list('date', 'weight', 'pet__birthdate').iterator():
+            add_to_bands(bands, birthdate, date, weight)
+        stats.bands = bands
+        stats.last_weigh_in_id = weigh_ins.aggregate(last=Max('id'))['last'] or 0
+        stats.stale = False
+        stats.save()
+    return stats
+
+
+# Count new weigh-ins into their breeds' stats without rescanning. Stats that are
+# missing or stale are left to be rebuilt on the next read.
+def add_weigh_ins(weigh_ins):
+    pets = Pets.objects.only('breed_id', 'birthdate').in_bulk({weigh_in.pet_id for weigh_in in weigh_ins})
+    by_breed = {}
+    for weigh_in in weigh_ins:
+        pet = pets.get(weigh_in.pet_id)
+        if pet is not None and pet.breed_id is not None:
+            by_breed.setdefault(pet.breed_id, []).append((pet, weigh_in))
+    if not by_breed:
+        return
+
+    with transaction.atomic():
+        for stats in BreedWeightStats.objects.select_for_update().filter(breed_id__in=by_breed, stale=False):
+            for pet, weigh_in in by_breed[stats.breed_id]:
+                if weigh_in.pk > stats.last_weigh_in_id:
+                    add_to_bands(stats.bands, pet.birthdate, weigh_in.date, weigh_in.weight)
+            stats.save(update_fields=['bands'])
+
+
+def mark_stale(breed_ids):
+    BreedWeightStats.objects.filter(breed_id__in=breed_ids).update(stale=True)
+
+
+# Percentile bands of a breed, from its precomputed stats.
+def get_breed_percentiles(breed_id):
+    stats = BreedWeightStats.objects.filter(breed_id=breed_id, stale=False).first()
+    if stats is None:
+        stats = rebuild_breed_stats(breed_id)
+
+    bands = []
+    for index, band in enumerate(AGE_BANDS):
+        counts = stats.bands.get(str(band))
+        if not counts:
+            continue
+        bands.append({
+            'min_age_months': band,
+            'max_age_months': AGE_BANDS[index + 1] if index + 1 < len(AGE_BANDS) else None,
+            'count': sum(counts.values()),
+            'percentiles': get_percentiles(counts),
+        })
+    return bands
@@ -0,0 +1,80 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .fastpath import get_fast_path
+from .pagination import KeysetPagination
+from .querysets import eager_load
+
+
+# Native async list/retrieve for a model, served without DRF's sync dispatch so
+# an ASGI worker doesn't hop to a thread per request. Reads go through the async
+# ORM (aiterator/aget) and render with the fast path when the serializer has one.
+# Responses match the sync endpoints' JSON; they support keyset pagination but not
+# content negotiation, sparse fieldsets or caching.
+class AsyncReadView(View):
+    http_method_names = ['get', 'head', 'options']
+    model = None
+    serializer_class = None
+    nested = False
+    pagination_class = KeysetPagination
+    renderer = JSONRenderer()
+
+    @classmethod
+    def for_model(cls, model, serializer, **attrs):
+        return type(
+            f"{model.__name__}AsyncReadView",
+            (cls,),
+            {
+                "model": model,
+                "serializer_class": serializer,
+                **attrs,
+            }
+        )
+
+    def get_queryset(self):
+        queryset = eager_load(self.model.objects.all(), self.serializer_class)
+        if self.nested:
+            queryset = queryset.filter(pet_id=self.kwargs['pet_pk'])
+        return queryset
+
+    def get_ordering(self):
+        if self.nested:
+            return (self.model._meta.get_latest_by, 'id')
+        return ('id',)
+
+    async def get(self, request, pk=None, **kwargs):
+        serializer = self.serializer_class(context={'request': request})
+        fast_path = get_fast_path(serializer)
+        queryset = self.get_queryset()
+        if fast_path is not None:
+            queryset = queryset.values(*fast_path.columns)
+            to_representation = fast_path.to_representation
+        else:
+            to_representation = serializer.to_representation
+
+        if pk is not None:
+            try:
+                row = await queryset.aget(pk=pk)
+            except ObjectDoesNotExist:
+                return self.render({'detail': 'No %s matches the given query.' % self.model._meta.object_name},
+                                   status.HTTP_404_NOT_FOUND)
+            return self.render(to_representation(row))
+
+        paginator = self.pagination_class()
+        try:
+            page = await paginator.apaginate_queryset(queryset, Request(request), self)
+        except APIException as exc:
+            return self.render({'detail': exc.detail}, exc.status_code)
+        return self.render({
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': [to_representation(row) for row in page],
+        })
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        return HttpResponse(self.renderer.render(data), status=status_code, content_type='application/json')
@@ -0,0 +1,144 @@
+import threading
+from array import array
+from bisect import bisect_left, insort
+
+from .cache import get_generations
+from .models import Breeds, PetTypes, VetClinics, PetSalons
+
+# Reference tables served by the autocomplete endpoint, keyed by route name.
+AUTOCOMPLETE_TYPES = {
+    'breeds': Breeds,
+    'pet_types': PetTypes,
+    'vet_clinics': VetClinics,
+    'pet_salons': PetSalons,
+}
+AUTOCOMPLETE_MODELS = set(AUTOCOMPLETE_TYPES.values())
+
+
+# Characters of a suffix the suffix array is ordered by. Suffixes starting with a
+# query of up to this length are contiguous; longer queries are matched on their
+# first SUFFIX_KEY_LENGTH characters and checked against the whole name.
+SUFFIX_KEY_LENGTH = 16
+
+
+# Sorted arrays over the lowercased names of a table. Prefix queries are a binary
+# search over the names; substring queries a binary search over every suffix of
+# every name. Suffixes are stored as (pk, offset) pairs in two integer arrays and
+# compared by slicing the name on demand, so the index takes O(total name length)
+# memory. Saved and deleted rows are applied in place, under the module lock.
+class AutocompleteIndex:
+    def __init__(self, names):
+        self.names = dict(names)
+        self.keys = {pk: name.lower() for pk, name in self.names.items()}
+        self.prefixes = sorted((key, pk) for pk, key in self.keys.items())
+        suffixes = sorted(
+            ((pk, offset) for pk, key in self.keys.items() for offset in range(1, len(key))),
+            key=lambda suffix: self.get_suffix_key(*suffix),
+        )
+        self.pks = array('q', (pk for pk, offset in suffixes))
+        self.offsets = array('H', (offset for pk, offset in suffixes))
+
+    def get_suffix_key(self, pk, offset):
+        return self.keys[pk][offset:offset + SUFFIX_KEY_LENGTH]
+
+    def get_suffix(self, position):
+        return self.get_suffix_key(self.pks[position], self.offsets[position])
+
+    # First position in the suffix array whose key isn't below `key`.
+    def find_suffix(self, key):
+        return bisect_left(range(len(self.pks)), key, key=self.get_suffix)
+
+    def match_prefixes(self, query):
+        index = bisect_left(self.prefixes, (query,))
+        while index < len(self.prefixes) and self.prefixes[index][0].startswith(query):
+            yield self.prefixes[index][1]
+            index += 1
+
+    def match_suffixes(self, query):
+        head = query[:SUFFIX_KEY_LENGTH]
+        position = self.find_suffix(head)
+        while position < len(self.pks) and self.get_suffix(position).startswith(head):
+            pk = self.pks[position]
+            if self.keys[pk].startswith(query, self.offsets[position]):
+                yield pk
+            position += 1
+
+    # Names starting with the query, then names containing it, each alphabetical.
+    def search(self, query, limit):
+        query = query.lower()
+        results = []
+        for pk in self.match_prefixes(query):
+            if len(results) == limit:
+                return results
+            results.append(pk)
+        if query:
+            found = set(results)
+            contains = {pk for pk in self.match_suffixes(query) if pk not in found}
+            results += sorted(contains, key=lambda pk: (self.keys[pk], pk))[:limit - len(results)]
+        return results
+
+    def add(self, pk, name):
+        self.remove(pk)
+        key = self.keys[pk] = name.lower()
+        self.names[pk] = name
+        insort(self.prefixes, (key, pk))
+        for offset in range(1, len(key)):
+            position = self.find_suffix(self.get_suffix_key(pk, offset))
+            self.pks.insert(position, pk)
+            self.offsets.insert(position, offset)
+
+    def remove(self, pk):
+        key = self.keys.get(pk)
+        if key is None:
+            return
+        for offset in range(1, len(key)):
+            position = self.find_suffix(self.get_suffix_key(pk, offset))
+            while self.pks[position] != pk or self.offsets[position] != offset:
+                position += 1
+            del self.pks[position]
+            del self.offsets[position]
+        del self.prefixes[bisect_left(self.prefixes, (key, pk))]
+        del self.keys[pk]
+        del self.names[pk]
+
+
+# Per-process indexes, as {model: (generation, index)}. An index is built from the
+# table on first use, patched by this process's model signals and rebuilt when the
+# table's cache generation shows another process wrote to it.
+_indexes = {}
+_lock = threading.Lock()
+
+
+# Callers hold _lock.
+def get_index(model):
+    generation = get_generations([model])[0]
+    entry = _indexes.get(model)
+    if entry is None or entry[0] != generation:
+        entry = _indexes[model] = (generation, AutocompleteIndex(model.objects.values_list('id', 'name')))
+    return entry[1]
+
+
+# Apply a committed saved (name) or deleted (None) row to the index. `written` and
+# `generation` are the table's generations after the write's two bumps (see
+# bump_generation_on_commit); if they don't directly follow the index's, other
+# writes were missed and the index is dropped instead.
+def update_index(model, pk, name, written, generation):
+    with _lock:
+        entry = _indexes.get(model)
+        if entry is None:
+            return
+        if (entry[0] + 1, written + 1) != (written, generation):
+            del _indexes[model]
+            return
+        index = entry[1]
+        if name is None:
+            index.remove(pk)
+        else:
+            index.add(pk, name)
+        _indexes[model] = (generation, index)
+
+
+def autocomplete(model, query, limit=10):
+    with _lock:
+        index = get_index(model)
+        return [{'id': pk, 'name': index.names[pk]} for pk in index.search(query, limit)]
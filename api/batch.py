@@ -0,0 +1,127 @@
+import contextvars
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections, transaction
+from django.urls import Resolver404, resolve
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+
+
+# Threads running the read-only sub-requests of batches in parallel.
+BATCH_WORKERS = 4
+_executor = ThreadPoolExecutor(BATCH_WORKERS, thread_name_prefix='batch')
+
+
+# A copy of the batch request addressed to another path: same headers, cookies,
+# session and user, so sub-requests are authenticated as the batch was.
+def build_request(request, method, path, body):
+    url = urlsplit(path)
+    content = b'' if body is None else json.dumps(body).encode()
+    environ = {
+        **request.META,
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+        'wsgi.input': io.BytesIO(content),
+    }
+    subrequest = WSGIRequest(environ)
+    for name in ('session', 'user', '_dont_enforce_csrf_checks'):
+        if hasattr(request, name):
+            setattr(subrequest, name, getattr(request, name))
+    return subrequest
+
+
+def get_body(response):
+    if hasattr(response, 'data'):
+        return response.data
+    content = b''.join(response.streaming_content) if response.streaming else response.content
+    if response.get('Content-Type', '').startswith('application/json') and content:
+        return json.loads(content)
+    return content.decode(response.charset or 'utf-8', errors='replace')
+
+
+# Resolve and run one sub-request through its view, as the URL resolver would.
+# Async views (the /api/async/ routes) are run to completion on this thread.
+def dispatch(request, method, path, body):
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return {'status': 404, 'headers': {}, 'body': {'detail': 'Not found.'}}
+    subrequest = build_request(request, method, path, body)
+    subrequest.resolver_match = match
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+    response = view(subrequest, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    headers = {name: value for name, value in response.items() if name in ('ETag', 'Location', 'Allow', 'Retry-After')}
+    return {'status': response.status_code, 'headers': headers, 'body': get_body(response)}
+
+
+# Runs in a copy of the batch's context, which carries the router's primary
+# pinning and the request metrics over to the worker thread.
+def dispatch_in_thread(request, method, path, body):
+    close_old_connections()
+    try:
+        return dispatch(request, method, path, body)
+    finally:
+        close_old_connections()
+
+
+# Validated sub-requests of a batch payload, as (method, path, body) tuples.
+def get_subrequests(data, max_requests, batch_path):
+    if not isinstance(data, list) or not data:
+        raise ValidationError({'requests': 'Expected a non-empty list of requests.'})
+    if len(data) > max_requests:
+        raise ValidationError({'requests': f'At most {max_requests} requests per batch.'})
+    subrequests = []
+    for index, item in enumerate(data):
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise ValidationError({'requests': {index: 'Each request needs a path.'}})
+        method = str(item.get('method', 'GET')).upper()
+        path = item['path']
+        if method not in ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'):
+            raise ValidationError({'requests': {index: f'Unsupported method {method}.'}})
+        if not path.startswith('/api/') or urlsplit(path).path == batch_path:
+            raise ValidationError({'requests': {index: 'Path must be an API endpoint other than the batch.'}})
+        subrequests.append((method, path, item.get('body')))
+    return subrequests
+
+
+# Run sub-requests in order. With `parallel`, each run of consecutive reads is
+# spread over the thread pool; writes wait for the reads before them and the
+# reads after them wait for the write. With `atomic`, everything runs on this
+# thread inside one transaction, which is rolled back at the first response with
+# an error status; the requests after it are not run.
+def run_batch(request, subrequests, parallel=False, atomic=False):
+    if atomic:
+        responses = []
+        with transaction.atomic():
+            for method, path, body in subrequests:
+                if responses and responses[-1]['status'] >= 400:
+                    responses.append({'status': 424, 'headers': {}, 'body': {
+                        'detail': 'Not run: an earlier request in the atomic batch failed.'
+                    }})
+                    continue
+                responses.append(dispatch(request, method, path, body))
+            rolled_back = any(response['status'] >= 400 for response in responses)
+            transaction.set_rollback(rolled_back)
+        return responses, rolled_back
+
+    responses, reads = [], []
+    for method, path, body in subrequests:
+        if parallel and method in permissions.SAFE_METHODS:
+            context = contextvars.copy_context()
+            reads.append(_executor.submit(context.run, dispatch_in_thread, request, method, path, body))
+            continue
+        responses += [read.result() for read in reads]
+        reads = []
+        responses.append(dispatch(request, method, path, body))
+    responses += [read.result() for read in reads]
+    return responses, False
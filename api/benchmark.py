@@ -0,0 +1,141 @@
+import datetime
+import json
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from authentication.models import CustomUser
+from .models import Pets, Breeds, Vets
+from .seed import DatasetSeeder
+from .urls import router, pets_router
+
+PERCENTILES = [50, 95, 99]
+
+
+def get_percentile(timings, percentile):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * percentile / 100))]
+
+
+# Alphabetic suffix for the n-th created row, as names only accept letters.
+def get_letters(number):
+    letters = ''
+    while True:
+        number, remainder = divmod(number, 26)
+        letters = chr(ord('a') + remainder) + letters
+        if not number:
+            return letters
+
+
+# Payload builders of the create cases, by route; each call must produce a new row.
+def get_create_payloads(pet, breed, vet):
+    start = datetime.date(2030, 1, 1)
+    return {
+        'pet_types': lambda number: {'name': f'Bench {get_letters(number)}'},
+        'pets': lambda number: {
+            'name': f'Bench {number}', 'sex': 'F', 'birthdate': '2020-01-01', 'color': 'Black',
+            'pet_type_id': breed.pet_type_id, 'breed_id': breed.id,
+        },
+        'weigh_ins': lambda number: {
+            'pet_id': pet.id, 'date': str(start + datetime.timedelta(days=number)), 'weight': '5.00',
+        },
+        'vet_visits': lambda number: {
+            'pet_id': pet.id, 'date': str(start + datetime.timedelta(days=number)), 'reason': 'Checkup',
+            'outcome': 'Healthy', 'vet_id': vet.id,
+        },
+    }
+
+
+# Requests exercised by the suite, as (name, method, path, payload builder).
+def get_cases():
+    pet = Pets.objects.order_by('id').first()
+    cases = []
+    for prefix, viewset, basename in router.registry:
+        cases.append((f'list {prefix}', 'get', f'/api/{prefix}/', None))
+        first = viewset.queryset.model.objects.order_by('id').values_list('id', flat=True).first()
+        cases.append((f'retrieve {prefix}', 'get', f'/api/{prefix}/{first}/', None))
+    for prefix, viewset, basename in pets_router.registry:
+        cases.append((f'nested list {prefix}', 'get', f'/api/pets/{pet.id}/{prefix}/', None))
+    cases.append(('owner dashboard', 'get', '/api/me/pets/', None))
+    payloads = get_create_payloads(pet, Breeds.objects.order_by('id').first(), Vets.objects.order_by('id').first())
+    for prefix, payload in payloads.items():
+        cases.append((f'create {prefix}', 'post', f'/api/{prefix}/', payload))
+    return cases
+
+
+# Seed a dataset of the given scale and time every case `repeat` times through
+# the test client, after one warm-up request. The suite runs `rounds` times and
+# each case keeps its fastest round, so a burst of load on the machine spoils one
+# round rather than the result. Returns {case: {'p50_ms', 'p95_ms', 'p99_ms',
+# 'queries'}}, where queries is the most any request ran. Runs against the
+# current database.
+def run_benchmark(scale=1, repeat=50, seed=0, rounds=3):
+    DatasetSeeder(scale=scale, seed=seed).seed()
+    cache.clear()
+    client = Client()
+    client.force_login(CustomUser.objects.order_by('id').first())
+
+    results = {}
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        cases = get_cases()
+        for round_number in range(rounds):
+            for name, method, path, payload in cases:
+                timings, queries = [], 0
+                # The first request warms caches and is not measured.
+                for number in range(repeat + 1):
+                    kwargs = {}
+                    if payload is not None:
+                        kwargs = {'data': payload(round_number * (repeat + 1) + number),
+                                  'content_type': 'application/json'}
+                    # Keep the query log, which warns when full, to one request.
+                    connection.queries_log.clear()
+                    with CaptureQueriesContext(connection) as captured:
+                        start = time.perf_counter()
+                        response = getattr(client, method)(path, **kwargs)
+                        duration = time.perf_counter() - start
+                    if response.status_code >= 400:
+                        raise ValueError(f'{name}: {method.upper()} {path} returned {response.status_code}.')
+                    if number:
+                        timings.append(duration)
+                        queries = max(queries, len(captured))
+
+                result = {f'p{percentile}_ms': round(get_percentile(timings, percentile) * 1000, 3)
+                          for percentile in PERCENTILES}
+                best = results.get(name)
+                result['queries'] = queries if best is None else max(queries, best['queries'])
+                if best is None or result['p95_ms'] < best['p95_ms']:
+                    results[name] = result
+                else:
+                    best['queries'] = result['queries']
+    return results
+
+
+# Regressions of `results` against a baseline: any case running more queries,
+# missing from it, or slower at p95 than `tolerance` times the baseline. Slowdowns
+# under `margin_ms` are timer noise at these latencies and pass.
+def compare(results, baseline, tolerance=1.5, margin_ms=5):
+    failures = []
+    for name, result in results.items():
+        expected = baseline['cases'].get(name)
+        if expected is None:
+            failures.append(f'{name}: not in the baseline')
+            continue
+        if result['queries'] > expected['queries']:
+            failures.append(f"{name}: {result['queries']} queries, baseline {expected['queries']}")
+        if result['p95_ms'] > max(expected['p95_ms'] * tolerance, expected['p95_ms'] + margin_ms):
+            failures.append(f"{name}: p95 {result['p95_ms']:.2f} ms, baseline {expected['p95_ms']:.2f} ms")
+    return failures
+
+
+def load_baseline(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(path, results, scale, repeat):
+    with open(path, 'w') as file:
+        json.dump({'scale': scale, 'repeat': repeat, 'cases': results}, file, indent=2, sort_keys=True)
+        file.write('\n')
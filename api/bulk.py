@@ -0,0 +1,141 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Model, Q
+from django.db.models.functions import Lower
+from django.dispatch import Signal
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+# Sent with the created instances after a bulk create, which sends no post_save.
+post_bulk_create = Signal()
+
+
+# Value a lookup compares, normalised so Python and SQL agree on equality.
+def get_lookup_key(lookup, value):
+    if isinstance(value, Model):
+        value = value.pk
+    if lookup.endswith('__iexact') and value is not None:
+        value = value.lower()
+    return value
+
+
+def get_duplicate_key(lookups, row):
+    return tuple(get_lookup_key(lookup, row[lookup.split('__')[0]]) for lookup in lookups)
+
+
+# Find which rows already exist according to the serializer's Meta.duplicate_lookups
+# (e.g. ['pet', 'name__iexact', 'date']). All rows are checked with one query that
+# narrows each lookup column to the batch's values; the candidates are then matched
+# row by row in Python. Returns the set of row indexes that are duplicates.
+def find_duplicates(serializer, rows, exclude=None):
+    meta = serializer.Meta
+    lookups = getattr(meta, 'duplicate_lookups', None)
+    if not lookups or not rows:
+        return set()
+
+    queryset = meta.model.objects.all()
+    if exclude is not None:
+        queryset = queryset.exclude(pk=exclude.pk)
+    columns = []
+    for index, lookup in enumerate(lookups):
+        field = lookup.split('__')[0]
+        column = field
+        if lookup.endswith('__iexact'):
+            column = f'_duplicate_{index}'
+            queryset = queryset.annotate(**{column: Lower(field)})
+        columns.append(column)
+
+        values = {get_lookup_key(lookup, row[field]) for row in rows}
+        condition = Q(**{f'{column}__in': values - {None}})
+        if None in values:
+            condition |= Q(**{f'{field}__isnull': True})
+        queryset = queryset.filter(condition)
+
+    existing = set(queryset.values_list(*columns))
+    return {
+        index for index, row in enumerate(rows)
+        if get_duplicate_key(lookups, row) in existing
+    }
+
+
+# Maps a unique constraint violation on write to Meta.duplicate_message. The
+# database enforces uniqueness (see the models' UniqueConstraints), so a write is a
+# single INSERT or UPDATE; Meta.duplicate_lookups, which mirror the constraint, are
+# only queried after a failed write to tell a duplicate from other integrity errors.
+class DuplicateCheckMixin:
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
+            if find_duplicates(self, [self.get_duplicate_row(kwargs)], exclude=self.instance):
+                raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [self.Meta.duplicate_message]})
+            raise
+
+    # Values written for each lookup, falling back to the instance's on partial updates.
+    def get_duplicate_row(self, kwargs):
+        data = {**self.validated_data, **kwargs}
+        row = {}
+        for lookup in self.Meta.duplicate_lookups:
+            field = lookup.split('__')[0]
+            row[field] = data[field] if field in data else getattr(self.instance, field)
+        return row
+
+
+# Validates a list payload and inserts it with a single bulk_create. Rows that
+# fail validation, repeat an earlier row in the batch, or (found after the insert
+# hits a unique constraint) already exist are reported by position, and nothing is
+# written unless every row is valid.
+class BulkCreateListSerializer(serializers.ListSerializer):
+    batch_size = 500
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['Expected a list of items.']})
+        if self.max_length is not None and len(data) > self.max_length:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [f'Ensure this field has no more than {self.max_length} elements.']}
+            )
+
+        rows, errors = [], []
+        for item in data:
+            try:
+                rows.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                rows.append(None)
+                errors.append(exc.detail)
+
+        lookups = getattr(self.child.Meta, 'duplicate_lookups', None)
+        if lookups:
+            seen = set()
+            for index, row in enumerate(rows):
+                if row is None:
+                    continue
+                key = get_duplicate_key(lookups, row)
+                if key in seen:
+                    errors[index] = {api_settings.NON_FIELD_ERRORS_KEY: [self.child.Meta.duplicate_message]}
+                seen.add(key)
+
+        if any(errors):
+            # The payload is rejected anyway, so also report rows that already exist.
+            valid = [index for index, row in enumerate(rows) if row is not None and not errors[index]]
+            for position in find_duplicates(self.child, [rows[index] for index in valid]):
+                errors[valid[position]] = {api_settings.NON_FIELD_ERRORS_KEY: [self.child.Meta.duplicate_message]}
+            raise serializers.ValidationError(errors)
+        return rows
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        try:
+            with transaction.atomic():
+                instances = model.objects.bulk_create([model(**attrs) for attrs in validated_data], batch_size=self.batch_size)
+                post_bulk_create.send(sender=model, instances=instances)
+        except IntegrityError:
+            duplicates = find_duplicates(self.child, validated_data)
+            if not duplicates:
+                raise
+            raise serializers.ValidationError([
+                {api_settings.NON_FIELD_ERRORS_KEY: [self.child.Meta.duplicate_message]} if index in duplicates else {}
+                for index in range(len(validated_data))
+            ])
+        return instances
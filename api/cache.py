@@ -0,0 +1,60 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import PetTypes, Breeds, VetClinics, Vets, PetSalons, PetGroomers
+
+# Read-mostly reference tables whose endpoints are served through the cache.
+REFERENCE_MODELS = [PetTypes, Breeds, VetClinics, Vets, PetSalons, PetGroomers]
+
+
+def get_generation_key(model):
+    return f'generation:{model._meta.label_lower}'
+
+
+# Current generation of each model's table. A generation that is missing from the
+# cache (never set, or evicted) restarts from the clock, so it never repeats a
+# value that earlier cached responses were stored under.
+def get_generations(models):
+    keys = [get_generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+# Invalidate every cached response built from the model's table in O(1).
+# Returns the new generation.
+def bump_generation(model):
+    key = get_generation_key(model)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        generation = time.time_ns()
+        cache.set(key, generation, timeout=None)
+        return generation
+
+
+# Invalidate the model's cached responses for a write: now, so reads later in the
+# writing transaction don't get responses from before it, and again when it
+# commits, so responses that concurrent requests cached from the pre-commit rows
+# are dropped too. Returns the generation after the first bump.
+def bump_generation_on_commit(model):
+    generation = bump_generation(model)
+    transaction.on_commit(lambda: bump_generation(model))
+    return generation
+
+
+# Cache key (also used as the ETag) for a response built from the given tables.
+def get_response_key(request, models):
+    parts = [
+        request.get_host(),
+        request.get_full_path(),
+        request.accepted_media_type,
+        *map(str, get_generations(models)),
+    ]
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
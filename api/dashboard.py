@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+from django.db.models import Aggregate, JSONField, OuterRef, Subquery
+from django.db.models.functions import JSONObject
+from rest_framework import serializers
+
+from .models import PetOwners, WeighIns, VetVisits, Vaccines, Illnesses
+from .reminders import get_superseded_filter
+
+# Weights come back from JSON as numbers; render them as the serializers do ("5.10").
+weight_field = WeighIns._meta.get_field('weight')
+WEIGHT_FIELD = serializers.DecimalField(max_digits=weight_field.max_digits, decimal_places=weight_field.decimal_places)
+
+
+# JSON array of the aggregated values.
+class JSONGroupArray(Aggregate):
+    function = 'JSON_GROUP_ARRAY'
+    output_field = JSONField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function='JSONB_AGG', **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function='JSON_ARRAYAGG', **extra_context)
+
+
+def latest(queryset, **fields):
+    return Subquery(queryset.values(json=JSONObject(**fields))[:1], output_field=JSONField())
+
+
+# The user's pets with their current status, in one statement: each status field
+# is a correlated subquery answered from the pet's (pet, date) indexes.
+def get_owner_dashboard(user):
+    pet = OuterRef('pet_id')
+    current_vaccines = Vaccines.objects.filter(pet=pet, next_due_date__isnull=False).exclude(get_superseded_filter())
+    open_illnesses = (
+        Illnesses.objects.filter(pet=pet, recovery_date__isnull=True)
+        .values('pet')
+        .annotate(items=JSONGroupArray(JSONObject(id='id', name='name', date_of_diagnosis='date_of_diagnosis')))
+        .values('items')
+    )
+    return (
+        PetOwners.objects.filter(user=user)
+        .select_related('pet__pet_type', 'pet__breed')
+        .annotate(
+            latest_weigh_in=latest(
+                WeighIns.objects.filter(pet=pet).order_by('-date', '-id'), date='date', weight='weight',
+            ),
+            next_vaccine=latest(
+                current_vaccines.order_by('next_due_date', 'id'), id='id', name='name', next_due_date='next_due_date',
+            ),
+            latest_vet_visit=latest(
+                VetVisits.objects.filter(pet=pet).order_by('-date', '-id'), id='id', date='date', reason='reason',
+                outcome='outcome',
+            ),
+            open_illnesses=Subquery(open_illnesses, output_field=JSONField()),
+        )
+        .order_by('pet__name', 'pet_id')
+    )
+
+
+def get_dashboard_entry(owner):
+    pet = owner.pet
+    return {
+        'id': pet.id,
+        'name': pet.name,
+        'sex': pet.sex,
+        'birthdate': pet.birthdate,
+        'pet_type': {'id': pet.pet_type.id, 'name': pet.pet_type.name} if pet.pet_type else None,
+        'breed': {'id': pet.breed.id, 'name': pet.breed.name} if pet.breed else None,
+        'owner_type': owner.owner_type,
+        'latest_weigh_in': get_weigh_in(owner.latest_weigh_in),
+        'next_vaccine': owner.next_vaccine,
+        'latest_vet_visit': owner.latest_vet_visit,
+        'open_illnesses': sorted(owner.open_illnesses or [], key=lambda illness: illness['date_of_diagnosis']),
+    }
+
+
+def get_weigh_in(weigh_in):
+    if weigh_in is None:
+        return None
+    return {**weigh_in, 'weight': WEIGHT_FIELD.to_representation(Decimal(str(weigh_in['weight'])))}
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import get_runner, setup_test_environment, teardown_test_environment
+from django.conf import settings
+
+from api.benchmark import run_benchmark, compare, load_baseline, save_baseline
+
+BASELINE = Path(__file__).resolve().parents[2] / 'benchmark_baseline.json'
+
+
+# Seed a throwaway test database and run the benchmark suite against it, failing
+# when a case regresses past the committed baseline.
+class Command(BaseCommand):
+    help = 'Benchmark list, retrieve, nested and create requests against a seeded test database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=None,
+                            help='Dataset size (1 = 100 pets); defaults to the baseline\'s.')
+        parser.add_argument('--repeat', type=int, default=None, help='Requests per case; defaults to the baseline\'s.')
+        parser.add_argument('--rounds', type=int, default=3, help='Runs of the suite; each case keeps its fastest.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the dataset.')
+        parser.add_argument('--baseline', default=str(BASELINE), help='Baseline file.')
+        parser.add_argument('--tolerance', type=float, default=1.5, help='Allowed p95 slowdown over the baseline.')
+        parser.add_argument('--margin', type=float, default=5, help='p95 slowdown in ms always allowed.')
+        parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline.')
+
+    def handle(self, *args, **options):
+        path = Path(options['baseline'])
+        baseline = load_baseline(path) if path.exists() else {'scale': 1, 'repeat': 50, 'cases': {}}
+        scale = options['scale'] or baseline['scale']
+        repeat = options['repeat'] or baseline['repeat']
+
+        setup_test_environment()
+        runner = get_runner(settings)(verbosity=0, interactive=False)
+        databases = runner.setup_databases()
+        try:
+            results = run_benchmark(scale, repeat, options['seed'], options['rounds'])
+        finally:
+            runner.teardown_databases(databases)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'case':<36}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<36}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['queries']:>9}"
+            )
+
+        if options['update_baseline']:
+            save_baseline(path, results, scale, repeat)
+            self.stdout.write(f'Baseline written to {path}.')
+            return
+        if scale != baseline['scale']:
+            raise CommandError(f"Scale {scale} differs from the baseline's {baseline['scale']}.")
+        failures = compare(results, baseline, options['tolerance'], options['margin'])
+        if failures:
+            raise CommandError('Regressions against the baseline:\n' + '\n'.join(failures))
+        self.stdout.write('No regressions against the baseline.')
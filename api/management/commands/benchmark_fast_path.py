@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fastpath import get_fast_path
+from api.urls import router
+
+
+# Time rendering a list through the serializers against the read-only fast path,
+# over rows already in the database.
+class Command(BaseCommand):
+    help = 'Compare list rendering through the serializers and through the read-only fast path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows rendered per endpoint.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per endpoint; the best is reported.')
+
+    def handle(self, *args, **options):
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            self.run(options['rows'], options['repeat'])
+
+    def run(self, rows, repeat):
+        factory = APIRequestFactory()
+        renderer = JSONRenderer()
+        self.stdout.write(f"{'endpoint':<24}{'rows':>8}{'serializer ms':>16}{'fast path ms':>16}{'speedup':>10}")
+
+        for prefix, viewset, basename in router.registry:
+            serializer_class = viewset.serializer_class
+            context = {'request': Request(factory.get(f'/api/{prefix}/'))}
+            fast_path = get_fast_path(serializer_class(context=context))
+            if fast_path is None:
+                continue
+            queryset = viewset.queryset.order_by('id')[:rows]
+            values = viewset.queryset.values(*fast_path.columns).order_by('id')[:rows]
+
+            def serialize():
+                return renderer.render(serializer_class(list(queryset.all()), many=True, context=context).data)
+
+            def fast():
+                return renderer.render(fast_path.render(values.all()))
+
+            if serialize() != fast():
+                raise CommandError(f'Fast path output differs from the serializer for {prefix}.')
+            slow_time, fast_time = self.best_time(serialize, repeat), self.best_time(fast, repeat)
+            count = queryset.count()
+            speedup = slow_time / fast_time if fast_time else float('inf')
+            self.stdout.write(f'{prefix:<24}{count:>8}{slow_time * 1000:>16.2f}{fast_time * 1000:>16.2f}{speedup:>9.1f}x')
+
+    def best_time(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,105 @@
+import asyncio
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from PawKeeper.asgi import application
+
+
+# Drive the ASGI application in-process with concurrent clients and compare a sync
+# DRF endpoint with its native async counterpart under /api/async/.
+class Command(BaseCommand):
+    help = 'Load test a sync endpoint against its async counterpart through the ASGI app.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='weigh_ins/', help='Endpoint path below /api/.')
+        parser.add_argument('--clients', type=int, default=50, help='Concurrent clients.')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per endpoint.')
+        parser.add_argument('--db-latency', type=float, default=0, help='Milliseconds added to every query.')
+
+    def handle(self, *args, **options):
+        if options['db_latency']:
+            self.add_db_latency(options['db_latency'] / 1000)
+
+        self.stdout.write(f"{'endpoint':<32}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for path in (f"/api/{options['path']}", f"/api/async/{options['path']}"):
+                result = asyncio.run(self.run(path, options['clients'], options['requests']))
+                self.stdout.write(
+                    f"{path:<32}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10.1f}"
+                    f"{result['p50'] * 1000:>10.2f}{result['p99'] * 1000:>10.2f}"
+                )
+
+    # Simulate a slow database by sleeping before every query on every connection.
+    def add_db_latency(self, seconds):
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def install(sender, connection, **kwargs):
+            connection.execute_wrappers.append(slow_query)
+
+        connection_created.connect(install, weak=False)
+
+    async def run(self, path, clients, requests):
+        latencies, errors = [], 0
+        queue = asyncio.Queue()
+        for _ in range(requests):
+            queue.put_nowait(path)
+
+        async def client():
+            nonlocal errors
+            while not queue.empty():
+                url = queue.get_nowait()
+                start = time.perf_counter()
+                status = await self.request(url)
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'rps': len(latencies) / elapsed,
+            'p50': statistics.median(latencies),
+            'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        }
+
+    # One GET through the ASGI callable; returns the response status.
+    async def request(self, path):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'testserver')],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        body_sent = asyncio.Event()
+        response = {}
+
+        async def receive():
+            if not body_sent.is_set():
+                body_sent.set()
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+
+        await application(scope, receive, send)
+        return response.get('status')
@@ -0,0 +1,25 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from api.models import SearchDocuments
+from api.search import SEARCH_TYPES, index_records
+
+
+# Index every clinical record from scratch, e.g. after deploying search or when
+# records were written without signals (raw SQL, fixtures loaded with --raw).
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over clinical notes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Records indexed per transaction.')
+
+    def handle(self, *args, **options):
+        SearchDocuments.objects.all().delete()
+        for type_name, (model, fields) in SEARCH_TYPES.items():
+            records = model.objects.only('id', 'pet_id', *fields).iterator(chunk_size=options['chunk_size'])
+            count = 0
+            while chunk := list(islice(records, options['chunk_size'])):
+                index_records(chunk)
+                count += len(chunk)
+            self.stdout.write(f'{type_name}: {count} records indexed')
@@ -0,0 +1,43 @@
+import argparse
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Pets
+from api.seed import DatasetSeeder, FIXED_COUNTS, SCALE_UNIT
+
+
+def parse_count(value):
+    name, _, count = value.partition('=')
+    if name not in SCALE_UNIT and name not in FIXED_COUNTS or not count.isdigit():
+        raise argparse.ArgumentTypeError(f'expected ROUTE=ROWS with a known route, got {value!r}')
+    return name, int(count)
+
+
+# Fill an empty database with a synthetic, deterministic dataset for load testing.
+class Command(BaseCommand):
+    help = 'Generate a synthetic dataset across every model with bulk inserts (COPY on PostgreSQL).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1, help='Dataset size; 1 is 100 pets and their records.')
+        parser.add_argument('--count', type=parse_count, action='append', default=[], metavar='ROUTE=ROWS',
+                            help=f"Rows of one table, overriding the scale (approximate for records): "
+                                 f"{', '.join([*SCALE_UNIT, *FIXED_COUNTS])}.")
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes generating medical records (ignored on SQLite).')
+        parser.add_argument('--skip-derived', action='store_true',
+                            help='Skip search indexing and breed weight stats while loading, allowing COPY; '
+                                 'run rebuild_search_index afterwards.')
+
+    def handle(self, *args, **options):
+        if Pets.objects.exists():
+            raise CommandError('The database already has pets; seed expects an empty database (see manage.py flush).')
+        counts = dict(options['count'])
+        if counts.get('pets', 1) < 1 or counts.get('users', 1) < 1:
+            raise CommandError('At least one pet and one user are needed.')
+        DatasetSeeder(
+            scale=options['scale'], seed=options['seed'], counts=counts, workers=options['workers'],
+            signals=not options['skip_derived'], stdout=self.stdout,
+        ).seed()
+        if options['skip_derived']:
+            self.stdout.write('Derived data was skipped; run manage.py rebuild_search_index.')
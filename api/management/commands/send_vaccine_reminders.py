@@ -0,0 +1,26 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.reminders import enqueue_reminders, process_reminders
+
+
+# Nightly job (e.g. from cron): queue reminders for vaccines coming due, then send
+# the pending ones. Safe to rerun; a vaccine is reminded once per due date.
+class Command(BaseCommand):
+    help = 'Queue and send reminders for vaccines due within the next days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=14, help='Remind vaccines due within this many days.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows queued or sent per batch.')
+        parser.add_argument('--enqueue-only', action='store_true', help="Queue reminders but don't send them.")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        end = today + datetime.timedelta(days=options['days'])
+        queued = enqueue_reminders(today, end, options['batch_size'])
+        self.stdout.write(f'{queued} vaccines due between {today} and {end}')
+        if not options['enqueue_only']:
+            sent = process_reminders(options['batch_size'])
+            self.stdout.write(f'{sent} reminders sent')
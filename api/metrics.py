@@ -0,0 +1,243 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# Routes tracked per method; further routes are counted under route="other".
+MAX_SERIES = 500
+
+
+def get_route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    route = re.sub(r'\(\?P<(\w+)>[^)]*\)', r'{\1}', match.route)
+    route = re.sub(r'<(?:\w+:)?(\w+)>', r'{\1}', route)
+    return route.replace('/?', '/').replace('^', '').replace('$', '').replace('\\', '')
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Series:
+    def __init__(self):
+        self.requests = Counter()
+        self.duration = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_duration = Histogram(LATENCY_BUCKETS)
+        self.serialization_duration = Histogram(LATENCY_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+
+
+# Metric name, help text, Series attribute.
+HISTOGRAMS = [
+    ('pawkeeper_http_request_duration_seconds', 'Time to produce a response.', 'duration'),
+    ('pawkeeper_db_queries', 'Database queries per request.', 'queries'),
+    ('pawkeeper_db_duration_seconds', 'Time spent in database queries per request.', 'db_duration'),
+    ('pawkeeper_serialization_duration_seconds',
+     'Time spent in the view outside database queries (serializers) and rendering the response.',
+     'serialization_duration'),
+    ('pawkeeper_http_response_size_bytes', 'Response body size; 0 for streamed responses.', 'response_size'),
+]
+
+
+def format_labels(labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Per-process aggregation of request metrics by (route, method). Memory is bounded
+# by the number of series and histogram buckets, not by traffic.
+class MetricsRegistry:
+    def __init__(self, max_series=MAX_SERIES):
+        self.max_series = max_series
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, route, method, status, duration, queries, db_duration, serialization_duration, size):
+        with self.lock:
+            key = (route, method)
+            if key not in self.series and len(self.series) >= self.max_series:
+                key = ('other', method)
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = Series()
+            series.requests[f'{status // 100}xx'] += 1
+            series.duration.observe(duration)
+            series.queries.observe(queries)
+            series.db_duration.observe(db_duration)
+            series.serialization_duration.observe(serialization_duration)
+            series.response_size.observe(size)
+
+    # Prometheus text exposition format.
+    def render(self):
+        with self.lock:
+            series = sorted(self.series.items())
+            lines = [
+                '# HELP pawkeeper_http_requests_total Requests handled.',
+                '# TYPE pawkeeper_http_requests_total counter',
+            ]
+            for (route, method), values in series:
+                for status, count in sorted(values.requests.items()):
+                    labels = format_labels({'route': route, 'method': method, 'status': status})
+                    lines.append(f'pawkeeper_http_requests_total{labels} {count}')
+
+            for name, help_text, attribute in HISTOGRAMS:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (route, method), values in series:
+                    histogram = getattr(values, attribute)
+                    cumulative = 0
+                    for bound, count in zip([*histogram.buckets, '+Inf'], histogram.counts):
+                        cumulative += count
+                        labels = format_labels({'route': route, 'method': method, 'le': bound})
+                        lines.append(f'{name}_bucket{labels} {cumulative}')
+                    labels = format_labels({'route': route, 'method': method})
+                    lines.append(f'{name}_sum{labels} {format_value(histogram.sum)}')
+                    lines.append(f'{name}_count{labels} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+# Time and query accounting of one request. Serialization is measured as the time
+# between entering the view and the view returning, minus the database time in
+# between, plus rendering of the response.
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_duration = 0.0
+        self.serialization_duration = 0.0
+        self.started = None
+        # Batch sub-requests run queries on several threads at once.
+        self.lock = threading.Lock()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            with self.lock:
+                self.queries += 1
+                self.db_duration += duration
+
+    def start(self):
+        self.started = (time.perf_counter(), self.db_duration)
+
+    def stop(self):
+        if self.started is not None:
+            started, db_duration = self.started
+            self.serialization_duration += time.perf_counter() - started - (self.db_duration - db_duration)
+            self.started = None
+
+
+# Metrics of the request being handled. A context variable rather than a request
+# attribute, so queries run through sync_to_async or on batch worker threads are
+# counted too.
+current_metrics = ContextVar('request_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+# Installed on every database connection as it is opened (see api.signals).
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# Runs in sync and async mode, so it doesn't push the async views of an ASGI
+# deployment through a thread.
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        request.metrics = RequestMetrics()
+        token = current_metrics.set(request.metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.observe(request, response, start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        request.metrics = RequestMetrics()
+        token = current_metrics.set(request.metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.observe(request, response, start)
+
+    def observe(self, request, response, start):
+        metrics = request.metrics
+        metrics.stop()
+        registry.observe(
+            get_route(request), request.method, response.status_code, time.perf_counter() - start,
+            metrics.queries, metrics.db_duration, metrics.serialization_duration,
+            0 if response.streaming else len(response.content),
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics.start()
+
+    # DRF responses are rendered after the view returns; time the rendering too.
+    def process_template_response(self, request, response):
+        return self.time_rendering(request.metrics, response)
+
+    def time_rendering(self, metrics, response):
+        metrics.stop()
+        metrics.start()
+        response.add_post_render_callback(lambda response: metrics.stop())
+        return response
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics.start()
+
+    async def aprocess_template_response(self, request, response):
+        return self.time_rendering(request.metrics, response)
+
+
+def metrics_view(request):
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='treatments',
+            name='pet',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='treatments', to='api.pets'),
+        ),
+        migrations.AlterField(
+            model_name='vaccines',
+            name='lot',
+            field=models.CharField(max_length=100),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_treatments_pet_alter_vaccines_lot'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='allergies',
+            options={'get_latest_by': 'date_of_diagnosis'},
+        ),
+        migrations.AlterModelOptions(
+            name='groomingappointments',
+            options={'get_latest_by': 'date'},
+        ),
+        migrations.AlterModelOptions(
+            name='illnesses',
+            options={'get_latest_by': 'date_of_diagnosis'},
+        ),
+        migrations.AlterModelOptions(
+            name='procedures',
+            options={'get_latest_by': 'date'},
+        ),
+        migrations.AlterModelOptions(
+            name='surgeries',
+            options={'get_latest_by': 'date'},
+        ),
+        migrations.AlterModelOptions(
+            name='vaccines',
+            options={'get_latest_by': 'application_date'},
+        ),
+        migrations.AlterModelOptions(
+            name='vetvisits',
+            options={'get_latest_by': 'date'},
+        ),
+        migrations.AlterModelOptions(
+            name='weighins',
+            options={'get_latest_by': 'date'},
+        ),
+        migrations.AddIndex(
+            model_name='allergies',
+            index=models.Index(fields=['pet', 'date_of_diagnosis'], name='api_allergi_pet_id_86b2cd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groomingappointments',
+            index=models.Index(fields=['pet', 'date'], name='api_groomin_pet_id_4114b0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='illnesses',
+            index=models.Index(fields=['pet', 'date_of_diagnosis'], name='api_illness_pet_id_19132c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procedures',
+            index=models.Index(fields=['pet', 'date'], name='api_procedu_pet_id_ff2837_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='surgeries',
+            index=models.Index(fields=['pet', 'date'], name='api_surgeri_pet_id_9117d8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccines',
+            index=models.Index(fields=['pet', 'application_date'], name='api_vaccine_pet_id_285f23_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vetvisits',
+            index=models.Index(fields=['pet', 'date'], name='api_vetvisi_pet_id_0d4a36_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weighins',
+            index=models.Index(fields=['pet', 'date'], name='api_weighin_pet_id_65c7d4_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_pet_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='treatments',
+            options={'get_latest_by': 'start_date'},
+        ),
+        migrations.AddIndex(
+            model_name='treatments',
+            index=models.Index(fields=['pet', 'start_date'], name='api_treatme_pet_id_e83f34_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Full-text GIN index matching the expression api.search queries with on Postgres.
+FTS_INDEX = 'api_searchdocuments_text_fts'
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX {FTS_INDEX} ON api_searchdocuments "
+            f"USING gin (to_tsvector('english'::regconfig, COALESCE(text, '')))"
+        )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {FTS_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_treatments_pet_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocuments',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_type', models.CharField(max_length=50)),
+                ('record_id', models.BigIntegerField()),
+                ('text', models.TextField()),
+                ('pet', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='api.pets')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchTerms',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('frequency', models.PositiveIntegerField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='api.searchdocuments')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocuments',
+            constraint=models.UniqueConstraint(fields=('record_type', 'record_id'), name='unique_search_document'),
+        ),
+        migrations.AddIndex(
+            model_name='searchterms',
+            index=models.Index(fields=['term', 'document'], name='api_searcht_term_169827_idx'),
+        ),
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
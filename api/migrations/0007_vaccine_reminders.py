@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VaccineReminders',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('status', models.CharField(choices=[('P', 'Pending'), ('S', 'Sent'), ('X', 'Skipped')], default='P', max_length=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='vaccines',
+            index=models.Index(fields=['next_due_date'], name='api_vaccine_next_du_3bc42b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccines',
+            index=models.Index(fields=['pet', 'name', 'application_date'], name='api_vaccine_pet_id_c58432_idx'),
+        ),
+        migrations.AddField(
+            model_name='vaccinereminders',
+            name='vaccine',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='api.vaccines'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccinereminders',
+            index=models.Index(fields=['status', 'id'], name='api_vaccine_status_39d694_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='vaccinereminders',
+            constraint=models.UniqueConstraint(fields=('vaccine', 'due_date'), name='unique_vaccine_reminder'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_vaccine_reminders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BreedWeightStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bands', models.JSONField(default=dict)),
+                ('last_weigh_in_id', models.BigIntegerField(default=0)),
+                ('stale', models.BooleanField(default=False)),
+                ('breed', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='weight_stats', to='api.breeds')),
+            ],
+        ),
+    ]
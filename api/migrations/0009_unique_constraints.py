@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:55
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_breed_weight_stats'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='allergies',
+            constraint=models.UniqueConstraint(models.F('pet'), django.db.models.functions.text.Lower('allergen'), models.F('date_of_diagnosis'), name='unique_allergy'),
+        ),
+        migrations.AddConstraint(
+            model_name='breeds',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), models.F('pet_type'), name='unique_breed_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='groomingappointments',
+            constraint=models.UniqueConstraint(models.F('pet'), models.F('date'), models.F('pet_groomer'), name='unique_grooming_appointment'),
+        ),
+        migrations.AddConstraint(
+            model_name='illnesses',
+            constraint=models.UniqueConstraint(models.F('pet'), django.db.models.functions.text.Lower('name'), models.F('date_of_diagnosis'), name='unique_illness'),
+        ),
+        migrations.AddConstraint(
+            model_name='petgroomers',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), models.F('pet_salon'), name='unique_pet_groomer_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='petsalons',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), django.db.models.functions.text.Lower('address'), name='unique_pet_salon_name_address'),
+        ),
+        migrations.AddConstraint(
+            model_name='pettypes',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='unique_pet_type_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='procedures',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), models.F('pet'), models.F('date'), name='unique_procedure'),
+        ),
+        migrations.AddConstraint(
+            model_name='surgeries',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), models.F('pet'), models.F('date'), name='unique_surgery'),
+        ),
+        migrations.AddConstraint(
+            model_name='treatments',
+            constraint=models.UniqueConstraint(models.F('illness'), django.db.models.functions.text.Lower('name'), models.F('start_date'), name='unique_treatment'),
+        ),
+        migrations.AddConstraint(
+            model_name='vaccines',
+            constraint=models.UniqueConstraint(models.F('lot'), name='unique_vaccine_lot'),
+        ),
+        migrations.AddConstraint(
+            model_name='vetclinics',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), django.db.models.functions.text.Lower('address'), name='unique_vet_clinic_name_address'),
+        ),
+        migrations.AddConstraint(
+            model_name='vets',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), models.F('vet_clinic'), name='unique_vet_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='vetvisits',
+            constraint=models.UniqueConstraint(models.F('pet'), models.F('date'), models.F('vet'), name='unique_vet_visit'),
+        ),
+        migrations.AddConstraint(
+            model_name='weighins',
+            constraint=models.UniqueConstraint(models.F('pet'), models.F('date'), models.F('weight'), name='unique_weigh_in'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_unique_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='petowners',
+            index=models.Index(fields=['user', 'pet'], name='api_petowne_user_id_850028_idx'),
+        ),
+    ]
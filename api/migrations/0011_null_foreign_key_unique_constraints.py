@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:08
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_pet_owners_user_pet_index'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='breeds',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), condition=models.Q(('pet_type__isnull', True)), name='unique_breed_name_without_pet_type'),
+        ),
+        migrations.AddConstraint(
+            model_name='groomingappointments',
+            constraint=models.UniqueConstraint(models.F('pet'), models.F('date'), condition=models.Q(('pet_groomer__isnull', True)), name='unique_grooming_appointment_without_groomer'),
+        ),
+        migrations.AddConstraint(
+            model_name='petgroomers',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), condition=models.Q(('pet_salon__isnull', True)), name='unique_pet_groomer_name_without_salon'),
+        ),
+        migrations.AddConstraint(
+            model_name='vets',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), condition=models.Q(('vet_clinic__isnull', True)), name='unique_vet_name_without_clinic'),
+        ),
+        migrations.AddConstraint(
+            model_name='vetvisits',
+            constraint=models.UniqueConstraint(models.F('pet'), models.F('date'), condition=models.Q(('vet__isnull', True)), name='unique_vet_visit_without_vet'),
+        ),
+    ]
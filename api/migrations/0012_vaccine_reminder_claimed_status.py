@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_null_foreign_key_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vaccinereminders',
+            name='status',
+            field=models.CharField(choices=[('P', 'Pending'), ('C', 'Claimed'), ('S', 'Sent'), ('X', 'Skipped')], default='P', max_length=1),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Lower
 from authentication.models import CustomUser
 from .validators import validate_alpha
 
@@ -12,6 +14,11 @@ GENDER_CHOICES = (
 class PetTypes(models.Model):
     name = models.CharField(max_length=100, validators=[validate_alpha])
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='unique_pet_type_name'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -20,6 +27,12 @@ class Breeds(models.Model):
     name = models.CharField(max_length=200, validators=[validate_alpha])
     pet_type = models.ForeignKey(PetTypes, related_name='pet_breeds', on_delete=models.CASCADE, null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('name'), F('pet_type'), name='unique_breed_name'),
+            models.UniqueConstraint(Lower('name'), condition=Q(pet_type__isnull=True), name='unique_breed_name_without_pet_type'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -50,6 +63,11 @@ class PetOwners(models.Model):
     pet = models.ForeignKey(Pets, on_delete=models.CASCADE)
     owner_type = models.CharField(max_length=2, choices=OWNER_CHOICES, default='P')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'pet']),
+        ]
+
 
 class VetClinics(models.Model):
     name = models.CharField(max_length=250)
@@ -57,6 +75,11 @@ class VetClinics(models.Model):
     email = models.CharField(max_length=250)
     phone = models.CharField(max_length=15)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('name'), Lower('address'), name='unique_vet_clinic_name_address'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -68,6 +91,12 @@ class Vets(models.Model):
     phone = models.CharField(max_length=15)
     vet_clinic = models.ForeignKey(VetClinics, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('name'), F('vet_clinic'), name='unique_vet_name'),
+            models.UniqueConstraint(Lower('name'), condition=Q(vet_clinic__isnull=True), name='unique_vet_name_without_clinic'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -79,6 +108,15 @@ class Allergies(models.Model):
     date_of_diagnosis = models.DateField()
     vet = models.ForeignKey(Vets, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        get_latest_by = 'date_of_diagnosis'
+        indexes = [
+            models.Index(fields=['pet', 'date_of_diagnosis']),
+        ]
+        constraints = [
+            models.UniqueConstraint(F('pet'), Lower('allergen'), F('date_of_diagnosis'), name='unique_allergy'),
+        ]
+
     def __str__(self):
         return self.allergen
 
@@ -88,10 +126,34 @@ class WeighIns(models.Model):
     date = models.DateField()
     weight = models.DecimalField(max_digits=3, decimal_places=2)
 
+    class Meta:
+        get_latest_by = 'date'
+        indexes = [
+            models.Index(fields=['pet', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(F('pet'), F('date'), F('weight'), name='unique_weigh_in'),
+        ]
+
     def __str__(self):
         return f"{self.id}"
 
 
+# Weight distribution of a breed's pets per age band, updated as weigh-ins arrive
+# (see api/analytics.py).
+class BreedWeightStats(models.Model):
+    breed = models.OneToOneField(Breeds, related_name='weight_stats', on_delete=models.CASCADE)
+    # {age band start in months: {weight: number of weigh-ins}}
+    bands = models.JSONField(default=dict)
+    # Newest weigh-in counted by the last rebuild; older ones are already included.
+    last_weigh_in_id = models.BigIntegerField(default=0)
+    # Set when weigh-ins or pets change in ways that can't be applied incrementally.
+    stale = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.breed_id}"
+
+
 class Surgeries(models.Model):
     pet = models.ForeignKey(Pets, related_name='surgeries', on_delete=models.CASCADE)
     date = models.DateField()
@@ -99,6 +161,15 @@ class Surgeries(models.Model):
     description = models.TextField()
     vet = models.ForeignKey(Vets, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        get_latest_by = 'date'
+        indexes = [
+            models.Index(fields=['pet', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(Lower('name'), F('pet'), F('date'), name='unique_surgery'),
+        ]
+
     def __str__(self):
         return f"{self.id}"
 
@@ -110,6 +181,15 @@ class Procedures(models.Model):
     description = models.TextField()
     vet = models.ForeignKey(Vets, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        get_latest_by = 'date'
+        indexes = [
+            models.Index(fields=['pet', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(Lower('name'), F('pet'), F('date'), name='unique_procedure'),
+        ]
+
     def __str__(self):
         return f"{self.id}"
 
@@ -121,6 +201,16 @@ class VetVisits(models.Model):
     outcome = models.TextField()
     vet = models.ForeignKey(Vets, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        get_latest_by = 'date'
+        indexes = [
+            models.Index(fields=['pet', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(F('pet'), F('date'), F('vet'), name='unique_vet_visit'),
+            models.UniqueConstraint(F('pet'), F('date'), condition=Q(vet__isnull=True), name='unique_vet_visit_without_vet'),
+        ]
+
     def __str__(self):
         return f"{self.id}"
 
@@ -135,6 +225,18 @@ class Vaccines(models.Model):
     next_due_date = models.DateField(null=True)
     vet = models.ForeignKey(Vets, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        get_latest_by = 'application_date'
+        indexes = [
+            models.Index(fields=['pet', 'application_date']),
+            models.Index(fields=['next_due_date']),
+            # Looks up later applications of the same vaccine (see api/reminders.py).
+            models.Index(fields=['pet', 'name', 'application_date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(F('lot'), name='unique_vaccine_lot'),
+        ]
+
     def __str__(self):
         return f"{self.id}"
 
@@ -147,6 +249,15 @@ class Illnesses(models.Model):
     recovery_date = models.DateField(null=True)
     vet = models.ForeignKey(Vets, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        get_latest_by = 'date_of_diagnosis'
+        indexes = [
+            models.Index(fields=['pet', 'date_of_diagnosis']),
+        ]
+        constraints = [
+            models.UniqueConstraint(F('pet'), Lower('name'), F('date_of_diagnosis'), name='unique_illness'),
+        ]
+
     def __str__(self):
         return f"{self.id}"
 
@@ -160,6 +271,15 @@ class Treatments(models.Model):
     end_date = models.DateField(null=True)
     vet = models.ForeignKey(Vets, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        get_latest_by = 'start_date'
+        indexes = [
+            models.Index(fields=['pet', 'start_date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(F('illness'), Lower('name'), F('start_date'), name='unique_treatment'),
+        ]
+
     def __str__(self):
         return f"{self.id}"
 
@@ -170,6 +290,11 @@ class PetSalons(models.Model):
     email = models.CharField(max_length=250, null=True)
     phone = models.CharField(max_length=15)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('name'), Lower('address'), name='unique_pet_salon_name_address'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -181,6 +306,12 @@ class PetGroomers(models.Model):
     phone = models.CharField(max_length=15, null=True)
     pet_salon = models.ForeignKey(PetSalons, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('name'), F('pet_salon'), name='unique_pet_groomer_name'),
+            models.UniqueConstraint(Lower('name'), condition=Q(pet_salon__isnull=True), name='unique_pet_groomer_name_without_salon'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -193,5 +324,70 @@ class GroomingAppointments(models.Model):
     pet_groomer = models.ForeignKey(PetGroomers, on_delete=models.SET_NULL, null=True)
     pet_salon = models.ForeignKey(PetSalons, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        get_latest_by = 'date'
+        indexes = [
+            models.Index(fields=['pet', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(F('pet'), F('date'), F('pet_groomer'), name='unique_grooming_appointment'),
+            models.UniqueConstraint(F('pet'), F('date'), condition=Q(pet_groomer__isnull=True), name='unique_grooming_appointment_without_groomer'),
+        ]
+
     def __str__(self):
         return f"{self.id}"
+
+
+# A vaccine coming due, queued once per due date and sent by the reminder command.
+class VaccineReminders(models.Model):
+    STATUS_CHOICES = (
+        ('P', 'Pending'),
+        ('C', 'Claimed'),
+        ('S', 'Sent'),
+        ('X', 'Skipped'),
+    )
+
+    vaccine = models.ForeignKey(Vaccines, related_name='reminders', on_delete=models.CASCADE)
+    due_date = models.DateField()
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES, default='P')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vaccine', 'due_date'], name='unique_vaccine_reminder'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.vaccine_id} {self.due_date}"
+
+
+# Searchable text of one clinical record, kept in sync by signals (see api/search.py).
+class SearchDocuments(models.Model):
+    record_type = models.CharField(max_length=50)
+    record_id = models.BigIntegerField()
+    pet = models.ForeignKey(Pets, on_delete=models.CASCADE, null=True)
+    text = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['record_type', 'record_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.record_type} {self.record_id}"
+
+
+# Inverted index over SearchDocuments, used on databases without full-text search.
+class SearchTerms(models.Model):
+    term = models.CharField(max_length=50)
+    document = models.ForeignKey(SearchDocuments, related_name='terms', on_delete=models.CASCADE)
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'document']),
+        ]
@@ -0,0 +1,200 @@
+import base64
+import datetime
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .timeline import get_timeline
+
+
+def encode_payload(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+
+def decode_payload(encoded):
+    return json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+
+
+# Keyset pagination over the view's ordering (e.g. ('date', 'id') or ('id',)).
+# The cursor holds the ordering values of the last row seen, and the next page is
+# fetched with a row comparison against them, so deep pages cost the same as the
+# first one and no OFFSET is ever issued. Ordering keys must be ascending and end
+# with a unique column.
+class KeysetPagination(pagination.BasePagination):
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(list(self.get_page_queryset(queryset, request, view)))
+
+    # Same as paginate_queryset(), reading the page with the async ORM.
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.get_page([row async for row in self.get_page_queryset(queryset, request, view)])
+
+    def get_page_queryset(self, queryset, request, view):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = self.cursor is not None and self.cursor['reverse']
+        if self.cursor is not None:
+            try:
+                queryset = queryset.filter(self.keyset_filter(self.cursor['keys'], self.reverse))
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+        ordering = [f'-{key}' for key in self.ordering] if self.reverse else list(self.ordering)
+
+        # Fetch one extra row to find out whether there is a further page.
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def get_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = has_more if self.reverse else self.cursor is not None
+        self.first_keys = self.get_keys(results[0]) if results else None
+        self.last_keys = self.get_keys(results[-1]) if results else None
+        if not results and self.cursor is not None:
+            # Past either end of the data: point back at where we came from.
+            self.first_keys = self.last_keys = self.cursor['keys']
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_ordering(self, view):
+        if view is not None and hasattr(view, 'get_ordering'):
+            return tuple(view.get_ordering())
+        return ('id',)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or self.last_keys is None:
+            return None
+        return self.encode_cursor(self.last_keys, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_keys is None:
+            return None
+        return self.encode_cursor(self.first_keys, reverse=True)
+
+    # Build (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... for the ordering keys.
+    def keyset_filter(self, keys, reverse):
+        lookup = 'lt' if reverse else 'gt'
+        clauses = []
+        for index, key in enumerate(self.ordering):
+            equal = {self.ordering[i]: keys[i] for i in range(index)}
+            clauses.append(Q(**equal, **{f'{key}__{lookup}': keys[index]}))
+        return reduce(or_, clauses)
+
+    # Rows are model instances, or dicts when the view reads with .values().
+    def get_keys(self, instance):
+        if isinstance(instance, dict):
+            return [self.format_key(instance[key]) for key in self.ordering]
+        return [instance._meta.get_field(key).value_to_string(instance) for key in self.ordering]
+
+    def format_key(self, value):
+        return value.isoformat() if isinstance(value, (datetime.date, datetime.time)) else str(value)
+
+    def encode_cursor(self, keys, reverse):
+        cursor = encode_payload({'k': keys, 'r': int(reverse)})
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            payload = decode_payload(encoded)
+            keys, reverse = payload['k'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(keys, list) or len(keys) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return {'keys': keys, 'reverse': reverse}
+
+
+# Page-number pagination for small reference tables where clients want page
+# numbers and a total count. Opt a viewset in with
+# GenericViewSet.as_viewset(model, serializer, pagination_class=ReferencePagination).
+class ReferencePagination(pagination.PageNumberPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+# Forward-only cursor over a pet's merged timeline. The cursor is the
+# (timestamp, type, id) position of the last entry returned.
+class TimelinePagination(KeysetPagination):
+    def paginate_timeline(self, pet_id, types, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        entries = get_timeline(pet_id, types, self.decode_position(request), self.page_size + 1)
+        self.has_next = len(entries) > self.page_size
+        entries = entries[:self.page_size]
+        self.last_position = entries[-1][:3] if entries else None
+        return entries
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        timestamp, type_name, record_id = self.last_position
+        cursor = encode_payload({'t': timestamp.isoformat(), 'k': type_name, 'i': record_id})
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_position(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            payload = decode_payload(encoded)
+            timestamp = datetime.datetime.fromisoformat(payload['t'])
+            return timestamp.astimezone(datetime.timezone.utc), str(payload['k']), int(payload['i'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,99 @@
+import logging
+import threading
+
+from django.db import connection, models, transaction
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Rows deleted or updated per statement, and per transaction.
+PURGE_CHUNK_SIZE = 1000
+
+# Sent with the primary keys of a chunk of rows just before they are purged, in
+# the transaction that deletes them. A model whose delete signals have receivers
+# can only be purged if it also has receivers for this signal, doing set-based
+# what the delete receivers do per row.
+pre_purge = Signal()
+
+
+# Reverse relations a purge follows, as (relation, on_delete), or None if a
+# relation needs the deletion Collector (PROTECT, RESTRICT, SET_DEFAULT, SET(),
+# many-to-many and generic relations).
+def get_relations(model):
+    if model._meta.many_to_many or model._meta.private_fields:
+        return None
+    relations = []
+    for relation in model._meta.related_objects:
+        if relation.many_to_many:
+            return None
+        on_delete = relation.on_delete
+        if on_delete is models.DO_NOTHING:
+            continue
+        if on_delete not in (models.CASCADE, models.SET_NULL):
+            return None
+        relations.append((relation, on_delete))
+    return relations
+
+
+# Whether rows of the model, and everything they cascade to, can be deleted with
+# set-based SQL instead of the Collector.
+def can_purge(model, seen=None):
+    seen = set() if seen is None else seen
+    if model in seen:
+        return True
+    seen.add(model)
+    has_delete_receivers = pre_delete.has_listeners(model) or post_delete.has_listeners(model)
+    if has_delete_receivers and not pre_purge.has_listeners(model):
+        return False
+    relations = get_relations(model)
+    if relations is None:
+        return False
+    return all(
+        can_purge(relation.related_model, seen) for relation, on_delete in relations if on_delete is models.CASCADE
+    )
+
+
+# Delete rows and everything cascading from them, children first. Each chunk of
+# each table is its own transaction, so locks are held briefly and memory stays
+# flat however many records there are. An interrupted purge leaves whole chunks
+# deleted and can be run again. Returns the number of rows deleted per model.
+def purge(model, pks, chunk_size=PURGE_CHUNK_SIZE):
+    counts = {}
+    pks = list(pks)
+    for start in range(0, len(pks), chunk_size):
+        purge_rows(model, pks[start:start + chunk_size], chunk_size, counts)
+    return counts
+
+
+def purge_rows(model, pks, chunk_size, counts):
+    for relation, on_delete in get_relations(model):
+        related = relation.related_model._base_manager.filter(**{f'{relation.field.name}__in': pks})
+        while ids := list(related.values_list('pk', flat=True)[:chunk_size]):
+            if on_delete is models.CASCADE:
+                purge_rows(relation.related_model, ids, chunk_size, counts)
+            else:
+                with transaction.atomic():
+                    relation.related_model._base_manager.filter(pk__in=ids).update(**{relation.field.name: None})
+
+    with transaction.atomic():
+        pre_purge.send(sender=model, pks=pks)
+        queryset = model._base_manager.filter(pk__in=pks)
+        deleted = queryset._raw_delete(queryset.db)
+    if deleted:
+        counts[model._meta.label] = counts.get(model._meta.label, 0) + deleted
+
+
+# Purge once the current transaction commits, in a background thread.
+def purge_in_background(model, pks, chunk_size=PURGE_CHUNK_SIZE):
+    pks = list(pks)
+
+    def run():
+        try:
+            purge(model, pks, chunk_size)
+        except Exception:
+            logger.exception('Background purge of %s %s failed.', model._meta.label, pks)
+        finally:
+            connection.close()
+
+    transaction.on_commit(lambda: threading.Thread(target=run, daemon=True).start())
@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+# Collect the relations a serializer reads so they can be fetched up front.
+# Forward foreign keys are joined with select_related, reverse and many-to-many
+# relations are batched with prefetch_related.
+def get_serializer_relations(model, serializer_class, field_names=None):
+    select, prefetch = [], []
+    for name, field in serializer_class().fields.items():
+        if field.write_only or (field_names is not None and name not in field_names):
+            continue
+
+        if isinstance(field, serializers.SerializerMethodField):
+            source = name
+        else:
+            source = field.source
+        if source == '*':
+            continue
+
+        # Related fields that only render the pk read it from the FK column.
+        if isinstance(field, serializers.RelatedField) and field.use_pk_only_optimization():
+            continue
+        if isinstance(field, serializers.ManyRelatedField) and field.child_relation.use_pk_only_optimization():
+            continue
+
+        path = source.split('.')
+        try:
+            model_field = model._meta.get_field(path[0])
+        except FieldDoesNotExist:
+            continue
+        # Skip attnames such as 'pet_id', which are plain columns.
+        if not model_field.is_relation or model_field.name != path[0]:
+            continue
+
+        lookup = '__'.join(path)
+        if model_field.many_to_many or model_field.one_to_many:
+            prefetch.append(lookup)
+        else:
+            select.append(lookup)
+    return select, prefetch
+
+
+# Apply the eager loading a serializer needs to a queryset.
+# Serializers can define a `setup_eager_loading(queryset)` classmethod to add
+# relations that are walked outside of declared fields (e.g. in to_representation).
+def eager_load(queryset, serializer_class, field_names=None):
+    select, prefetch = get_serializer_relations(queryset.model, serializer_class, field_names)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+
+    setup_eager_loading = getattr(serializer_class, 'setup_eager_loading', None)
+    if setup_eager_loading is not None:
+        queryset = setup_eager_loading(queryset)
+    return queryset
+
+
+# Model fields read by the given serializer fields, or None if any of them reads
+# something that can't be traced back to a column (e.g. a computed method field).
+def get_serializer_columns(model, serializer_class, field_names):
+    columns = {model._meta.pk.name}
+    for name, field in serializer_class().fields.items():
+        if field.write_only or name not in field_names:
+            continue
+        if isinstance(field, serializers.HyperlinkedIdentityField):
+            continue
+        source = name if isinstance(field, serializers.SerializerMethodField) else field.source
+        if source == '*':
+            return None
+        try:
+            columns.add(model._meta.get_field(source.split('.')[0]).name)
+        except FieldDoesNotExist:
+            return None
+    return columns
+
+
+# Narrow a viewset queryset to what a sparse fieldset renders: relations of the
+# dropped fields are no longer joined and unrequested columns (typically large
+# TextFields) are deferred. `required` names further columns the view reads, such
+# as its ordering keys.
+def sparse_queryset(queryset, serializer_class, field_names, required=()):
+    queryset = eager_load(queryset.select_related(None).prefetch_related(None), serializer_class, field_names)
+    columns = get_serializer_columns(queryset.model, serializer_class, field_names)
+    if columns is None:
+        return queryset
+    columns.update(required)
+    # Relations joined by the serializer's own eager loading hook must stay loaded.
+    if isinstance(queryset.query.select_related, dict):
+        columns.update(queryset.query.select_related)
+    return queryset.only(*columns)
+
+
+# Attribute an embedded collection is prefetched into. Sliced prefetches must be
+# stored on an attribute rather than in the related manager's cache.
+def get_include_attr(name):
+    return f'included_{name}'
+
+
+# Prefetches for the related collections a serializer embeds with `include` (see
+# SparseFieldsMixin), one query per relation however many parent rows there are.
+# Each collection is eager-loaded for its own serializer, ordered latest first and
+# capped at the serializer's Meta.include_limits or API_INCLUDE_ROW_LIMIT rows.
+def get_include_prefetches(serializer_class, include):
+    prefetches = []
+    limits = getattr(serializer_class.Meta, 'include_limits', {})
+    for name, nested in include.items():
+        related_serializer = serializer_class.get_include_serializer(name)
+        model = related_serializer.Meta.model
+        queryset = eager_load(model.objects.all(), related_serializer)
+        queryset = queryset.prefetch_related(*get_include_prefetches(related_serializer, nested))
+        latest_by = model._meta.get_latest_by
+        queryset = queryset.order_by(*([f'-{latest_by}'] if latest_by else []), '-id')
+        limit = limits.get(name, settings.API_INCLUDE_ROW_LIMIT)
+        prefetches.append(Prefetch(name, queryset=queryset[:limit], to_attr=get_include_attr(name)))
+    return prefetches
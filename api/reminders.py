@@ -0,0 +1,92 @@
+from itertools import islice
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from django.utils import timezone
+
+from .models import Vaccines, VaccineReminders, PetOwners
+
+
+# Vaccines that were applied again to the same pet later on; their due date is no
+# longer relevant. Expressed as a correlated NOT EXISTS so the database runs it as
+# an anti-join over the (pet, name, application_date) index.
+def get_superseded_filter(prefix=''):
+    later = Vaccines.objects.filter(
+        pet=OuterRef(f'{prefix}pet'),
+        name=OuterRef(f'{prefix}name'),
+        application_date__gt=OuterRef(f'{prefix}application_date'),
+    )
+    return Exists(later)
+
+
+# Vaccines due between start and end (inclusive), read off the next_due_date index.
+def get_due_vaccines(start, end):
+    return Vaccines.objects.filter(next_due_date__range=(start, end)).exclude(get_superseded_filter())
+
+
+# Queue a reminder for every vaccine due in the window. Runs are idempotent: a
+# vaccine gets one reminder per due date, whatever the number of runs.
+def enqueue_reminders(start, end, batch_size=1000):
+    rows = get_due_vaccines(start, end).values_list('id', 'next_due_date').iterator(chunk_size=batch_size)
+    count = 0
+    while batch := list(islice(rows, batch_size)):
+        VaccineReminders.objects.bulk_create(
+            [VaccineReminders(vaccine_id=vaccine_id, due_date=due_date) for vaccine_id, due_date in batch],
+            ignore_conflicts=True,
+        )
+        count += len(batch)
+    return count
+
+
+def get_reminder_messages(reminder):
+    vaccine = reminder.vaccine
+    pet = vaccine.pet
+    return [
+        EmailMessage(
+            subject=f"{pet.name} is due for {vaccine.name}",
+            body=f"{pet.name}'s {vaccine.name} vaccine is due on {reminder.due_date.isoformat()}.",
+            to=[owner.user.email],
+        )
+        for owner in pet.petowners_set.all()
+    ]
+
+
+# Send pending reminders in batches of `batch_size`, with a fixed number of queries
+# and one send call per batch. Reminders whose vaccine was applied again since they
+# were queued are skipped. Rows are claimed with SKIP LOCKED where supported, so
+# several workers can drain the queue.
+#
+# Each batch is claimed (status 'C') and committed before anything is sent, then
+# marked sent. A worker dying between the send and the final update leaves its
+# batch claimed instead of mailing the owners again on the next run. A send that
+# raises puts the batch back to pending, so messages sent before the error are
+# sent again.
+def process_reminders(batch_size=1000):
+    pending = VaccineReminders.objects.filter(status='P')
+    pending.filter(get_superseded_filter('vaccine__')).update(status='X')
+
+    sent = 0
+    with get_connection() as connection:
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    pending.select_for_update(skip_locked=True, of=('self',))
+                    .select_related('vaccine__pet')
+                    .prefetch_related(Prefetch(
+                        'vaccine__pet__petowners_set', queryset=PetOwners.objects.select_related('user')
+                    ))
+                    .order_by('id')[:batch_size]
+                )
+                if not batch:
+                    return sent
+                claimed = VaccineReminders.objects.filter(id__in=[reminder.id for reminder in batch])
+                claimed.update(status='C')
+
+            try:
+                connection.send_messages([message for reminder in batch for message in get_reminder_messages(reminder)])
+            except Exception:
+                claimed.update(status='P')
+                raise
+            claimed.update(status='S', sent_at=timezone.now())
+            sent += len(batch)
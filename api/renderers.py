@@ -0,0 +1,59 @@
+import csv
+import datetime
+import json
+
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+
+# Renderers that can also write a row iterator incrementally. Views pass them a
+# generator through render_rows() and wrap the result in a StreamingHttpResponse,
+# so an export never holds more than one row in memory.
+class StreamingRenderer(renderers.BaseRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return b''.join(self.render_rows(rows))
+
+    def render_rows(self, rows):
+        raise NotImplementedError('render_rows() must be implemented.')
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render_rows(self, rows):
+        for row in rows:
+            yield json.dumps(row, cls=encoders.JSONEncoder, ensure_ascii=False).encode() + b'\n'
+
+
+# File-like object whose write() hands back the line instead of buffering it.
+class Echo:
+    def write(self, value):
+        return value
+
+
+# One column per top-level field. Nested objects (e.g. pet) are written as JSON.
+class CSVRenderer(StreamingRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render_rows(self, rows):
+        writer = csv.writer(Echo())
+        header = None
+        for row in rows:
+            if header is None:
+                header = list(row)
+                yield writer.writerow(header).encode()
+            yield writer.writerow([self.format_value(row.get(column)) for column in header]).encode()
+
+    def format_value(self, value):
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, cls=encoders.JSONEncoder, ensure_ascii=False)
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        return value
@@ -0,0 +1,177 @@
+import math
+import re
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, ExpressionWrapper, F, FloatField, Sum, Value, When
+from django.utils.html import escape
+
+from .models import (
+    Allergies, Surgeries, Procedures, VetVisits, Illnesses, Treatments,
+    SearchDocuments, SearchTerms
+)
+
+# Clinical free-text fields that are searchable, keyed by record type (route name).
+SEARCH_TYPES = {
+    'allergies': (Allergies, ['allergen', 'reaction']),
+    'surgeries': (Surgeries, ['name', 'description']),
+    'procedures': (Procedures, ['name', 'description']),
+    'vet_visits': (VetVisits, ['reason', 'outcome']),
+    'illnesses': (Illnesses, ['name', 'description']),
+    'treatments': (Treatments, ['name', 'description']),
+}
+SEARCH_MODELS = {model: type_name for type_name, (model, fields) in SEARCH_TYPES.items()}
+
+SEARCH_CONFIG = 'english'
+STOP_WORDS = frozenset(
+    'a an and are as at be but by for from has have in is it its of on or that the this to was were with'.split()
+)
+TOKEN_PATTERN = re.compile(r'\w+')
+MAX_TERM_LENGTH = 50
+SNIPPET_WORDS = 30
+START_SEL, STOP_SEL = '<mark>', '</mark>'
+# Markers Postgres puts around matches, swapped for START_SEL/STOP_SEL once the
+# headline is HTML-escaped.
+START_SENTINEL, STOP_SENTINEL = '\x02', '\x03'
+
+
+def tokenize(text):
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOP_WORDS and len(token) <= MAX_TERM_LENGTH
+    ]
+
+
+def uses_postgres_search():
+    return connection.vendor == 'postgresql'
+
+
+def get_document_text(record):
+    fields = SEARCH_TYPES[SEARCH_MODELS[type(record)]][1]
+    return '\n'.join(getattr(record, field) or '' for field in fields)
+
+
+# (Re)build the search documents of the given records. On Postgres the GIN index
+# over the document text is the inverted index; elsewhere the tokens are written to
+# SearchTerms.
+def index_records(records):
+    records = [record for record in records if type(record) in SEARCH_MODELS]
+    if not records:
+        return
+
+    with transaction.atomic():
+        ids_by_type = {}
+        for record in records:
+            ids_by_type.setdefault(SEARCH_MODELS[type(record)], []).append(record.pk)
+        for type_name, ids in ids_by_type.items():
+            SearchDocuments.objects.filter(record_type=type_name, record_id__in=ids).delete()
+
+        documents = SearchDocuments.objects.bulk_create([
+            SearchDocuments(
+                record_type=SEARCH_MODELS[type(record)],
+                record_id=record.pk,
+                pet_id=record.pet_id,
+                text=get_document_text(record),
+            )
+            for record in records
+        ])
+        if not uses_postgres_search():
+            SearchTerms.objects.bulk_create([
+                SearchTerms(document=document, term=term, frequency=frequency)
+                for document in documents
+                for term, frequency in Counter(tokenize(document.text)).items()
+            ], batch_size=1000)
+
+
+def remove_record(record):
+    SearchDocuments.objects.filter(record_type=SEARCH_MODELS[type(record)], record_id=record.pk).delete()
+
+
+def remove_records(model, pks):
+    SearchDocuments.objects.filter(record_type=SEARCH_MODELS[model], record_id__in=pks).delete()
+
+
+# Best matching documents for a query, as (document, score, snippet) tuples. All
+# query terms must match. Results can be scoped to a pet, a set of pets (e.g. an
+# owner's) and record types.
+def search(query, pet_id=None, pet_ids=None, types=None, limit=20):
+    documents = SearchDocuments.objects.all()
+    if pet_id is not None:
+        documents = documents.filter(pet_id=pet_id)
+    if pet_ids is not None:
+        documents = documents.filter(pet_id__in=pet_ids)
+    if types is not None:
+        documents = documents.filter(record_type__in=types)
+
+    if uses_postgres_search():
+        return search_postgres(documents, query, limit)
+    return search_terms(documents, query, limit)
+
+
+def search_postgres(documents, query, limit):
+    from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+
+    vector = SearchVector('text', config=SEARCH_CONFIG)
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    documents = documents.annotate(search=vector).filter(search=search_query).annotate(
+        score=SearchRank(vector, search_query),
+        snippet=SearchHeadline(
+            'text', search_query, config=SEARCH_CONFIG, start_sel=START_SENTINEL, stop_sel=STOP_SENTINEL,
+            max_words=SNIPPET_WORDS, min_words=SNIPPET_WORDS // 2,
+        ),
+    ).defer('text').order_by('-score', 'id')[:limit]
+    return [(document, document.score, escape_headline(document.snippet)) for document in documents]
+
+
+def escape_headline(headline):
+    return escape(headline).replace(START_SENTINEL, START_SEL).replace(STOP_SENTINEL, STOP_SEL)
+
+
+# TF-IDF ranking over SearchTerms. Each term is one range scan of the
+# (term, document) index, and only the top `limit` documents are loaded.
+def search_terms(documents, query, limit):
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+
+    frequencies = dict(
+        SearchTerms.objects.filter(term__in=terms).values_list('term').annotate(count=Count('id'))
+    )
+    if len(frequencies) < len(terms):
+        return []
+    total = SearchDocuments.objects.count()
+    weights = [
+        When(term=term, then=ExpressionWrapper(
+            F('frequency') * Value(math.log(1 + total / frequencies[term])), output_field=FloatField()
+        ))
+        for term in terms
+    ]
+
+    matches = list(
+        SearchTerms.objects.filter(term__in=terms, document__in=documents)
+        .values('document')
+        .annotate(matched=Count('term'), score=Sum(Case(*weights, output_field=FloatField())))
+        .filter(matched=len(terms))
+        .order_by('-score', 'document')
+        .values_list('document', 'score')[:limit]
+    )
+    found = SearchDocuments.objects.in_bulk([document_id for document_id, score in matches])
+    return [
+        (found[document_id], score, get_snippet(found[document_id].text, set(terms)))
+        for document_id, score in matches
+    ]
+
+
+# Window of the text around the first match as HTML, with matching words highlighted.
+def get_snippet(text, terms):
+    words = text.split()
+    matches = [index for index, word in enumerate(words) if terms.intersection(tokenize(word))]
+    start = max(0, matches[0] - SNIPPET_WORDS // 3) if matches else 0
+    window = words[start:start + SNIPPET_WORDS]
+    highlighted = [
+        f'{START_SEL}{escape(word)}{STOP_SEL}' if terms.intersection(tokenize(word)) else escape(word)
+        for word in window
+    ]
+    prefix = '... ' if start else ''
+    suffix = ' ...' if start + SNIPPET_WORDS < len(words) else ''
+    return prefix + ' '.join(highlighted) + suffix
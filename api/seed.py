@@ -0,0 +1,353 @@
+import datetime
+import math
+import multiprocessing
+import random
+from itertools import islice
+
+from django.db import connection, connections, transaction
+
+from authentication.hashing import hash_password
+from authentication.models import CustomUser
+from .bulk import post_bulk_create
+from .cache import REFERENCE_MODELS, bump_generation_on_commit
+from .models import (
+    PetTypes, Breeds, Pets, PetOwners, VetClinics, Vets, Allergies,
+    WeighIns, Surgeries, Procedures, VetVisits, Vaccines, Illnesses,
+    Treatments, PetSalons, PetGroomers, GroomingAppointments
+)
+
+PET_TYPES = ['Dog', 'Cat', 'Rabbit', 'Ferret', 'Guinea Pig']
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'to', 'shi', 'ba', 'ne', 'ru', 'vo', 'da', 'pe', 'li', 'zu', 'an', 'el']
+COLORS = ['Black', 'White', 'Brown', 'Grey', 'Ginger', 'Tabby']
+ALLERGENS = ['Pollen', 'Chicken', 'Beef', 'Dust mites', 'Fleas', 'Grass', 'Dairy', 'Wheat']
+ILLNESSES = ['Otitis', 'Gastroenteritis', 'Conjunctivitis', 'Dermatitis', 'Kennel cough', 'Cystitis', 'Arthritis']
+TREATMENTS = ['Antibiotics', 'Anti-inflammatories', 'Ear drops', 'Diet change', 'Rest', 'Physiotherapy']
+SURGERIES = ['Spay', 'Neuter', 'Mass removal', 'Dental extraction', 'Cruciate repair']
+PROCEDURES = ['Dental cleaning', 'X-ray', 'Ultrasound', 'Blood panel', 'Microchipping', 'Nail trim']
+VISIT_REASONS = ['Annual checkup', 'Vomiting', 'Limping', 'Skin rash', 'Ear scratching', 'Weight loss', 'Coughing']
+VACCINES = ['Rabies', 'Distemper', 'Parvovirus', 'Leptospirosis', 'Bordetella', 'Feline leukemia']
+GROOMING_TYPES = ['Bath', 'Full groom', 'Nail clipping', 'De-shedding']
+NOTES = [
+    'Responded well, no complications.', 'Owner to monitor at home and report changes.',
+    'Follow up in two weeks.', 'Mild discomfort observed during examination.',
+    'Prescribed medication to be given with food.', 'Recheck bloodwork at next visit.',
+]
+
+# Rows per unit of scale (one unit is a small practice: 100 pets), by route name.
+SCALE_UNIT = {
+    'vet_clinics': 5,
+    'vets': 20,
+    'pet_salons': 3,
+    'pet_groomers': 9,
+    'users': 80,
+    'pets': 100,
+    'pet_owners': 120,
+    'weigh_ins': 1200,
+    'vet_visits': 450,
+    'vaccines': 200,
+    'allergies': 40,
+    'surgeries': 30,
+    'procedures': 60,
+    'illnesses': 100,
+    'treatments': 150,
+    'grooming_appointments': 300,
+}
+# Reference tables whose size does not grow with the scale.
+FIXED_COUNTS = {'breeds': 40}
+# Pets whose records are generated together, with their own random stream, so the
+# dataset is the same whatever the number of worker processes.
+CHUNK_SIZE = 5000
+
+
+def get_counts(scale=1, counts=None):
+    result = {name: max(1, round(count * scale)) for name, count in SCALE_UNIT.items()}
+    result.update(FIXED_COUNTS)
+    result.update(counts or {})
+    return result
+
+
+def get_name(rng, syllables=3):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+def get_unique_names(rng, count, syllables=3):
+    names = set()
+    while len(names) < count:
+        names.add(get_name(rng, syllables + len(names) // len(SYLLABLES) ** syllables))
+    return sorted(names)
+
+
+def get_date(rng, start, end):
+    return start + datetime.timedelta(days=rng.randint(0, max((end - start).days, 0)))
+
+
+def get_dates(rng, start, end, count):
+    days = max((end - start).days, 0) + 1
+    return sorted(start + datetime.timedelta(days=day) for day in rng.sample(range(days), min(count, days)))
+
+
+# Poisson-distributed number of rows around a mean rate.
+def get_count(rng, rate):
+    if rate > 30:
+        return max(0, round(rng.gauss(rate, math.sqrt(rate))))
+    limit, count, product = math.exp(-rate), 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# Whether rows can be streamed with COPY (PostgreSQL through psycopg 3).
+def can_copy():
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    return is_psycopg3
+
+
+def copy_rows(model, objects):
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        with cursor.copy(f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN') as copy:
+            for obj in objects:
+                copy.write_row([field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields])
+
+
+# Seeds a consistent dataset across every model, deterministic for a given seed.
+# Reference rows, users and pets are written first; the pets' records are then
+# generated in chunks of CHUNK_SIZE pets, across `workers` processes.
+#
+# Rows are written with bulk_create and announced through post_bulk_create, so
+# derived data (search index, breed weight stats) stays in step. With
+# `signals=False` they are not, and on PostgreSQL the record tables, whose ids
+# nothing else needs, are streamed with COPY instead.
+class DatasetSeeder:
+    batch_size = 5000
+
+    def __init__(self, scale=1, seed=0, counts=None, workers=1, signals=True,
+                 end_date=datetime.date(2025, 1, 1), stdout=None):
+        self.counts = get_counts(scale, counts)
+        self.seed_value = seed
+        self.rng = random.Random(seed)
+        self.workers = workers
+        self.signals = signals
+        self.end_date = end_date
+        self.stdout = stdout
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def create(self, model, objects, copy=False):
+        for batch in batched(objects, self.batch_size):
+            if copy and not self.signals and can_copy():
+                copy_rows(model, batch)
+            else:
+                batch = model.objects.bulk_create(batch)
+                if self.signals:
+                    post_bulk_create.send(sender=model, instances=batch)
+            yield from batch
+        if model in REFERENCE_MODELS:
+            bump_generation_on_commit(model)
+
+    def create_all(self, model, objects):
+        objects = list(self.create(model, objects))
+        self.log(f'{model.__name__}: {len(objects)}')
+        return objects
+
+    def seed(self):
+        pet_types = self.create_all(PetTypes, [PetTypes(name=name) for name in PET_TYPES])
+        per_type = math.ceil(self.counts['breeds'] / len(pet_types))
+        breeds = self.create_all(Breeds, [
+            Breeds(name=name, pet_type=pet_type)
+            for pet_type in pet_types for name in get_unique_names(self.rng, per_type)
+        ][:self.counts['breeds']])
+        clinics = self.create_all(VetClinics, [
+            VetClinics(name=f'{name} Veterinary Clinic', address=f'{index + 1} {get_name(self.rng, 2)} Street',
+                       email=f'clinic{index}@example.com', phone=f'555{index:07d}')
+            for index, name in enumerate(get_unique_names(self.rng, self.counts['vet_clinics']))
+        ])
+        vets = self.create_all(Vets, [
+            Vets(name=f'Dr {name}', gender=self.rng.choice(['F', 'M', 'NB']), email=f'vet{index}@example.com',
+                 phone=f'556{index:07d}', vet_clinic=clinics[index % len(clinics)])
+            for index, name in enumerate(get_unique_names(self.rng, self.counts['vets']))
+        ])
+        salons = self.create_all(PetSalons, [
+            PetSalons(name=f'{name} Grooming', address=f'{index + 1} {get_name(self.rng, 2)} Avenue',
+                      phone=f'557{index:07d}')
+            for index, name in enumerate(get_unique_names(self.rng, self.counts['pet_salons']))
+        ])
+        self.create_all(PetGroomers, [
+            PetGroomers(name=name, gender=self.rng.choice(['F', 'M', 'NB']), pet_salon=salons[index % len(salons)])
+            for index, name in enumerate(get_unique_names(self.rng, self.counts['pet_groomers']))
+        ])
+        user_ids = self.seed_users()
+        pet_ids = self.seed_pets(breeds, user_ids)
+        self.seed_records(pet_ids, breeds, vets)
+
+    def seed_users(self):
+        password = hash_password('password')
+        users = (
+            CustomUser(username=f'owner{index}', email=f'owner{index}@example.com', password=password,
+                       phone=f'558{index:07d}')
+            for index in range(self.counts['users'])
+        )
+        user_ids = [user.pk for user in self.create(CustomUser, users)]
+        self.log(f'CustomUser: {len(user_ids)}')
+        return user_ids
+
+    def seed_pets(self, breeds, user_ids):
+        start = self.end_date - datetime.timedelta(days=15 * 365)
+        newest = self.end_date - datetime.timedelta(days=60)
+
+        def pets():
+            for index in range(self.counts['pets']):
+                breed = self.rng.choice(breeds)
+                yield Pets(
+                    name=get_name(self.rng, 2), sex=self.rng.choice(['F', 'M']),
+                    birthdate=get_date(self.rng, start, newest), color=self.rng.choice(COLORS),
+                    pet_type_id=breed.pet_type_id, breed=breed,
+                )
+
+        pet_ids = [pet.pk for pet in self.create(Pets, pets())]
+        self.log(f'Pets: {len(pet_ids)}')
+
+        # Every pet has a primary owner; the remaining owners are secondary ones.
+        secondary = max(0, self.counts['pet_owners'] - len(pet_ids)) / len(pet_ids)
+
+        def owners():
+            for pet_id in pet_ids:
+                users = self.rng.sample(user_ids, min(len(user_ids), 1 + get_count(self.rng, secondary)))
+                for index, user_id in enumerate(users):
+                    yield PetOwners(user_id=user_id, pet_id=pet_id, owner_type='S' if index else 'P')
+
+        self.log(f'PetOwners: {sum(1 for owner in self.create(PetOwners, owners()))}')
+        return pet_ids
+
+    def seed_records(self, pet_ids, breeds, vets):
+        pets = self.counts['pets']
+        rates = {name: self.counts[name] / pets for name in (
+            'weigh_ins', 'vet_visits', 'vaccines', 'allergies', 'surgeries', 'procedures', 'illnesses',
+            'grooming_appointments',
+        )}
+        rates['treatments'] = self.counts['treatments'] / max(self.counts['illnesses'], 1)
+        context = {
+            'rates': rates,
+            'adult_weights': {breed.id: self.rng.uniform(2.5, 9.0) for breed in breeds},
+            'vet_ids': [vet.id for vet in vets],
+            'groomers': list(PetGroomers.objects.order_by('id').values_list('id', 'pet_salon_id')),
+        }
+        options = {'seed': self.seed_value, 'signals': self.signals, 'end_date': self.end_date}
+        chunks = [
+            (options, context, index, pet_ids[start:start + CHUNK_SIZE])
+            for index, start in enumerate(range(0, len(pet_ids), CHUNK_SIZE))
+        ]
+        totals = {}
+        # SQLite allows one writer at a time, and forked workers cannot see an
+        # uncommitted transaction (as in tests), so both run in-process.
+        if self.workers > 1 and connection.vendor != 'sqlite' and not connection.in_atomic_block:
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(self.workers) as pool:
+                results = pool.imap_unordered(seed_chunk, chunks)
+                for result in results:
+                    for name, count in result.items():
+                        totals[name] = totals.get(name, 0) + count
+        else:
+            for chunk in chunks:
+                for name, count in seed_chunk(chunk).items():
+                    totals[name] = totals.get(name, 0) + count
+        for name, count in totals.items():
+            self.log(f'{name}: {count}')
+
+    # Weight follows a growth curve towards the breed's adult weight, with noise.
+    def get_weight(self, rng, adult_weight, birthdate, date):
+        months = (date - birthdate).days / 30.4
+        weight = adult_weight * (1 - 0.8 * math.exp(-months / 5)) + rng.gauss(0, adult_weight * 0.03)
+        return round(min(max(weight, 0.2), 9.99), 2)
+
+    # The records of one chunk of pets; returns the rows created per model.
+    def seed_chunk(self, context, chunk, pet_ids):
+        rng = random.Random(f'{self.seed_value}-{chunk}')
+        rates, vet_ids, groomers = context['rates'], context['vet_ids'], context['groomers']
+        records = {model: [] for model in (
+            Allergies, WeighIns, Surgeries, Procedures, VetVisits, Vaccines, Illnesses, GroomingAppointments
+        )}
+        lots = 0
+        for pet_id, birthdate, breed_id in Pets.objects.filter(id__in=pet_ids).order_by('id').values_list(
+                'id', 'birthdate', 'breed_id'):
+            # Most of a pet's care is at one vet and one salon.
+            vet_id = rng.choice(vet_ids)
+            groomer_id, salon_id = rng.choice(groomers)
+            start = birthdate + datetime.timedelta(days=30)
+
+            def dates(name):
+                return get_dates(rng, start, self.end_date, get_count(rng, rates[name]))
+
+            for date in dates('weigh_ins'):
+                weight = self.get_weight(rng, context['adult_weights'].get(breed_id, 5.0), birthdate, date)
+                records[WeighIns].append(WeighIns(pet_id=pet_id, date=date, weight=weight))
+            for date in dates('vet_visits'):
+                records[VetVisits].append(VetVisits(
+                    pet_id=pet_id, date=date, reason=rng.choice(VISIT_REASONS), outcome=rng.choice(NOTES),
+                    vet_id=vet_id if rng.random() < 0.9 else rng.choice(vet_ids),
+                ))
+            for date in dates('vaccines'):
+                lots += 1
+                records[Vaccines].append(Vaccines(
+                    pet_id=pet_id, name=rng.choice(VACCINES), lab_name=f'{get_name(rng, 2)} Labs',
+                    lot=f'S{self.seed_value}C{chunk}N{lots}', expiration_date=date + datetime.timedelta(days=730),
+                    application_date=date, next_due_date=date + datetime.timedelta(days=365), vet_id=vet_id,
+                ))
+            for date in dates('allergies'):
+                records[Allergies].append(Allergies(
+                    pet_id=pet_id, allergen=rng.choice(ALLERGENS), reaction=rng.choice(NOTES),
+                    date_of_diagnosis=date, vet_id=vet_id,
+                ))
+            for model, names, name in ((Surgeries, SURGERIES, 'surgeries'), (Procedures, PROCEDURES, 'procedures')):
+                for date in dates(name):
+                    records[model].append(model(
+                        pet_id=pet_id, date=date, name=rng.choice(names), description=rng.choice(NOTES), vet_id=vet_id,
+                    ))
+            for date in dates('illnesses'):
+                recovered = date + datetime.timedelta(days=rng.randint(3, 60))
+                records[Illnesses].append(Illnesses(
+                    pet_id=pet_id, name=rng.choice(ILLNESSES), description=rng.choice(NOTES), date_of_diagnosis=date,
+                    recovery_date=recovered if recovered < self.end_date else None, vet_id=vet_id,
+                ))
+            for date in dates('grooming_appointments'):
+                records[GroomingAppointments].append(GroomingAppointments(
+                    pet_id=pet_id, grooming_type=rng.choice(GROOMING_TYPES), notes=rng.choice(NOTES),
+                    date=datetime.datetime.combine(date, datetime.time(rng.randint(8, 17)), datetime.timezone.utc),
+                    pet_groomer_id=groomer_id, pet_salon_id=salon_id,
+                ))
+
+        totals = {}
+        with transaction.atomic():
+            for model, objects in records.items():
+                # Treatments point at their illness, so illnesses need their ids back.
+                created = list(self.create(model, objects, copy=model is not Illnesses))
+                totals[model.__name__] = len(created)
+                records[model] = created
+            # Every illness gets at least one treatment.
+            treatments = [
+                Treatments(
+                    pet_id=illness.pet_id, illness_id=illness.pk, name=name, description=rng.choice(NOTES),
+                    start_date=illness.date_of_diagnosis, end_date=illness.recovery_date, vet_id=illness.vet_id,
+                )
+                for illness in records[Illnesses]
+                for name in rng.sample(TREATMENTS, min(len(TREATMENTS), 1 + get_count(rng, max(rates['treatments'] - 1, 0))))
+            ]
+            totals['Treatments'] = sum(1 for treatment in self.create(Treatments, treatments, copy=True))
+        return totals
+
+
+def seed_chunk(arguments):
+    options, context, chunk, pet_ids = arguments
+    return DatasetSeeder(**options).seed_chunk(context, chunk, pet_ids)
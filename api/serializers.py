@@ -6,20 +6,47 @@ from .models import (
     Treatments, PetSalons, PetGroomers, GroomingAppointments
 )
 from .validators import validate_alpha
-
-
-class PetTypesSerializer(serializers.HyperlinkedModelSerializer):
+from .bulk import DuplicateCheckMixin
+from .querysets import get_include_attr
+
+
+# Lets a serializer render a subset of its fields: `fields` keeps only the named
+# fields and `exclude` drops the named ones. `include` embeds related collections
+# listed in Meta.includes, as a tree such as {'illnesses': {'treatments': {}}}.
+# Meta.includes maps each related name ?include= can embed to the name of its
+# serializer (e.g. {'pet_breeds': 'BreedsSerializer'}).
+class SparseFieldsMixin:
+    def __init__(self, *args, fields=None, exclude=None, include=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in exclude or ():
+            self.fields.pop(name, None)
+        for name, nested in (include or {}).items():
+            self.fields[name] = self.get_include_serializer(name)(
+                many=True, read_only=True, include=nested, source=get_include_attr(name),
+            )
+
+    # Serializer of a related collection that can be embedded, or None. Classes are
+    # named in Meta.includes as some are defined further down.
+    @classmethod
+    def get_include_serializer(cls, name):
+        serializer_name = getattr(cls.Meta, 'includes', {}).get(name)
+        return globals()[serializer_name] if serializer_name else None
+
+
+class PetTypesSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     name = serializers.CharField(validators=[validate_alpha])
 
     class Meta:
         model = PetTypes
         fields = ['id', 'url', 'name']
-
-    def validate(self, data):
-        # Check if a breed with the same name and pet type already exists
-        if PetTypes.objects.filter(name__iexact=data['name']).exists():
-            raise serializers.ValidationError("A pet type with this name already exists.")
-        return data
+        # A pet type with the same name is a duplicate
+        duplicate_lookups = ['name__iexact']
+        duplicate_message = "A pet type with this name already exists."
+        fast_path_relations = {}
+        includes = {'pet_breeds': 'BreedsSerializer'}
 
     # Get pet type if it exists already or create a new pet type if it doesn't exist.
     def get_or_create(self, validated_data):
@@ -28,7 +55,7 @@ class PetTypesSerializer(serializers.HyperlinkedModelSerializer):
         return pet_type
 
 
-class BreedsSerializer(serializers.HyperlinkedModelSerializer):
+class BreedsSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     name = serializers.CharField(validators=[validate_alpha])
     pet_type = serializers.SerializerMethodField()
     pet_type_id = serializers.PrimaryKeyRelatedField(queryset=PetTypes.objects.all(), write_only=True, source='pet_type')
@@ -36,16 +63,14 @@ class BreedsSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Breeds
         fields = ['id', 'url', 'name', 'pet_type', 'pet_type_id']
+        # A breed with the same name and pet type is a duplicate
+        duplicate_lookups = ['name__iexact', 'pet_type']
+        duplicate_message = "A breed with this name and pet type already exists."
+        fast_path_relations = {'pet_type': ['id', 'name']}
 
     def get_pet_type(self, instance):
         return {'id': instance.pet_type.id, 'name': instance.pet_type.name} if instance.pet_type else None
 
-    def validate(self, data):
-        # Check if a breed with the same name and pet type already exists
-        if Breeds.objects.filter(name__iexact=data['name'], pet_type=data['pet_type']).exists():
-            raise serializers.ValidationError("A breed with this name and pet type already exists.")
-        return data
-
     def create(self, validated_data):
         # Extract pet_type from validated data.
         pet_type = validated_data.pop('pet_type')
@@ -61,7 +86,7 @@ class BreedsSerializer(serializers.HyperlinkedModelSerializer):
         return instance
 
 
-class PetsSerializer(serializers.HyperlinkedModelSerializer):
+class PetsSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     pet_type = serializers.SerializerMethodField()
     breed = serializers.SerializerMethodField()
     pet_type_id = serializers.PrimaryKeyRelatedField(queryset=PetTypes.objects.all(), write_only=True, source='pet_type')
@@ -71,6 +96,16 @@ class PetsSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Pets
         fields = ['id', 'url', 'name', 'sex', 'birthdate', 'color', 'pet_type', 'pet_type_id', 'breed', 'breed_id']
+        fast_path_relations = {'pet_type': ['id', 'name'], 'breed': ['id', 'name']}
+        includes = {
+            'allergies': 'AllergiesSerializer', 'weigh_ins': 'WeighInsSerializer',
+            'surgeries': 'SurgeriesSerializer', 'procedures': 'ProceduresSerializer',
+            'vet_visits': 'VetVisitsSerializer', 'vaccines': 'VaccinesSerializer',
+            'illnesses': 'IllnessesSerializer', 'treatments': 'TreatmentsSerializer',
+            'grooming_appointments': 'GroomingAppointmentsSerializer',
+        }
+        # Weigh-ins pile up fastest, so fewer of the latest are embedded
+        include_limits = {'weigh_ins': 20}
 
     def get_pet_type(self, instance):
         return {'id': instance.pet_type.id, 'name': instance.pet_type.name} if instance.pet_type else None
@@ -101,37 +136,33 @@ class PetsSerializer(serializers.HyperlinkedModelSerializer):
 
 
 # Finish implementation after custom user implementation is done.
-class PetOwnersSerializer(serializers.HyperlinkedModelSerializer):
+class PetOwnersSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = PetOwners
         fields = ['id', 'url', 'user_id', 'pet_id', 'owner_type']
+        fast_path_relations = {}
 
 
-class VetClinicsSerializer(serializers.HyperlinkedModelSerializer):
+class VetClinicsSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = VetClinics
         fields = ['id', 'url', 'name', 'address', 'email', 'phone']
-
-    def validate(self, data):
-        # Check if a vet clinic with the same fields already exists
-        if VetClinics.objects.filter(name__iexact=data['name'], address__iexact=data['address']).exists():
-            raise serializers.ValidationError("A vet clinic with the same name and address already exists.")
-        return data
+        # A vet clinic with the same fields is a duplicate
+        duplicate_lookups = ['name__iexact', 'address__iexact']
+        duplicate_message = "A vet clinic with the same name and address already exists."
+        fast_path_relations = {}
 
 
-class VetsSerializer(serializers.HyperlinkedModelSerializer):
+class VetsSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     vet_clinic = serializers.SerializerMethodField()
     vet_clinic_id = serializers.PrimaryKeyRelatedField(queryset=VetClinics.objects.all(), write_only=True, source='vet_clinic')
 
     class Meta:
         model = Vets
         fields = ['id', 'url', 'name', 'gender', 'email', 'phone', 'vet_clinic', 'vet_clinic_id']
-
-    def validate(self, data):
-        # Check if a vet with the same name and vet_clinic already exists
-        if Vets.objects.filter(name__iexact=data['name'], vet_clinic__exact=data['vet_clinic']).exists():
-            raise serializers.ValidationError("A vet with the same name and vet clinic already exists.")
-        return data
+        # A vet with the same name and vet_clinic is a duplicate
+        duplicate_lookups = ['name__iexact', 'vet_clinic']
+        duplicate_message = "A vet with the same name and vet clinic already exists."
 
     def get_vet_clinic(self, instance):
         return {'id': instance.vet_clinic.id, 'name': instance.vet_clinic.name, 'address': instance.vet_clinic.address} if instance.vet_clinic else None
@@ -163,18 +194,20 @@ class VetsSerializer(serializers.HyperlinkedModelSerializer):
         return data
 
 
-class AllergiesSerializer(serializers.HyperlinkedModelSerializer):
+class AllergiesSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     pet = serializers.SerializerMethodField()
+    pet_id = serializers.PrimaryKeyRelatedField(queryset=Pets.objects.all(), write_only=True, source='pet')
 
     class Meta:
         model = Allergies
-        fields = ['id', 'url', 'pet', 'allergen', 'reaction', 'date_of_diagnosis']
+        fields = ['id', 'url', 'pet', 'pet_id', 'allergen', 'reaction', 'date_of_diagnosis']
+        # An allergy with the same pet, allergen and date_of_diagnosis is a duplicate
+        duplicate_lookups = ['pet', 'allergen__iexact', 'date_of_diagnosis']
+        duplicate_message = "Allergy has been previously recorded for the same date and pet."
+        fast_path_relations = {'pet': ['id', 'name']}
 
-    def validate(self, data):
-        # Check if an allergy with the same pet, allergen and date_of_diagnosis already exists
-        if Allergies.objects.filter(pet=data['pet'], allergen__iexact=data['allergen'], date_of_diagnosis__exact=data['date']).exists():
-            raise serializers.ValidationError("Allergy has been previously recorded for the same date and pet.")
-        return data
+    def get_pet(self, instance):
+        return {'id': instance.pet.id, 'name': instance.pet.name} if instance.pet else None
 
     def create(self, validated_data):
         # Extract pet from validated data.
@@ -193,18 +226,20 @@ class AllergiesSerializer(serializers.HyperlinkedModelSerializer):
         return instance
 
 
-class WeighInsSerializer(serializers.HyperlinkedModelSerializer):
+class WeighInsSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     pet = serializers.SerializerMethodField()
+    pet_id = serializers.PrimaryKeyRelatedField(queryset=Pets.objects.all(), write_only=True, source='pet')
 
     class Meta:
         model = WeighIns
-        fields = ['id', 'url', 'pet', 'date', 'weight']
+        fields = ['id', 'url', 'pet', 'pet_id', 'date', 'weight']
+        # A weigh_in with the same weight, pet and date is a duplicate
+        duplicate_lookups = ['pet', 'date', 'weight']
+        duplicate_message = "Weight has been previously recorded for the same date and pet."
+        fast_path_relations = {'pet': ['id', 'name']}
 
-    def validate(self, data):
-        # Check if a weigh_in with the same weight, pet and date already exists
-        if WeighIns.objects.filter(pet=data['pet'], date__exact=data['date'], weight__exact=data['weight']).exists():
-            raise serializers.ValidationError("Weight has been previously recorded for the same date and pet.")
-        return data
+    def get_pet(self, instance):
+        return {'id': instance.pet.id, 'name': instance.pet.name} if instance.pet else None
 
     def create(self, validated_data):
         # Extract pet from validated data.
@@ -222,19 +257,25 @@ class WeighInsSerializer(serializers.HyperlinkedModelSerializer):
         return instance
 
 
-class SurgeriesSerializer(serializers.HyperlinkedModelSerializer):
+class SurgeriesSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     pet = serializers.SerializerMethodField()
     vet = serializers.SerializerMethodField()
+    pet_id = serializers.PrimaryKeyRelatedField(queryset=Pets.objects.all(), write_only=True, source='pet')
+    vet_id = serializers.PrimaryKeyRelatedField(queryset=Vets.objects.all(), write_only=True, source='vet', allow_null=True)
 
     class Meta:
         model = Surgeries
-        fields = ['id', 'url', 'pet', 'date', 'name', 'description', 'vet']
+        fields = ['id', 'url', 'pet', 'pet_id', 'date', 'name', 'description', 'vet', 'vet_id']
+        # A surgery with the same name, pet and date is a duplicate
+        duplicate_lookups = ['name__iexact', 'pet', 'date']
+        duplicate_message = "A surgery with this name, pet and date already exists."
+        fast_path_relations = {'pet': ['id', 'name'], 'vet': ['id', 'name']}
 
-    def validate(self, data):
-        # Check if a surgery with the same name, pet and date already exists
-        if Surgeries.objects.filter(name__iexact=data['name'], pet=data['pet'], date__exact=data['date']).exists():
-            raise serializers.ValidationError("A surgery with this name, pet and date already exists.")
-        return data
+    def get_pet(self, instance):
+        return {'id': instance.pet.id, 'name': instance.pet.name} if instance.pet else None
+
+    def get_vet(self, instance):
+        return {'id': instance.vet.id, 'name': instance.vet.name} if instance.vet else None
 
     def create(self, validated_data):
         # Extract pet and vet from validated data.
@@ -256,19 +297,25 @@ class SurgeriesSerializer(serializers.HyperlinkedModelSerializer):
         return instance
 
 
-class ProceduresSerializer(serializers.HyperlinkedModelSerializer):
+class ProceduresSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     pet = serializers.SerializerMethodField()
     vet = serializers.SerializerMethodField()
+    pet_id = serializers.PrimaryKeyRelatedField(queryset=Pets.objects.all(), write_only=True, source='pet')
+    vet_id = serializers.PrimaryKeyRelatedField(queryset=Vets.objects.all(), write_only=True, source='vet', allow_null=True)
 
     class Meta:
         model = Procedures
-        fields = ['id', 'url', 'pet', 'date', 'name', 'description', 'vet']
+        fields = ['id', 'url', 'pet', 'pet_id', 'date', 'name', 'description', 'vet', 'vet_id']
+        # A procedure with the same name, pet and date is a duplicate
+        duplicate_lookups = ['name__iexact', 'pet', 'date']
+        duplicate_message = "A procedure with this name, pet and date already exists."
+        fast_path_relations = {'pet': ['id', 'name'], 'vet': ['id', 'name']}
 
-    def validate(self, data):
-        # Check if a procedure with the same name, pet and date already exists
-        if Procedures.objects.filter(name__iexact=data['name'], pet=data['pet'], date__exact=data['date']).exists():
-            raise serializers.ValidationError("A procedure with this name, pet and date already exists.")
-        return data
+    def get_pet(self, instance):
+        return {'id': instance.pet.id, 'name': instance.pet.name} if instance.pet else None
+
+    def get_vet(self, instance):
+        return {'id': instance.vet.id, 'name': instance.vet.name} if instance.vet else None
 
     def create(self, validated_data):
         # Extract pet and vet from validated data.
@@ -290,19 +337,25 @@ class ProceduresSerializer(serializers.HyperlinkedModelSerializer):
         return instance
 
 
-class VetVisitsSerializer(serializers.HyperlinkedModelSerializer):
+class VetVisitsSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     pet = serializers.SerializerMethodField()
     vet = serializers.SerializerMethodField()
+    pet_id = serializers.PrimaryKeyRelatedField(queryset=Pets.objects.all(), write_only=True, source='pet')
+    vet_id = serializers.PrimaryKeyRelatedField(queryset=Vets.objects.all(), write_only=True, source='vet', allow_null=True)
 
     class Meta:
         model = VetVisits
-        fields = ['id', 'url', 'pet', 'date', 'reason', 'outcome', 'vet']
+        fields = ['id', 'url', 'pet', 'pet_id', 'date', 'reason', 'outcome', 'vet', 'vet_id']
+        # A vet visit with the same vet, pet and date is a duplicate
+        duplicate_lookups = ['pet', 'date', 'vet']
+        duplicate_message = "A vet visit with this pet, vet and date already exists."
+        fast_path_relations = {'pet': ['id', 'name'], 'vet': ['id', 'name']}
 
-    def validate(self, data):
-        # Check if a vet visit with the same vet, pet and date already exists
-        if VetVisits.objects.filter(pet=data['pet'], date__exact=data['date'], vet=data['vet']).exists():
-            raise serializers.ValidationError("A vet visit with this pet, vet and date already exists.")
-        return data
+    def get_pet(self, instance):
+        return {'id': instance.pet.id, 'name': instance.pet.name} if instance.pet else None
+
+    def get_vet(self, instance):
+        return {'id': instance.vet.id, 'name': instance.vet.name} if instance.vet else None
 
     def create(self, validated_data):
         # Extract pet and vet from validated data.
@@ -324,19 +377,25 @@ class VetVisitsSerializer(serializers.HyperlinkedModelSerializer):
         return instance
 
 
-class VaccinesSerializer(serializers.HyperlinkedModelSerializer):
+class VaccinesSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     pet = serializers.SerializerMethodField()
     vet = serializers.SerializerMethodField()
+    pet_id = serializers.PrimaryKeyRelatedField(queryset=Pets.objects.all(), write_only=True, source='pet')
+    vet_id = serializers.PrimaryKeyRelatedField(queryset=Vets.objects.all(), write_only=True, source='vet', allow_null=True)
 
     class Meta:
         model = Vaccines
-        fields = ['id', 'url', 'pet', 'name', 'lab_name', 'lot', 'expiration_date', 'application_date', 'next_due_date', 'vet']
+        fields = ['id', 'url', 'pet', 'pet_id', 'name', 'lab_name', 'lot', 'expiration_date', 'application_date', 'next_due_date', 'vet', 'vet_id']
+        # A vaccine with the same lot is a duplicate
+        duplicate_lookups = ['lot']
+        duplicate_message = "A vaccine with this lot is already registered."
+        fast_path_relations = {'pet': ['id', 'name'], 'vet': ['id', 'name']}
 
-    def validate(self, data):
-        # Check if a vaccine with the same lot already exists
-        if Vaccines.objects.filter(lot__exact=data['lot']).exists():
-            raise serializers.ValidationError("A vaccine with this lot is already registered.")
-        return data
+    def get_pet(self, instance):
+        return {'id': instance.pet.id, 'name': instance.pet.name} if instance.pet else None
+
+    def get_vet(self, instance):
+        return {'id': instance.vet.id, 'name': instance.vet.name} if instance.vet else None
 
     def create(self, validated_data):
         # Extract pet and vet from validated data.
@@ -361,19 +420,26 @@ class VaccinesSerializer(serializers.HyperlinkedModelSerializer):
         return instance
 
 
-class IllnessesSerializer(serializers.HyperlinkedModelSerializer):
+class IllnessesSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     pet = serializers.SerializerMethodField()
     vet = serializers.SerializerMethodField()
+    pet_id = serializers.PrimaryKeyRelatedField(queryset=Pets.objects.all(), write_only=True, source='pet')
+    vet_id = serializers.PrimaryKeyRelatedField(queryset=Vets.objects.all(), write_only=True, source='vet', allow_null=True)
 
     class Meta:
         model = Illnesses
-        fields = ['id', 'url', 'pet', 'name', 'description', 'date_of_diagnosis', 'recovery_date', 'vet']
+        fields = ['id', 'url', 'pet', 'pet_id', 'name', 'description', 'date_of_diagnosis', 'recovery_date', 'vet', 'vet_id']
+        # An illness with the same pet, name and date_of_diagnosis is a duplicate
+        duplicate_lookups = ['pet', 'name__iexact', 'date_of_diagnosis']
+        duplicate_message = "An illness with this pet, name and date_of_diagnosis is already registered."
+        fast_path_relations = {'pet': ['id', 'name'], 'vet': ['id', 'name']}
+        includes = {'treatments': 'TreatmentsSerializer'}
 
-    def validate(self, data):
-        # Check if an illness with the same pet, name and date_of_diagnosis already exists
-        if Illnesses.objects.filter(pet=data['pet'], name__iexact=data['name'], date_of_diagnosis__exact=data['date_of_diagnosis']).exists():
-            raise serializers.ValidationError("An illness with this pet, name and date_of_diagnosis is already registered.")
-        return data
+    def get_pet(self, instance):
+        return {'id': instance.pet.id, 'name': instance.pet.name} if instance.pet else None
+
+    def get_vet(self, instance):
+        return {'id': instance.vet.id, 'name': instance.vet.name} if instance.vet else None
 
     def create(self, validated_data):
         # Extract pet and vet from validated data.
@@ -396,25 +462,31 @@ class IllnessesSerializer(serializers.HyperlinkedModelSerializer):
         return instance
 
 
-class TreatmentsSerializer(serializers.HyperlinkedModelSerializer):
+class TreatmentsSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     pet = serializers.SerializerMethodField()
     vet = serializers.SerializerMethodField()
     illness = serializers.SerializerMethodField()
     illness_id = serializers.PrimaryKeyRelatedField(queryset=Illnesses.objects.all(), write_only=True, source='illness')
+    pet_id = serializers.PrimaryKeyRelatedField(queryset=Pets.objects.all(), write_only=True, source='pet')
+    vet_id = serializers.PrimaryKeyRelatedField(queryset=Vets.objects.all(), write_only=True, source='vet', allow_null=True)
 
     class Meta:
         model = Treatments
-        fields = ['id', 'url', 'pet', 'name', 'description', 'illness', 'illness_id', 'start_date', 'end_date', 'vet']
-
-    def validate(self, data):
-        # Check if a treatment with the same illness, name and start_date already exists
-        if Treatments.objects.filter(illness=data['illness'], name__iexact=data['name'], start_date__exact=data['start_date']).exists():
-            raise serializers.ValidationError("A treatment for this illness, name and start_date is already registered.")
-        return data
+        fields = ['id', 'url', 'pet', 'pet_id', 'name', 'description', 'illness', 'illness_id', 'start_date', 'end_date', 'vet', 'vet_id']
+        # A treatment with the same illness, name and start_date is a duplicate
+        duplicate_lookups = ['illness', 'name__iexact', 'start_date']
+        duplicate_message = "A treatment for this illness, name and start_date is already registered."
+        fast_path_relations = {'pet': ['id', 'name'], 'vet': ['id', 'name'], 'illness': ['id', 'name']}
 
     def get_illness(self, instance):
         return {'id': instance.illness.id, 'name': instance.illness.name} if instance.illness else None
 
+    def get_pet(self, instance):
+        return {'id': instance.pet.id, 'name': instance.pet.name} if instance.pet else None
+
+    def get_vet(self, instance):
+        return {'id': instance.vet.id, 'name': instance.vet.name} if instance.vet else None
+
     def create(self, validated_data):
         # Extract pet, vet and illness from validated data.
         pet = validated_data.pop('pet')
@@ -440,33 +512,28 @@ class TreatmentsSerializer(serializers.HyperlinkedModelSerializer):
         return instance
 
 
-class PetSalonsSerializer(serializers.HyperlinkedModelSerializer):
+class PetSalonsSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = PetSalons
         fields = ['id', 'url', 'name', 'address', 'email', 'phone']
-
-    def validate(self, data):
-        # Check if a pet salon with the same fields already exists
-        if PetSalons.objects.filter(name__iexact=data['name'], address__iexact=data['address']).exists():
-            raise serializers.ValidationError("A pet salon with the same name and address already exists.")
-        return data
+        # A pet salon with the same fields is a duplicate
+        duplicate_lookups = ['name__iexact', 'address__iexact']
+        duplicate_message = "A pet salon with the same name and address already exists."
+        fast_path_relations = {}
 
 
-class PetGroomersSerializer(serializers.HyperlinkedModelSerializer):
+class PetGroomersSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     pet_salon = serializers.SerializerMethodField()
     pet_salon_id = serializers.PrimaryKeyRelatedField(queryset=PetSalons.objects.all(), write_only=True, source='pet_salon')
 
     class Meta:
-        model = Vets
+        model = PetGroomers
         fields = ['id', 'url', 'name', 'gender', 'email', 'phone', 'pet_salon', 'pet_salon_id']
+        # A pet groomer with the same name and pet_salon is a duplicate
+        duplicate_lookups = ['name__iexact', 'pet_salon']
+        duplicate_message = "A pet groomer with the same name and pet salon already exists."
 
-    def validate(self, data):
-        # Check if a pet groomer with the same name and pet_salon already exists
-        if PetGroomers.objects.filter(name__iexact=data['name'], pet_salon__exact=data['pet_salon']).exists():
-            raise serializers.ValidationError("A pet groomer with the same name and pet salon already exists.")
-        return data
-
-    def get_vet_clinic(self, instance):
+    def get_pet_salon(self, instance):
         return {'id': instance.pet_salon.id, 'name': instance.pet_salon.name, 'address': instance.pet_salon.address} if instance.pet_salon else None
 
     def create(self, validated_data):
@@ -496,26 +563,31 @@ class PetGroomersSerializer(serializers.HyperlinkedModelSerializer):
         return data
 
 
-class GroomingAppointmentsSerializer(serializers.HyperlinkedModelSerializer):
+class GroomingAppointmentsSerializer(SparseFieldsMixin, DuplicateCheckMixin, serializers.HyperlinkedModelSerializer):
     pet = serializers.SerializerMethodField()
     pet_groomer = serializers.SerializerMethodField()
+    pet_id = serializers.PrimaryKeyRelatedField(queryset=Pets.objects.all(), write_only=True, source='pet')
+    pet_groomer_id = serializers.PrimaryKeyRelatedField(queryset=PetGroomers.objects.all(), write_only=True, source='pet_groomer', allow_null=True)
 
     class Meta:
         model = GroomingAppointments
-        fields = ['id', 'url', 'pet', 'grooming_type', 'notes', 'date', 'pet_groomer', 'pet_salon']
+        fields = ['id', 'url', 'pet', 'pet_id', 'grooming_type', 'notes', 'date', 'pet_groomer', 'pet_groomer_id', 'pet_salon']
+        # A grooming_appointment with the same pet, pet_groomer and date is a duplicate
+        duplicate_lookups = ['pet', 'date', 'pet_groomer']
+        duplicate_message = "A vet visit with this pet, pet_groomer and date already exists."
 
-    def validate(self, data):
-        # Check if a grooming_appointment with the same pet, pet_groomer and date already exists
-        if GroomingAppointments.objects.filter(pet=data['pet'], date__exact=data['date'], pet_groomer=data['pet_groomer']).exists():
-            raise serializers.ValidationError("A vet visit with this pet, pet_groomer and date already exists.")
-        return data
+    def get_pet(self, instance):
+        return {'id': instance.pet.id, 'name': instance.pet.name} if instance.pet else None
+
+    def get_pet_groomer(self, instance):
+        return {'id': instance.pet_groomer.id, 'name': instance.pet_groomer.name} if instance.pet_groomer else None
 
     def create(self, validated_data):
         # Extract pet and pet_groomer from validated data.
         pet = validated_data.pop('pet')
         pet_groomer = validated_data.pop('pet_groomer')
         # Create a new grooming_appointment instance with the rest of the validated data.
-        grooming_appointment = VetVisits.objects.create(pet=pet, pet_groomer=pet_groomer, **validated_data)
+        grooming_appointment = GroomingAppointments.objects.create(pet=pet, pet_groomer=pet_groomer, **validated_data)
         return grooming_appointment
 
     def update(self, instance, validated_data):
@@ -532,6 +604,17 @@ class GroomingAppointmentsSerializer(serializers.HyperlinkedModelSerializer):
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         pet_groomer = instance.pet_groomer
-        if pet_groomer and pet_groomer.pet_salon:
-            representation['pet_salon'] = PetSalonsSerializer(pet_groomer.pet_salon).data
+        if pet_groomer and pet_groomer.pet_salon and 'pet_salon' in representation:
+            representation['pet_salon'] = self.get_pet_salon_serializer().to_representation(pet_groomer.pet_salon)
         return representation
+
+    # Built once per list and reused for every row, as building its fields per row dominated list time.
+    def get_pet_salon_serializer(self):
+        if not hasattr(self, '_pet_salon_serializer'):
+            self._pet_salon_serializer = PetSalonsSerializer(context=self.context)
+        return self._pet_salon_serializer
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # to_representation walks pet_groomer.pet_salon, which isn't a declared field.
+        return queryset.select_related('pet_groomer__pet_salon')
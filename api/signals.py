@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from authentication.tokens import evict_principal
+from .analytics import add_weigh_ins, mark_stale
+from .autocomplete import AUTOCOMPLETE_MODELS, update_index
+from .bulk import post_bulk_create
+from .cache import REFERENCE_MODELS, bump_generation, bump_generation_on_commit
+from .metrics import install_query_recorder
+from .models import Pets, PetOwners, WeighIns
+from .purge import pre_purge
+from .search import SEARCH_MODELS, index_records, remove_record, remove_records
+
+
+# Bumped now and on commit (see bump_generation_on_commit); the autocomplete index
+# takes the row once it is committed.
+def invalidate_reference_cache(sender, instance, **kwargs):
+    written = bump_generation(sender)
+    pk, name = instance.pk, None if kwargs['signal'] is post_delete else instance.name
+
+    def committed():
+        generation = bump_generation(sender)
+        if sender in AUTOCOMPLETE_MODELS:
+            update_index(sender, pk, name, written, generation)
+    transaction.on_commit(committed)
+
+
+def purge_reference_cache(sender, pks, **kwargs):
+    bump_generation_on_commit(sender)
+
+
+def update_search_index(sender, instance, **kwargs):
+    index_records([instance])
+
+
+def bulk_update_search_index(sender, instances, **kwargs):
+    index_records(instances)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    remove_record(instance)
+
+
+def purge_from_search_index(sender, pks, **kwargs):
+    remove_records(sender, pks)
+
+
+# New weigh-ins are counted into their breed's stats; edits and deletes mark the
+# stats for a rebuild.
+def update_breed_weight_stats(sender, instance, created=False, **kwargs):
+    if created:
+        add_weigh_ins([instance])
+    else:
+        mark_stale(Pets.objects.filter(pk=instance.pet_id).values('breed_id'))
+
+
+def bulk_update_breed_weight_stats(sender, instances, **kwargs):
+    add_weigh_ins(instances)
+
+
+def purge_breed_weight_stats(sender, pks, **kwargs):
+    mark_stale(Pets.objects.filter(weigh_ins__in=pks).values('breed_id'))
+
+
+# A pet changing breed or birthdate moves its weigh-ins between stats; other
+# edits leave the stats (and their incremental updates) alone.
+def invalidate_pet_breed_stats(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or update_fields is not None and not {'breed', 'breed_id', 'birthdate'} & set(update_fields):
+        return
+    previous = Pets.objects.filter(pk=instance.pk).values('breed_id', 'birthdate').first()
+    if previous and (previous['breed_id'], previous['birthdate']) != (instance.breed_id, instance.birthdate):
+        mark_stale({previous['breed_id'], instance.breed_id} - {None})
+
+
+# A user's cached principal carries the ids of their pets.
+def evict_owner_principal(sender, instance, **kwargs):
+    evict_principal(instance.user_id)
+
+
+def bulk_evict_owner_principals(sender, instances, **kwargs):
+    for instance in instances:
+        evict_principal(instance.user_id)
+
+
+def purge_owner_principals(sender, pks, **kwargs):
+    for user_id in PetOwners.objects.filter(pk__in=pks).values_list('user_id', flat=True):
+        evict_principal(user_id)
+
+
+for model in REFERENCE_MODELS:
+    post_save.connect(invalidate_reference_cache, sender=model, dispatch_uid=f'invalidate_{model.__name__}')
+    post_delete.connect(invalidate_reference_cache, sender=model, dispatch_uid=f'invalidate_{model.__name__}')
+    pre_purge.connect(purge_reference_cache, sender=model, dispatch_uid=f'invalidate_{model.__name__}')
+
+for model in SEARCH_MODELS:
+    post_save.connect(update_search_index, sender=model, dispatch_uid=f'index_{model.__name__}')
+    post_bulk_create.connect(bulk_update_search_index, sender=model, dispatch_uid=f'index_{model.__name__}')
+    post_delete.connect(remove_from_search_index, sender=model, dispatch_uid=f'unindex_{model.__name__}')
+    pre_purge.connect(purge_from_search_index, sender=model, dispatch_uid=f'unindex_{model.__name__}')
+
+post_save.connect(update_breed_weight_stats, sender=WeighIns, dispatch_uid='breed_weight_stats')
+post_bulk_create.connect(bulk_update_breed_weight_stats, sender=WeighIns, dispatch_uid='breed_weight_stats')
+post_delete.connect(update_breed_weight_stats, sender=WeighIns, dispatch_uid='breed_weight_stats')
+pre_purge.connect(purge_breed_weight_stats, sender=WeighIns, dispatch_uid='breed_weight_stats')
+pre_save.connect(invalidate_pet_breed_stats, sender=Pets, dispatch_uid='breed_weight_stats')
+
+post_save.connect(evict_owner_principal, sender=PetOwners, dispatch_uid='owner_principal')
+post_bulk_create.connect(bulk_evict_owner_principals, sender=PetOwners, dispatch_uid='owner_principal')
+post_delete.connect(evict_owner_principal, sender=PetOwners, dispatch_uid='owner_principal')
+pre_purge.connect(purge_owner_principals, sender=PetOwners, dispatch_uid='owner_principal')
+
+connection_created.connect(install_query_recorder, dispatch_uid='request_metrics')
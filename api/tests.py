@@ -1,3 +1,1084 @@
-from django.test import TestCase
+import contextvars
+import csv
+import datetime
+import io
+import json
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import SyncToAsync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import mail, management
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection, connections
+from django.db.models.signals import post_delete
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from authentication.models import CustomUser
+from authentication.tokens import evict_principal, issue_token
+from PawKeeper.db_router import PrimaryReplicaRouter
+from .analytics import get_breed_percentiles
+from .benchmark import compare, run_benchmark
+from .cache import bump_generation
+from .metrics import MetricsMiddleware, MetricsRegistry, registry
+from .models import (
+    PetTypes, Breeds, Pets, PetOwners, VetClinics, Vets, Allergies,
+    WeighIns, Surgeries, Procedures, VetVisits, Vaccines, Illnesses,
+    Treatments, PetSalons, PetGroomers, GroomingAppointments, VaccineReminders,
+    BreedWeightStats, SearchDocuments
+)
+from .purge import can_purge, purge
+from .seed import DatasetSeeder
+from .urls import router
+
+
+# Create one row per model, each pointing at freshly created related rows.
+def create_records(index):
+    date = datetime.date(2021, 1, 1) + datetime.timedelta(days=index)
+    pet_type = PetTypes.objects.create(name=f'Type {chr(65 + index)}')
+    breed = Breeds.objects.create(name=f'Breed {chr(65 + index)}', pet_type=pet_type)
+    pet = Pets.objects.create(name=f'Pet {index}', sex='F', birthdate=date, color='Brown', pet_type=pet_type, breed=breed)
+    user = CustomUser.objects.create_user(email=f'owner{index}@example.com', username=f'owner{index}', password='secret')
+    PetOwners.objects.create(user=user, pet=pet)
+    vet_clinic = VetClinics.objects.create(name=f'Clinic {index}', address='Main St', email='clinic@example.com', phone='555')
+    vet = Vets.objects.create(name=f'Vet {index}', gender='F', email='vet@example.com', phone='555', vet_clinic=vet_clinic)
+    Allergies.objects.create(pet=pet, allergen='Pollen', reaction='Sneezing', date_of_diagnosis=date, vet=vet)
+    WeighIns.objects.create(pet=pet, date=date, weight='4.20')
+    Surgeries.objects.create(pet=pet, date=date, name='Spay', description='Routine', vet=vet)
+    Procedures.objects.create(pet=pet, date=date, name='Dental', description='Cleaning', vet=vet)
+    VetVisits.objects.create(pet=pet, date=date, reason='Checkup', outcome='Healthy', vet=vet)
+    Vaccines.objects.create(pet=pet, name='Rabies', lab_name='Lab', lot=f'LOT{index}', expiration_date=date,
+                            application_date=date, vet=vet)
+    illness = Illnesses.objects.create(pet=pet, name='Flu', description='Mild', date_of_diagnosis=date, vet=vet)
+    Treatments.objects.create(pet=pet, illness=illness, name='Rest', description='Bed rest', start_date=date, vet=vet)
+    pet_salon = PetSalons.objects.create(name=f'Salon {index}', address='Main St', phone='555')
+    pet_groomer = PetGroomers.objects.create(name=f'Groomer {index}', gender='M', pet_salon=pet_salon)
+    GroomingAppointments.objects.create(pet=pet, grooming_type='Bath', date=datetime.datetime.combine(date, datetime.time(), datetime.timezone.utc),
+                                        pet_groomer=pet_groomer, pet_salon=pet_salon)
+
+
+class ListQueryCountTests(TestCase):
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    # List endpoints should use the same number of queries regardless of row count.
+    def test_list_query_count_is_constant(self):
+        create_records(0)
+        few = {prefix: self.count_queries(f'/api/{prefix}/') for prefix, viewset, basename in router.registry}
+
+        for index in range(1, 5):
+            create_records(index)
+        for prefix, viewset, basename in router.registry:
+            with self.subTest(endpoint=prefix):
+                self.assertEqual(self.count_queries(f'/api/{prefix}/'), few[prefix])
+
+    # Grooming appointments embed the groomer's salon exactly as the salon endpoint renders it.
+    def test_grooming_appointments_embed_the_full_salon(self):
+        for index in range(2):
+            create_records(index)
+        rows = self.client.get('/api/grooming_appointments/').json()['results']
+        for row in rows:
+            salon = self.client.get(f"/api/pet_salons/{row['pet_salon']['id']}/").json()
+            self.assertEqual(row['pet_salon'], salon)
+
+
+class NestedPetRouteTests(TestCase):
+    # Nested routes should only return the pet's own records, oldest first.
+    def test_nested_list_is_scoped_to_pet(self):
+        for index in range(3):
+            create_records(index)
+        pet = Pets.objects.get(name='Pet 1')
+        WeighIns.objects.create(pet=pet, date=datetime.date(2020, 6, 1), weight='3.10')
+
+        response = self.client.get(f'/api/pets/{pet.id}/weigh_ins/')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([row['date'] for row in results], ['2020-06-01', '2021-01-02'])
+        self.assertTrue(all(row['pet']['id'] == pet.id for row in results))
+
+    def test_nested_retrieve_of_other_pet_record_is_not_found(self):
+        create_records(0)
+        create_records(1)
+        other_weigh_in = WeighIns.objects.get(pet__name='Pet 1')
+        pet = Pets.objects.get(name='Pet 0')
+
+        response = self.client.get(f'/api/pets/{pet.id}/weigh_ins/{other_weigh_in.id}/')
+        self.assertEqual(response.status_code, 404)
+
+
+class KeysetPaginationTests(TestCase):
+    def collect_pages(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            url = pages[-1]['next']
+        return pages
+
+    # Walking the next links should visit every row exactly once, in order.
+    def test_next_links_cover_all_rows(self):
+        create_records(0)
+        pet = Pets.objects.get()
+        for index, day in enumerate((5, 3, 3, 1, 4)):
+            WeighIns.objects.create(pet=pet, date=datetime.date(2022, 1, day), weight=f'4.{index}0')
+
+        pages = self.collect_pages(f'/api/pets/{pet.id}/weigh_ins/?page_size=2')
+        rows = [row for page in pages for row in page['results']]
+        expected = list(WeighIns.objects.filter(pet=pet).order_by('date', 'id').values_list('id', flat=True))
+        self.assertEqual([row['id'] for row in rows], expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_previous_link_returns_prior_page(self):
+        for index in range(5):
+            create_records(index)
+
+        first = self.client.get('/api/pets/?page_size=2').json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/pets/?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+
+class PetTimelineTests(TestCase):
+    def setUp(self):
+        create_records(0)
+        self.pet = Pets.objects.get()
+        WeighIns.objects.create(pet=self.pet, date=datetime.date(2020, 12, 31), weight='4.00')
+        GroomingAppointments.objects.create(pet=self.pet, grooming_type='Trim',
+                                            date=datetime.datetime(2021, 1, 1, 9, tzinfo=datetime.timezone.utc))
+
+    # The timeline should list every record in (date, type, id) order.
+    def test_timeline_is_chronological(self):
+        response = self.client.get(f'/api/pets/{self.pet.id}/timeline/')
+        self.assertEqual(response.status_code, 200)
+        entries = response.json()['results']
+        self.assertEqual(len(entries), 11)
+        self.assertEqual(entries[0]['type'], 'weigh_ins')
+        self.assertEqual(entries[-1]['type'], 'grooming_appointments')
+        self.assertEqual(entries[-1]['record']['grooming_type'], 'Trim')
+
+    def test_timeline_pages_cover_all_entries(self):
+        full = self.client.get(f'/api/pets/{self.pet.id}/timeline/').json()['results']
+        entries, url = [], f'/api/pets/{self.pet.id}/timeline/?page_size=3'
+        while url:
+            page = self.client.get(url).json()
+            entries.extend(page['results'])
+            url = page['next']
+        self.assertEqual(entries, full)
+
+    def test_timeline_types_filter(self):
+        response = self.client.get(f'/api/pets/{self.pet.id}/timeline/?types=weigh_ins,vaccines')
+        self.assertEqual([entry['type'] for entry in response.json()['results']], ['weigh_ins', 'vaccines', 'weigh_ins'])
+
+        response = self.client.get(f'/api/pets/{self.pet.id}/timeline/?types=bogus')
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkCreateTests(TestCase):
+    def setUp(self):
+        create_records(0)
+        self.pet = Pets.objects.get()
+
+    def test_list_payload_is_inserted_in_one_batch(self):
+        payload = [{'pet_id': self.pet.id, 'date': f'2022-02-0{day}', 'weight': '4.50'} for day in range(1, 6)]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/weigh_ins/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 5)
+        self.assertEqual(WeighIns.objects.filter(pet=self.pet).count(), 6)
+
+        inserts = [query for query in context.captured_queries if query['sql'].startswith('INSERT')]
+        duplicate_checks = [query for query in context.captured_queries if 'api_weighins' in query['sql'] and query['sql'].startswith('SELECT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(duplicate_checks, [])
+
+    def test_existing_rows_are_reported_after_the_insert_conflicts(self):
+        payload = [
+            {'pet_id': self.pet.id, 'date': '2022-03-01', 'weight': '4.50'},
+            {'pet_id': self.pet.id, 'date': '2021-01-01', 'weight': '4.20'},
+        ]
+        response = self.client.post('/api/weigh_ins/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[0], {})
+        self.assertIn('non_field_errors', response.json()[1])
+        self.assertEqual(WeighIns.objects.count(), 1)
+
+    # Errors are reported per row and nothing is written.
+    def test_row_errors_are_reported_by_position(self):
+        payload = [
+            {'pet_id': self.pet.id, 'date': '2022-03-01', 'weight': '4.50'},
+            {'pet_id': self.pet.id, 'date': '2021-01-01', 'weight': '4.20'},
+            {'pet_id': self.pet.id, 'date': 'not a date', 'weight': '4.50'},
+            {'pet_id': self.pet.id, 'date': '2022-03-01', 'weight': '4.50'},
+        ]
+        response = self.client.post('/api/weigh_ins/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('non_field_errors', errors[1])
+        self.assertIn('date', errors[2])
+        self.assertIn('non_field_errors', errors[3])
+        self.assertEqual(WeighIns.objects.count(), 1)
+
+    def test_single_create_still_rejects_case_insensitive_duplicates(self):
+        response = self.client.post('/api/pet_types/', {'name': 'type a'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'non_field_errors': ['A pet type with this name already exists.']})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/pet_types/', {'name': 'Cat'}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([query['sql'].split()[0] for query in context.captured_queries
+                          if 'api_pettypes' in query['sql']], ['INSERT'])
+
+    def test_partial_update_conflicts_are_reported(self):
+        create_records(1)
+        pet_type = PetTypes.objects.get(name='Type B')
+        response = self.client.patch(f'/api/pet_types/{pet_type.id}/', {'name': 'TYPE A'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.json())
+
+    # A missing vet still makes pet and date a duplicate, on every backend.
+    def test_duplicates_without_the_nullable_relation_are_rejected(self):
+        visit = {'pet_id': self.pet.id, 'date': '2022-04-01', 'reason': 'Checkup', 'outcome': 'Healthy', 'vet_id': None}
+        self.assertEqual(self.client.post('/api/vet_visits/', visit, content_type='application/json').status_code, 201)
+        response = self.client.post('/api/vet_visits/', visit, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'non_field_errors': ['A vet visit with this pet, vet and date already exists.']})
+
+        response = self.client.post('/api/vet_visits/', [{**visit, 'date': '2022-04-02'}, visit], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[0], {})
+        self.assertIn('non_field_errors', response.json()[1])
+        self.assertEqual(VetVisits.objects.filter(pet=self.pet, vet__isnull=True).count(), 1)
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        for index in range(3):
+            create_records(index)
+        self.pet = Pets.objects.get(name='Pet 0')
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export_streams_every_row(self):
+        for day in range(1, 4):
+            WeighIns.objects.create(pet=self.pet, date=datetime.date(2022, 1, day), weight='4.00')
+        response = self.client.get('/api/weigh_ins/?format=ndjson&page_size=1')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row['id'] for row in rows], list(WeighIns.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_csv_export_of_nested_route(self):
+        response = self.client.get(f'/api/pets/{self.pet.id}/vaccines/?format=csv')
+        lines = list(csv.reader(io.StringIO(self.read(response))))
+        self.assertEqual(lines[0], ['id', 'url', 'pet', 'name', 'lab_name', 'lot', 'expiration_date', 'application_date',
+                                    'next_due_date', 'vet'])
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1][2]), {'id': self.pet.id, 'name': 'Pet 0'})
+
+    def test_pet_full_record_export(self):
+        response = self.client.get(f'/api/pets/{self.pet.id}/timeline/?format=ndjson')
+        entries = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(entries), 9)
+        paginated = self.client.get(f'/api/pets/{self.pet.id}/timeline/').json()['results']
+        self.assertEqual([(entry['type'], entry['record']['id']) for entry in entries],
+                         [(entry['type'], entry['record']['id']) for entry in paginated])
+
+
+class ReferenceCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_records(0)
+
+    def test_cached_list_skips_the_database(self):
+        first = self.client.get('/api/vets/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/vets/')
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get('/api/breeds/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/breeds/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    # Writing a related table must invalidate responses that render it.
+    def test_related_write_invalidates(self):
+        etag = self.client.get('/api/vets/')['ETag']
+        VetClinics.objects.update(name='Renamed')
+        VetClinics.objects.get().save()
+
+        response = self.client.get('/api/vets/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['vet_clinic']['name'], 'Renamed')
+
+    # Responses cached while a write's transaction is open hold pre-commit rows, so
+    # the commit invalidates again.
+    def test_commit_invalidates_responses_cached_during_the_write(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            VetClinics.objects.update(name='Renamed')
+            VetClinics.objects.get().save()
+            etag = self.client.get('/api/vets/')['ETag']
+            with self.assertNumQueries(0):
+                self.client.get('/api/vets/')
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(self.client.get('/api/vets/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_bulk_create_invalidates(self):
+        self.client.get('/api/pet_types/')
+        response = self.client.post('/api/pet_types/', [{'name': 'Bird'}], content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        names = [row['name'] for row in self.client.get('/api/pet_types/').json()['results']]
+        self.assertIn('Bird', names)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        create_records(0)
+        self.pet = Pets.objects.get()
+
+    def test_fields_limit_output_and_columns(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/surgeries/?fields=id,name,date')
+        self.assertEqual(list(response.json()['results'][0]), ['id', 'date', 'name'])
+        sql = context.captured_queries[-1]['sql']
+        self.assertNotIn('description', sql)
+        self.assertNotIn('api_pets', sql)
+
+    def test_exclude_drops_fields(self):
+        response = self.client.get(f'/api/pets/{self.pet.id}/vet_visits/?exclude=reason,outcome')
+        row = response.json()['results'][0]
+        self.assertNotIn('reason', row)
+        self.assertNotIn('outcome', row)
+        self.assertEqual(row['pet'], {'id': self.pet.id, 'name': 'Pet 0'})
+
+    # Sparse lists must still load kept relations up front.
+    def test_sparse_list_query_count_is_constant(self):
+        url = '/api/grooming_appointments/?fields=id,pet,date'
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        create_records(1)
+        create_records(2)
+        with self.assertNumQueries(len(context.captured_queries)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.json()['results']), 3)
+
+    # Nested lists page on (date, id), which the kept fields need not include.
+    def test_nested_fields_without_ordering_keys(self):
+        response = self.client.get(f'/api/pets/{self.pet.id}/weigh_ins/?fields=id,weight&page_size=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()['results'][0]), ['id', 'weight'])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/pets/?fields=id,bogus')
+        self.assertEqual(response.status_code, 400)
+
+
+class IncludeTests(TestCase):
+    def setUp(self):
+        create_records(0)
+        self.pet = Pets.objects.get()
+
+    def test_include_embeds_related_collections(self):
+        response = self.client.get(f'/api/pets/{self.pet.id}/?include=allergies,vaccines,illnesses.treatments')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([item['allergen'] for item in data['allergies']], ['Pollen'])
+        self.assertEqual(data['vaccines'][0]['vet'], {'id': Vets.objects.get().id, 'name': 'Vet 0'})
+        self.assertEqual(data['illnesses'][0]['treatments'][0]['name'], 'Rest')
+        self.assertNotIn('weigh_ins', data)
+
+    # One query per included relation, however many pets are listed.
+    def test_list_query_count_is_constant(self):
+        url = '/api/pets/?include=weigh_ins,illnesses.treatments'
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        for index in range(1, 4):
+            create_records(index)
+        with self.assertNumQueries(len(context.captured_queries)):
+            response = self.client.get(url)
+        self.assertEqual([len(pet['illnesses']) for pet in response.json()['results']], [1] * 4)
+
+    @override_settings(API_INCLUDE_ROW_LIMIT=2)
+    def test_collections_hold_the_latest_rows_up_to_the_limit(self):
+        for days in range(1, 4):
+            Allergies.objects.create(pet=self.pet, allergen=f'Dust {days}', reaction='Itching',
+                                     date_of_diagnosis=datetime.date(2022, 1, days))
+        allergies = self.client.get(f'/api/pets/{self.pet.id}/?include=allergies').json()['allergies']
+        self.assertEqual([item['allergen'] for item in allergies], ['Dust 3', 'Dust 2'])
+
+    def test_unknown_or_too_deep_includes_are_rejected(self):
+        self.assertEqual(self.client.get('/api/pets/?include=owners').status_code, 400)
+        self.assertEqual(self.client.get('/api/pets/?include=illnesses.vet').status_code, 400)
+        with override_settings(API_INCLUDE_MAX_DEPTH=1):
+            self.assertEqual(self.client.get('/api/pets/?include=illnesses.treatments').status_code, 400)
+
+    # Cached reference responses are invalidated by writes to included tables.
+    def test_cached_include_follows_related_writes(self):
+        url = '/api/pet_types/?include=pet_breeds'
+        self.client.get(url)
+        Breeds.objects.create(name='Breed Z', pet_type=PetTypes.objects.get())
+        breeds = self.client.get(url).json()['results'][0]['pet_breeds']
+        self.assertEqual(sorted(item['name'] for item in breeds), ['Breed A', 'Breed Z'])
+
+
+class FastPathTests(TestCase):
+    def setUp(self):
+        for index in range(3):
+            create_records(index)
+        Pets.objects.filter(name='Pet 2').update(breed=None)
+        Vaccines.objects.update(vet=None, next_due_date=datetime.date(2023, 1, 1))
+
+    # The fast path must render exactly what the serializers render.
+    def test_fast_path_output_matches_serializers(self):
+        checked = 0
+        for prefix, viewset, basename in router.registry:
+            serializer_class = viewset.serializer_class
+            if getattr(serializer_class.Meta, 'fast_path_relations', None) is None:
+                continue
+            for query in ('', '?fields=id,url,pet', '?format=ndjson'):
+                if 'fields' in query and 'pet' not in serializer_class.Meta.fields:
+                    continue
+                with self.subTest(endpoint=prefix, query=query):
+                    fast = self.client.get(f'/api/{prefix}/{query}')
+                    with mock.patch('api.views.get_fast_path', return_value=None):
+                        slow = self.client.get(f'/api/{prefix}/{query}')
+                    fast_content = b''.join(fast.streaming_content) if fast.streaming else fast.content
+                    slow_content = b''.join(slow.streaming_content) if slow.streaming else slow.content
+                    self.assertEqual(fast_content, slow_content)
+            checked += 1
+        self.assertGreaterEqual(checked, 10)
+
+    def test_fast_path_pages_with_cursor(self):
+        first = self.client.get('/api/weigh_ins/?page_size=2').json()
+        second = self.client.get(first['next']).json()
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(ids, list(WeighIns.objects.order_by('id').values_list('id', flat=True)))
+
+
+class AsyncReadTests(TestCase):
+    def setUp(self):
+        for index in range(3):
+            create_records(index)
+        self.pet = Pets.objects.get(name='Pet 1')
+
+    # Async endpoints should serve the same JSON as their sync counterparts.
+    async def test_async_list_and_retrieve_match_sync(self):
+        for path in ('weigh_ins/?page_size=2', 'vets/', 'grooming_appointments/', f'pets/{self.pet.id}/vaccines/'):
+            with self.subTest(path=path):
+                sync_response = await self.async_client.get(f'/api/{path}')
+                async_response = await self.async_client.get(f'/api/async/{path}')
+                self.assertEqual(async_response.status_code, 200)
+                self.assertEqual(async_response.json()['results'], sync_response.json()['results'])
+
+        sync_response = await self.async_client.get(f'/api/pets/{self.pet.id}/')
+        async_response = await self.async_client.get(f'/api/async/pets/{self.pet.id}/')
+        self.assertEqual(async_response.json(), sync_response.json())
+
+    async def test_async_pagination_and_missing_rows(self):
+        first = (await self.async_client.get('/api/async/pets/?page_size=2')).json()
+        second = (await self.async_client.get(first['next'])).json()
+        self.assertEqual(len(first['results']) + len(second['results']), 3)
+        self.assertIsNone(second['next'])
+
+        response = await self.async_client.get('/api/async/pets/999/')
+        self.assertEqual(response.status_code, 404)
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch('PawKeeper.db_router.get_replicas', return_value=['replica_0'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_api_reads_go_to_replicas_until_a_write(self):
+        def route():
+            router = PrimaryReplicaRouter()
+            before = router.db_for_read(Pets)
+            return before, router.db_for_read(CustomUser), router.db_for_write(Pets), router.db_for_read(Pets)
+
+        self.assertEqual(contextvars.Context().run(route), ('replica_0', 'default', 'default', 'default'))
+
+    def test_migrations_only_run_on_the_primary(self):
+        router = PrimaryReplicaRouter()
+        self.assertTrue(router.allow_migrate('default', 'api'))
+        self.assertFalse(router.allow_migrate('replica_0', 'api'))
+
+
+class PrimaryPinningTests(TestCase):
+    def test_write_pins_the_client_to_the_primary(self):
+        with mock.patch('PawKeeper.db_router.get_replicas', return_value=['replica_0']):
+            response = self.client.get('/api/pets/')
+            self.assertNotIn('use_primary', response.cookies)
+            response = self.client.post('/api/pet_types/', {'name': 'Cat'}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.cookies['use_primary']['max-age'], settings.REPLICA_PIN_SECONDS)
+
+    # Under ASGI the whole middleware chain runs natively async.
+    async def test_async_write_pins_the_client_to_the_primary(self):
+        self.assertNotIsInstance(ASGIHandler()._middleware_chain, SyncToAsync)
+        with mock.patch('PawKeeper.db_router.get_replicas', return_value=['replica_0']):
+            response = await self.async_client.get('/api/async/pets/')
+            self.assertNotIn('use_primary', response.cookies)
+            response = await self.async_client.post('/api/pet_types/', {'name': 'Cat'}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('use_primary', response.cookies)
+
+
+# Run with DATABASE_REPLICA_URLS set (e.g. sqlite:////tmp/replica.sqlite3) to route
+# against a second database. In tests it mirrors the primary's test database.
+@unittest.skipUnless('replica_0' in settings.DATABASES, 'no replica configured')
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = '__all__'
+
+    def count_queries(self, path):
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections['replica_0']) as replica:
+                self.assertEqual(self.client.get(path).status_code, 200)
+        return len(primary), len(replica)
+
+    def test_reads_follow_writes_to_the_primary(self):
+        self.client.post('/api/pet_types/', {'name': 'Cat'}, content_type='application/json')
+        primary, replica = self.count_queries('/api/pets/')
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        del self.client.cookies['use_primary']
+        primary, replica = self.count_queries('/api/pets/')
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        self.assertEqual(self.client.get('/api/pet_types/').json()['results'][0]['name'], 'Cat')
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        create_records(0)
+        create_records(1)
+        self.surgery = Surgeries.objects.get(pet__name='Pet 0')
+        self.surgery.description = 'Removed a small mass from the left hind leg. Mild limping expected.'
+        self.surgery.save()
+        VetVisits.objects.filter(pet__name='Pet 1').update(outcome='Limping on the left leg, limping worse after walks')
+        self.visit = VetVisits.objects.get(pet__name='Pet 1')
+        self.visit.save()
+
+    def search(self, status_code=200, **params):
+        response = self.client.get('/api/search/', params, **getattr(self, 'headers', {}))
+        self.assertEqual(response.status_code, status_code)
+        return response.json()['results'] if status_code == 200 else response.json()
+
+    def test_results_are_ranked_and_highlighted(self):
+        results = self.search(q='limping leg')
+        self.assertEqual([(result['type'], result['id']) for result in results],
+                         [('vet_visits', self.visit.id), ('surgeries', self.surgery.id)])
+        self.assertIn('<mark>limping</mark>', results[1]['snippet'].lower())
+        self.assertTrue(results[1]['url'].endswith(f'/api/surgeries/{self.surgery.id}/'))
+
+    # Snippets are HTML, so the user-written text in them must be escaped.
+    def test_snippets_escape_record_text(self):
+        allergy = Allergies.objects.create(
+            pet=self.visit.pet, allergen='<script>alert(1)</script> pollen', reaction='<img src=x onerror=alert(1)>',
+            date_of_diagnosis=datetime.date(2022, 1, 1),
+        )
+        results = self.search(q='pollen', types='allergies')
+        snippet = next(result['snippet'] for result in results if result['id'] == allergy.id)
+        self.assertNotIn('<script>', snippet)
+        self.assertNotIn('<img', snippet)
+        self.assertIn('&lt;script&gt;alert(1)&lt;/script&gt; <mark>pollen</mark>', snippet)
+
+    def test_results_are_scoped_to_a_pet_or_owner(self):
+        owner = CustomUser.objects.get(username='owner0')
+        self.assertEqual([result['pet'] for result in self.search(q='limping', pet=self.visit.pet_id)],
+                         [self.visit.pet_id])
+        self.assertEqual(self.search(q='limping', types='allergies'), [])
+
+        # ?owner= is limited to the caller's own pets.
+        self.search(q='limping', owner=owner.id, status_code=403)
+        self.client.force_login(owner)
+        self.assertEqual([result['id'] for result in self.search(q='limping', owner=owner.id)], [self.surgery.id])
+        self.client.logout()
+        evict_principal(owner.pk)
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {issue_token(owner)}'}
+        self.search(q='limping')
+        # The pets come from the cached principal rather than another query.
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual([result['id'] for result in self.search(q='limping', owner=owner.id)], [self.surgery.id])
+        self.assertFalse([query for query in context.captured_queries if 'api_petowners' in query['sql']])
+        other = CustomUser.objects.get(username='owner1')
+        self.search(q='limping', owner=other.id, status_code=403)
+
+    def test_index_follows_updates_deletes_and_bulk_creates(self):
+        self.surgery.description = 'Routine'
+        self.surgery.save()
+        self.visit.delete()
+        self.assertEqual(self.search(q='limping'), [])
+
+        payload = [{'pet_id': self.surgery.pet_id, 'allergen': 'Chicken', 'reaction': 'Itching',
+                    'date_of_diagnosis': '2022-01-01'}]
+        self.assertEqual(self.client.post('/api/allergies/', payload, content_type='application/json').status_code, 201)
+        self.assertEqual([result['type'] for result in self.search(q='itching')], ['allergies'])
+
+    def test_query_is_required(self):
+        self.assertEqual(self.client.get('/api/search/').status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'leg', 'types': 'weigh_ins'}).status_code, 400)
+
+
+class VaccineReminderTests(TestCase):
+    def setUp(self):
+        create_records(0)
+        self.today = datetime.date.today()
+        self.vaccine = Vaccines.objects.get()
+        self.vaccine.next_due_date = self.today + datetime.timedelta(days=7)
+        self.vaccine.save()
+
+    def send_reminders(self, *args):
+        management.call_command('send_vaccine_reminders', *args, stdout=io.StringIO())
+
+    def test_due_vaccines_are_reminded_once(self):
+        self.send_reminders('--days', '14')
+        self.send_reminders('--days', '14')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['owner0@example.com'])
+        self.assertEqual(VaccineReminders.objects.get().status, 'S')
+
+    def test_vaccines_outside_the_window_are_not_reminded(self):
+        self.send_reminders('--days', '3')
+        self.assertFalse(VaccineReminders.objects.exists())
+
+    def test_superseded_vaccines_are_skipped(self):
+        self.send_reminders('--enqueue-only')
+        Vaccines.objects.create(pet=self.vaccine.pet, name='Rabies', lab_name='Lab', lot='LOT-NEW',
+                                expiration_date=self.today, application_date=self.today)
+        other = Vaccines.objects.create(pet=self.vaccine.pet, name='Distemper', lab_name='Lab', lot='LOT-D',
+                                        expiration_date=self.today, application_date=datetime.date(2020, 1, 1),
+                                        next_due_date=self.today)
+        self.send_reminders()
+        self.assertEqual(VaccineReminders.objects.get(vaccine=self.vaccine).status, 'X')
+        self.assertEqual([message.subject for message in mail.outbox], [f'Pet 0 is due for {other.name}'])
+
+    # Reminders are claimed before the send, and released again if it fails.
+    def test_reminders_are_claimed_while_sending(self):
+        self.send_reminders('--enqueue-only')
+        statuses = []
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=lambda messages: statuses.append(VaccineReminders.objects.get().status)):
+            self.send_reminders()
+        self.assertEqual(statuses, ['C'])
+        VaccineReminders.objects.update(status='P')
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError), \
+                self.assertRaises(OSError):
+            self.send_reminders()
+        self.assertEqual(VaccineReminders.objects.get().status, 'P')
+
+
+class WeightAnalyticsTests(TestCase):
+    def setUp(self):
+        create_records(0)
+        self.pet = Pets.objects.get()
+        WeighIns.objects.all().delete()
+        for week, weight in enumerate(['4.00', '4.10', '4.20', '4.30', '6.90', '4.50', '4.60']):
+            WeighIns.objects.create(pet=self.pet, date=datetime.date(2021, 2, 1) + datetime.timedelta(weeks=week),
+                                    weight=weight)
+
+    def test_weight_trend_flags_anomalies(self):
+        response = self.client.get(f'/api/pets/{self.pet.id}/weight_trend/')
+        points = response.json()['points']
+        self.assertEqual(len(points), 7)
+        self.assertIsNone(points[0]['weekly_change'])
+        self.assertGreater(points[1]['weekly_change'], 0)
+        self.assertEqual([point['anomaly'] for point in points], [False] * 4 + [True] + [False] * 2)
+
+    def test_breed_percentiles_are_updated_incrementally(self):
+        url = f'/api/breeds/{self.pet.breed_id}/weight_percentiles/'
+        bands = self.client.get(url).json()['bands']
+        self.assertEqual([(band['min_age_months'], band['count']) for band in bands], [(0, 7)])
+        self.assertEqual(bands[0]['percentiles']['p50'], 4.3)
+
+        WeighIns.objects.create(pet=self.pet, date=datetime.date(2022, 2, 1), weight='5.00')
+        with self.assertNumQueries(2):
+            bands = self.client.get(url).json()['bands']
+        self.assertEqual([(band['min_age_months'], band['count']) for band in bands], [(0, 7), (12, 1)])
+
+        WeighIns.objects.filter(weight='6.90').get().delete()
+        bands = self.client.get(url).json()['bands']
+        self.assertEqual(bands[0]['count'], 6)
+
+    def test_only_breed_and_birthdate_edits_mark_the_stats_stale(self):
+        self.client.get(f'/api/breeds/{self.pet.breed_id}/weight_percentiles/')
+        stats = BreedWeightStats.objects.get(breed_id=self.pet.breed_id)
+        self.pet.name = 'Renamed'
+        self.pet.color = 'Black'
+        self.pet.save()
+        stats.refresh_from_db()
+        self.assertFalse(stats.stale)
+
+        self.pet.birthdate = datetime.date(2020, 1, 1)
+        self.pet.save()
+        stats.refresh_from_db()
+        self.assertTrue(stats.stale)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        pet_type = PetTypes.objects.create(name='Dog')
+        for name in ['Labrador', 'Golden Labrador', 'Beagle', 'Lab Mix']:
+            Breeds.objects.create(name=name, pet_type=pet_type)
+
+    def autocomplete(self, **params):
+        response = self.client.get('/api/autocomplete/', {'type': 'breeds', **params})
+        self.assertEqual(response.status_code, 200)
+        return [result['name'] for result in response.json()['results']]
+
+    def test_prefix_matches_come_before_substring_matches(self):
+        self.assertEqual(self.autocomplete(q='lab'), ['Lab Mix', 'Labrador', 'Golden Labrador'])
+        self.assertEqual(self.autocomplete(q='EAG'), ['Beagle'])
+        self.assertEqual(self.autocomplete(q='lab', limit=1), ['Lab Mix'])
+
+    def test_index_is_served_without_queries_and_follows_writes(self):
+        self.autocomplete(q='lab')
+        with self.assertNumQueries(0):
+            self.autocomplete(q='lab')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Breeds.objects.filter(name='Lab Mix').get().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            Breeds.objects.create(name='Labradoodle')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.autocomplete(q='labrad'), ['Labradoodle', 'Labrador', 'Golden Labrador'])
+
+    # Suffixes are ordered by their first characters only; longer queries are
+    # checked against the whole name.
+    def test_long_substring_queries(self):
+        Breeds.objects.create(name='Wire Haired Pointing Griffon')
+        Breeds.objects.create(name='Wire Haired Pointing Gun Dog')
+        self.assertEqual(self.autocomplete(q='haired pointing gri'), ['Wire Haired Pointing Griffon'])
+        self.assertEqual(self.autocomplete(q='haired pointing g'),
+                         ['Wire Haired Pointing Griffon', 'Wire Haired Pointing Gun Dog'])
+
+    def test_index_is_rebuilt_after_writes_from_other_processes(self):
+        self.autocomplete(q='lab')
+        Breeds.objects.filter(name='Beagle').update(name='Basset')
+        bump_generation(Breeds)
+        self.assertEqual(self.autocomplete(q='bas'), ['Basset'])
+
+    def test_type_is_required(self):
+        self.assertEqual(self.client.get('/api/autocomplete/', {'q': 'lab'}).status_code, 400)
+
+
+class MyPetsTests(TestCase):
+    def setUp(self):
+        create_records(0)
+        create_records(1)
+        self.user = CustomUser.objects.get(username='owner0')
+        self.pet = Pets.objects.get(name='Pet 0')
+        WeighIns.objects.create(pet=self.pet, date=datetime.date(2021, 6, 1), weight='5.10')
+        Illnesses.objects.create(pet=self.pet, name='Otitis', description='Ear', date_of_diagnosis=datetime.date(2021, 3, 1),
+                                 recovery_date=datetime.date(2021, 3, 10))
+        Vaccines.objects.filter(pet=self.pet).update(next_due_date=datetime.date(2022, 1, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_dashboard_lists_owned_pets_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/me/pets/')
+        self.assertEqual(response.status_code, 200)
+        [entry] = response.json()['results']
+        self.assertEqual(entry['id'], self.pet.id)
+        self.assertEqual(entry['latest_weigh_in'], {'date': '2021-06-01', 'weight': '5.10'})
+        self.assertEqual(entry['next_vaccine']['next_due_date'], '2022-01-01')
+        self.assertEqual(entry['latest_vet_visit']['reason'], 'Checkup')
+        self.assertEqual([illness['name'] for illness in entry['open_illnesses']], ['Flu'])
+
+    def test_pets_without_records_have_empty_status(self):
+        WeighIns.objects.filter(pet=self.pet).delete()
+        Illnesses.objects.filter(pet=self.pet).delete()
+        [entry] = self.client.get('/api/me/pets/').json()['results']
+        self.assertIsNone(entry['latest_weigh_in'])
+        self.assertEqual(entry['open_illnesses'], [])
+
+    def test_requires_authentication(self):
+        self.assertIn(APIClient().get('/api/me/pets/').status_code, (401, 403))
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.series.clear()
+        create_records(0)
+
+    def get_samples(self):
+        samples = {}
+        for line in self.client.get('/metrics').content.decode().splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_requests_are_reported_per_route_and_method(self):
+        self.client.get('/api/weigh_ins/')
+        self.client.get('/api/weigh_ins/')
+        pet = Pets.objects.get()
+        self.client.get(f'/api/pets/{pet.id}/weigh_ins/')
+        samples = self.get_samples()
+
+        labels = 'route="api/weigh_ins/",method="GET"'
+        self.assertEqual(samples[f'pawkeeper_http_requests_total{{{labels},status="2xx"}}'], 2)
+        self.assertEqual(samples[f'pawkeeper_http_request_duration_seconds_count{{{labels}}}'], 2)
+        self.assertEqual(samples[f'pawkeeper_db_queries_count{{{labels}}}'], 2)
+        self.assertGreater(samples[f'pawkeeper_db_queries_sum{{{labels}}}'], 0)
+        self.assertGreater(samples[f'pawkeeper_serialization_duration_seconds_sum{{{labels}}}'], 0)
+        self.assertGreater(samples[f'pawkeeper_http_response_size_bytes_sum{{{labels}}}'], 0)
+        self.assertEqual(samples[f'pawkeeper_http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'], 2)
+        self.assertIn('pawkeeper_http_requests_total{route="api/pets/{pet_pk}/weigh_ins/",method="GET",status="2xx"}',
+                      samples)
+
+    async def test_async_requests_are_measured_without_a_thread(self):
+        with override_settings(MIDDLEWARE=['api.metrics.MetricsMiddleware']):
+            handler = ASGIHandler()
+        self.assertNotIsInstance(handler._middleware_chain, SyncToAsync)
+
+        async def get_response(request):
+            return HttpResponse()
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(get_response)))
+
+        await self.async_client.get('/api/async/weigh_ins/')
+        labels = 'route="api/async/weigh_ins/",method="GET"'
+        samples = await sync_to_async(self.get_samples)()
+        self.assertEqual(samples[f'pawkeeper_http_requests_total{{{labels},status="2xx"}}'], 1)
+        self.assertGreater(samples[f'pawkeeper_db_queries_sum{{{labels}}}'], 0)
+
+    def test_series_are_bounded(self):
+        bounded = MetricsRegistry(max_series=1)
+        for route in ('a', 'b', 'c'):
+            bounded.observe(route, 'GET', 200, 0.01, 1, 0.001, 0.001, 10)
+        self.assertEqual(sorted(bounded.series), [('a', 'GET'), ('other', 'GET')])
+        self.assertEqual(bounded.series[('other', 'GET')].requests['2xx'], 2)
+
+
+class PurgeTests(TestCase):
+    def count_delete_queries(self, pet):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.delete(f'/api/pets/{pet.id}/')
+        self.assertEqual(response.status_code, 204)
+        return len(context.captured_queries)
+
+    def test_pet_delete_purges_its_history_in_a_constant_number_of_queries(self):
+        create_records(0)
+        create_records(1)
+        pet, other = Pets.objects.order_by('id')
+        for index in range(30):
+            WeighIns.objects.create(pet=pet, date=datetime.date(2022, 1, 1) + datetime.timedelta(days=index), weight='4.00')
+        WeighIns.objects.create(pet=other, date=datetime.date(2022, 1, 1), weight='4.00')
+        get_breed_percentiles(pet.breed_id)
+        self.assertTrue(SearchDocuments.objects.filter(pet=pet).exists())
+
+        many = self.count_delete_queries(pet)
+        self.assertFalse(Pets.objects.filter(pk=pet.pk).exists())
+        for model in (WeighIns, Allergies, VetVisits, Vaccines, Illnesses, Treatments, PetOwners, GroomingAppointments):
+            self.assertFalse(model.objects.filter(pet_id=pet.pk).exists(), model.__name__)
+        self.assertFalse(SearchDocuments.objects.filter(pet_id=pet.pk).exists())
+        self.assertTrue(BreedWeightStats.objects.get(breed_id=pet.breed_id).stale)
+        self.assertEqual(WeighIns.objects.filter(pet=other).count(), 2)
+
+        self.assertEqual(self.count_delete_queries(other), many)
+
+    def test_delete_receivers_without_a_purge_receiver_use_the_collector(self):
+        create_records(0)
+        pet = Pets.objects.get()
+        deleted = []
+        post_delete.connect(lambda instance, **kwargs: deleted.append(instance.pk), sender=Vaccines,
+                            dispatch_uid='test_purge', weak=False)
+        self.addCleanup(post_delete.disconnect, sender=Vaccines, dispatch_uid='test_purge')
+        self.assertFalse(can_purge(Pets))
+        self.assertEqual(self.client.delete(f'/api/pets/{pet.id}/').status_code, 204)
+        self.assertEqual(len(deleted), 1)
+        self.assertFalse(Pets.objects.exists())
+
+    def test_purge_runs_in_chunks(self):
+        create_records(0)
+        pet = Pets.objects.get()
+        for index in range(5):
+            WeighIns.objects.create(pet=pet, date=datetime.date(2022, 1, 1) + datetime.timedelta(days=index), weight='4.00')
+        counts = purge(Pets, [pet.pk], chunk_size=2)
+        self.assertEqual(counts['api.WeighIns'], 6)
+        self.assertEqual(counts['api.Pets'], 1)
+
+
+class BackgroundPurgeTests(TransactionTestCase):
+    def test_background_delete_purges_after_the_response(self):
+        create_records(0)
+        pet = Pets.objects.get()
+        with mock.patch('api.purge.threading.Thread') as thread:
+            response = self.client.delete(f'/api/pets/{pet.id}/?background=true')
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(Pets.objects.exists())
+        with mock.patch('api.purge.connection.close'):
+            thread.call_args.kwargs['target']()
+        self.assertFalse(Pets.objects.exists())
+        self.assertFalse(WeighIns.objects.exists())
+
+
+class BatchTests(TestCase):
+    def batch(self, requests, **options):
+        return self.client.post('/api/batch/', {'requests': requests, **options}, content_type='application/json')
+
+    def test_sub_requests_run_through_their_views(self):
+        create_records(0)
+        pet = Pets.objects.get()
+        response = self.batch([
+            {'path': f'/api/pets/{pet.id}/'},
+            {'path': f'/api/pets/{pet.id}/weigh_ins/'},
+            {'path': '/api/weigh_ins/?fields=id,weight'},
+            {'path': '/api/vets/'},
+            {'method': 'POST', 'path': '/api/pet_types/', 'body': {'name': 'Hamster'}},
+            {'path': '/api/unknown/'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        responses = response.json()['responses']
+        self.assertEqual([item['status'] for item in responses], [200, 200, 200, 200, 201, 404])
+        self.assertEqual(responses[0]['body']['name'], 'Pet 0')
+        self.assertEqual(responses[1]['body']['results'][0]['weight'], '4.20')
+        self.assertEqual(list(responses[2]['body']['results'][0]), ['id', 'weight'])
+        self.assertTrue(PetTypes.objects.filter(name='Hamster').exists())
+
+    def test_async_routes_are_awaited(self):
+        create_records(0)
+        pet = Pets.objects.get()
+        response = self.batch([{'path': '/api/async/pet_types/'}, {'path': f'/api/async/pets/{pet.id}/'}])
+        self.assertEqual(response.status_code, 200)
+        responses = response.json()['responses']
+        self.assertEqual([item['status'] for item in responses], [200, 200])
+        self.assertEqual(responses[0]['body']['results'][0]['name'], 'Type A')
+        self.assertEqual(responses[1]['body']['name'], 'Pet 0')
+
+    def test_atomic_batch_rolls_back_on_the_first_failure(self):
+        response = self.batch([
+            {'method': 'POST', 'path': '/api/pet_types/', 'body': {'name': 'Hamster'}},
+            {'method': 'POST', 'path': '/api/pet_types/', 'body': {'name': 'Hamster 2'}},
+            {'method': 'POST', 'path': '/api/pet_types/', 'body': {'name': 'Gerbil'}},
+        ], atomic=True)
+        data = response.json()
+        self.assertTrue(data['rolled_back'])
+        self.assertEqual([item['status'] for item in data['responses']], [201, 400, 424])
+        self.assertFalse(PetTypes.objects.exists())
+
+    def test_invalid_batches_are_rejected(self):
+        self.assertEqual(self.batch([]).status_code, 400)
+        self.assertEqual(self.batch([{'path': '/api/batch/'}]).status_code, 400)
+        self.assertEqual(self.batch([{'path': '/admin/'}]).status_code, 400)
+        self.assertEqual(self.batch([{'path': '/api/pets/'}] * 21).status_code, 400)
+
+
+class ParallelBatchTests(TransactionTestCase):
+    def test_reads_run_in_parallel_in_request_order(self):
+        create_records(0)
+        pet, vet = Pets.objects.get(), Vets.objects.get()
+        paths = [f'/api/vets/{vet.id}/', '/api/pets/', f'/api/pets/{pet.id}/vaccines/']
+        requests = [{'path': path} for path in paths]
+        requests.insert(2, {'method': 'POST', 'path': '/api/pet_types/', 'body': {'name': 'Hamster'}})
+        requests.append({'path': '/api/pet_types/'})
+        responses = self.client.post('/api/batch/', {'requests': requests, 'parallel': True},
+                                     content_type='application/json').json()['responses']
+        self.assertEqual([item['status'] for item in responses], [200, 200, 201, 200, 200])
+        self.assertEqual(responses[0]['body']['name'], 'Vet 0')
+        self.assertEqual(responses[3]['body']['results'][0]['name'], 'Rabies')
+        self.assertIn('Hamster', [item['name'] for item in responses[4]['body']['results']])
+
+    def test_async_routes_are_awaited_on_the_workers(self):
+        create_records(0)
+        requests = [{'path': '/api/async/pet_types/'}, {'path': '/api/async/vets/'}]
+        responses = self.client.post('/api/batch/', {'requests': requests, 'parallel': True},
+                                     content_type='application/json').json()['responses']
+        self.assertEqual([item['status'] for item in responses], [200, 200])
+        self.assertEqual(responses[1]['body']['results'][0]['name'], 'Vet 0')
+
+    # Parallel reads run in the batch's context, so they follow its writes (and the
+    # client's pin) to the primary.
+    def test_parallel_reads_after_a_write_use_the_primary(self):
+        create_records(0)
+        routed = []
+        db_for_read = PrimaryReplicaRouter.db_for_read
+
+        def record_route(router, model, **hints):
+            routed.append(db_for_read(router, model, **hints))
+            return routed[-1]
+
+        reads = [{'path': '/api/pets/'}, {'path': '/api/weigh_ins/'}]
+        with mock.patch('PawKeeper.db_router.get_replicas', return_value=['replica_0']), \
+                mock.patch.object(PrimaryReplicaRouter, 'db_for_read', record_route):
+            requests = [{'method': 'POST', 'path': '/api/pet_types/', 'body': {'name': 'Hamster'}}, *reads]
+            response = self.client.post('/api/batch/', {'requests': requests, 'parallel': True},
+                                        content_type='application/json')
+            self.assertEqual([item['status'] for item in response.json()['responses']], [201, 200, 200])
+            self.assertEqual(set(routed), {'default'})
+
+            routed.clear()
+            self.client.cookies['use_primary'] = '1'
+            response = self.client.post('/api/batch/', {'requests': reads, 'parallel': True},
+                                        content_type='application/json')
+            self.assertEqual([item['status'] for item in response.json()['responses']], [200, 200])
+            self.assertEqual(set(routed), {'default'})
+
+    # Queries of sub-requests run on worker threads count towards the batch.
+    def test_parallel_queries_are_measured(self):
+        create_records(0)
+        requests = [{'path': '/api/pets/'}, {'path': '/api/vets/'}, {'path': '/api/weigh_ins/'}]
+        queries = []
+        for parallel in (False, True):
+            registry.series.clear()
+            cache.clear()
+            self.client.post('/api/batch/', {'requests': requests, 'parallel': parallel}, content_type='application/json')
+            queries.append(registry.series[('api/batch/', 'POST')].queries.sum)
+        self.assertGreater(queries[0], 0)
+        self.assertEqual(queries[1], queries[0])
+
+
+class BenchmarkTests(TestCase):
+    def test_seeded_dataset_is_deterministic_and_covers_every_model(self):
+        DatasetSeeder(scale=0.5, seed=3).seed()
+        for prefix, viewset, basename in router.registry:
+            self.assertTrue(viewset.queryset.model.objects.exists(), prefix)
+        weigh_ins = list(WeighIns.objects.order_by('id').values_list('pet__name', 'date', 'weight'))
+
+        for model in (CustomUser, Pets, PetTypes, Vets, VetClinics, PetGroomers, PetSalons):
+            model.objects.all().delete()
+        DatasetSeeder(scale=0.5, seed=3).seed()
+        self.assertEqual(list(WeighIns.objects.order_by('id').values_list('pet__name', 'date', 'weight')), weigh_ins)
+
+    def test_regressions_against_baseline_fail(self):
+        results = run_benchmark(scale=0.05, repeat=2, rounds=2)
+        self.assertIn('nested list weigh_ins', results)
+        self.assertIn('create vet_visits', results)
+        baseline = {'cases': {name: dict(result) for name, result in results.items()}}
+        self.assertEqual(compare(results, baseline), [])
+
+        baseline['cases']['list pets']['queries'] -= 1
+        baseline['cases']['list vets']['p95_ms'] = 0.001
+        del baseline['cases']['list breeds']
+        failures = compare(results, baseline, margin_ms=0)
+        self.assertEqual(len(failures), 3)
+
+    def test_seed_command_honours_counts_and_refuses_a_seeded_database(self):
+        management.call_command('seed', scale=0.2, count=[('pets', 30), ('users', 10)], stdout=io.StringIO())
+        self.assertEqual(Pets.objects.count(), 30)
+        self.assertEqual(CustomUser.objects.count(), 10)
+        self.assertEqual(PetOwners.objects.filter(owner_type='P').count(), 30)
+        self.assertTrue(Treatments.objects.exists())
+        with self.assertRaises(management.CommandError):
+            management.call_command('seed', stdout=io.StringIO())
@@ -0,0 +1,90 @@
+import datetime
+import heapq
+from itertools import islice
+
+from django.db.models import DateTimeField, Q
+
+from .models import (
+    Allergies, WeighIns, Surgeries, Procedures, VetVisits, Vaccines, Illnesses,
+    Treatments, GroomingAppointments
+)
+from .serializers import (
+    AllergiesSerializer, WeighInsSerializer, SurgeriesSerializer, ProceduresSerializer,
+    VetVisitsSerializer, VaccinesSerializer, IllnessesSerializer, TreatmentsSerializer,
+    GroomingAppointmentsSerializer
+)
+from .querysets import eager_load
+
+# Record types merged into a pet's timeline, keyed by their route name.
+TIMELINE_TYPES = {
+    'allergies': (Allergies, AllergiesSerializer),
+    'weigh_ins': (WeighIns, WeighInsSerializer),
+    'surgeries': (Surgeries, SurgeriesSerializer),
+    'procedures': (Procedures, ProceduresSerializer),
+    'vet_visits': (VetVisits, VetVisitsSerializer),
+    'vaccines': (Vaccines, VaccinesSerializer),
+    'illnesses': (Illnesses, IllnessesSerializer),
+    'treatments': (Treatments, TreatmentsSerializer),
+    'grooming_appointments': (GroomingAppointments, GroomingAppointmentsSerializer),
+}
+
+
+# Point in time a record sorts at. Date-only records sort at midnight UTC.
+def get_timestamp(value):
+    if isinstance(value, datetime.datetime):
+        return value.astimezone(datetime.timezone.utc)
+    return datetime.datetime.combine(value, datetime.time.min, datetime.timezone.utc)
+
+
+# Rows of one type that sort after the (timestamp, type, id) cursor.
+def get_after_filter(type_name, date_field, after):
+    timestamp, after_type, after_id = after
+    if type_name > after_type:
+        same_position = Q()
+    elif type_name == after_type:
+        same_position = Q(id__gt=after_id)
+    else:
+        same_position = None
+
+    model = TIMELINE_TYPES[type_name][0]
+    if isinstance(model._meta.get_field(date_field), DateTimeField):
+        value = timestamp
+    else:
+        # A date sorts after the cursor if it is a later day; on the same day only
+        # when the cursor sits exactly at midnight.
+        value = timestamp.date()
+        if timestamp.time() != datetime.time.min:
+            same_position = None
+
+    condition = Q(**{f'{date_field}__gt': value})
+    if same_position is not None:
+        condition |= Q(**{date_field: value}) & same_position
+    return condition
+
+
+# Stream of (timestamp, type, id, record) for one record type, in timeline order.
+# Without a limit the rows are read in chunks through a server-side cursor.
+def get_type_stream(pet_id, type_name, after, limit=None, chunk_size=2000):
+    model, serializer = TIMELINE_TYPES[type_name]
+    date_field = model._meta.get_latest_by
+    queryset = eager_load(model.objects.filter(pet_id=pet_id), serializer)
+    if after is not None:
+        queryset = queryset.filter(get_after_filter(type_name, date_field, after))
+    queryset = queryset.order_by(date_field, 'id')
+    records = queryset[:limit] if limit is not None else queryset.iterator(chunk_size=chunk_size)
+    for record in records:
+        yield get_timestamp(getattr(record, date_field)), type_name, record.id, record
+
+
+# Merge the date-ordered streams of each requested type into one chronological
+# list. Each stream reads at most `limit` rows off its (pet, date) index, so a
+# page costs one bounded range scan per type.
+def get_timeline(pet_id, types, after=None, limit=100):
+    streams = [get_type_stream(pet_id, type_name, after, limit) for type_name in types]
+    return list(islice(heapq.merge(*streams, key=lambda entry: entry[:3]), limit))
+
+
+# The whole timeline as a lazy merge, for streamed exports.
+def iter_timeline(pet_id, types, chunk_size=2000):
+    streams = [get_type_stream(pet_id, type_name, None, chunk_size=chunk_size) for type_name in types]
+    return heapq.merge(*streams, key=lambda entry: entry[:3])
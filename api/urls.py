@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework import routers
 from rest_framework_nested import routers as nested_routers
 from . import views
+from .async_views import AsyncReadView
 import re
 
 
@@ -16,7 +17,7 @@ router = routers.DefaultRouter()
 # Dynamically register viewsets with the router
 viewset_classes = {}
 for model, serializer in views.viewsets_info:
-    viewset_class = views.GenericViewSet.as_viewset(model, serializer)
+    viewset_class = views.get_viewset_base(model).as_viewset(model, serializer)
     viewset_classes[model.__name__] = viewset_class
     router.register(camel_to_snake(model.__name__), viewset_class)
 
@@ -30,11 +31,38 @@ pet_related_models = [
 ]
 
 for pet_related_model in pet_related_models:
-    nested_viewset_class = viewset_classes[pet_related_model]
+    viewset_class = viewset_classes[pet_related_model]
+    nested_viewset_class = views.NestedGenericViewSet.as_viewset(viewset_class.queryset.model, viewset_class.serializer_class)
     pets_router.register(camel_to_snake(pet_related_model), nested_viewset_class, basename=f'pet_{camel_to_snake(pet_related_model)}')
 
 
+# Native async list/retrieve for the same resources under /async/
+async_urlpatterns = []
+for model, serializer in views.viewsets_info:
+    prefix = camel_to_snake(model.__name__)
+    async_view = AsyncReadView.for_model(model, serializer).as_view()
+    async_urlpatterns += [
+        path(f'async/{prefix}/', async_view, name=f'async-{prefix}-list'),
+        path(f'async/{prefix}/<int:pk>/', async_view, name=f'async-{prefix}-detail'),
+    ]
+    if model.__name__ in pet_related_models:
+        nested_async_view = AsyncReadView.for_model(model, serializer, nested=True).as_view()
+        async_urlpatterns += [
+            path(f'async/pets/<int:pet_pk>/{prefix}/', nested_async_view, name=f'async-pet-{prefix}-list'),
+            path(f'async/pets/<int:pet_pk>/{prefix}/<int:pk>/', nested_async_view, name=f'async-pet-{prefix}-detail'),
+        ]
+
+
 urlpatterns = [
+    path('pets/<int:pk>/timeline/', views.PetTimelineView.as_view(), name='pet-timeline'),
+    path('me/pets/', views.MyPetsView.as_view(), name='my-pets'),
+    path('pets/<int:pk>/weight_trend/', views.WeightTrendView.as_view(), name='pet-weight-trend'),
+    path('breeds/<int:pk>/weight_percentiles/', views.BreedWeightPercentilesView.as_view(),
+         name='breed-weight-percentiles'),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('autocomplete/', views.AutocompleteView.as_view(), name='autocomplete'),
+    path('batch/', views.BatchView.as_view(), name='batch'),
+    *async_urlpatterns,
     path('', include(router.urls)),
     path('', include(pets_router.urls)),
 ]
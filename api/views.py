@@ -1,4 +1,14 @@
-from rest_framework import viewsets
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
+from rest_framework import permissions, status, viewsets
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from .models import (
     PetTypes, Breeds, Pets, PetOwners, VetClinics, Vets, Allergies,
     WeighIns, Surgeries, Procedures, VetVisits, Vaccines, Illnesses,
@@ -11,20 +21,408 @@ from .serializers import (
     IllnessesSerializer, TreatmentsSerializer, PetSalonsSerializer, PetGroomersSerializer,
     GroomingAppointmentsSerializer
 )
+from .querysets import eager_load, get_include_prefetches, get_serializer_relations, sparse_queryset
+from .bulk import BulkCreateListSerializer
+from .pagination import TimelinePagination
+from .timeline import TIMELINE_TYPES, iter_timeline
+from .renderers import StreamingRenderer, NDJSONRenderer, CSVRenderer
+from .fastpath import get_fast_path
+from .cache import REFERENCE_MODELS, bump_generation_on_commit, get_response_key
+from .search import SEARCH_TYPES, search
+from .analytics import get_breed_percentiles, get_weight_trend
+from .autocomplete import AUTOCOMPLETE_TYPES, autocomplete
+from .dashboard import get_dashboard_entry, get_owner_dashboard
+from .purge import can_purge, purge, purge_in_background
+from .batch import get_subrequests, run_batch
+
+
+# Stream rows through a StreamingRenderer as an attachment download.
+def stream_export(renderer, rows, filename):
+    response = StreamingHttpResponse(renderer.render_rows(rows), content_type=renderer.media_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{renderer.format}"'
+    return response
 
 
 class GenericViewSet(viewsets.ModelViewSet):
+    # Extra class attributes (e.g. pagination_class) override the defaults.
     @classmethod
-    def as_viewset(cls, model, serializer):
+    def as_viewset(cls, model, serializer, **attrs):
         return type(
             f"{model.__name__}ViewSet",
             (cls,),
             {
-                "queryset": model.objects.all(),
+                "queryset": eager_load(model.objects.all(), serializer),
                 "serializer_class": serializer,
+                **attrs,
             }
         )
 
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer, CSVRenderer]
+    # Largest list payload accepted by a single bulk create.
+    bulk_create_max_size = 1000
+    # Rows fetched per round trip when streaming an export.
+    export_chunk_size = 2000
+
+    # Keys the list is ordered and cursor-paginated by.
+    def get_ordering(self):
+        return ('id',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        field_names = self.get_sparse_field_names()
+        if field_names is not None:
+            queryset = sparse_queryset(queryset, self.serializer_class, field_names, required=self.get_ordering())
+        include = self.get_include()
+        if include:
+            queryset = queryset.prefetch_related(*get_include_prefetches(self.serializer_class, include))
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        field_names = self.get_sparse_field_names()
+        if field_names is not None:
+            kwargs.setdefault('fields', field_names)
+        include = self.get_include()
+        if include:
+            kwargs.setdefault('include', include)
+        return super().get_serializer(*args, **kwargs)
+
+    # Related collections embedded with ?include=allergies,illnesses.treatments on
+    # reads, as a tree of related names, or None.
+    def get_include(self):
+        if self.request is None or self.request.method not in permissions.SAFE_METHODS:
+            return None
+        paths = self.request.query_params.get('include')
+        if not paths:
+            return None
+
+        include = {}
+        for path in paths.split(','):
+            names = path.split('.')
+            if len(names) > settings.API_INCLUDE_MAX_DEPTH:
+                raise ValidationError({'include': f'{path} is nested deeper than {settings.API_INCLUDE_MAX_DEPTH} levels.'})
+            serializer_class, node = self.serializer_class, include
+            for name in names:
+                serializer_class = serializer_class.get_include_serializer(name)
+                if serializer_class is None:
+                    raise ValidationError({'include': f'Unknown relation: {path}.'})
+                node = node.setdefault(name, {})
+        return include
+
+    # Fields picked with ?fields=a,b and/or ?exclude=c on reads, or None for all.
+    def get_sparse_field_names(self):
+        if self.request is None or self.request.method not in permissions.SAFE_METHODS:
+            return None
+        fields = self.request.query_params.get('fields')
+        exclude = self.request.query_params.get('exclude')
+        if not fields and not exclude:
+            return None
+
+        readable = [name for name, field in self.serializer_class().fields.items() if not field.write_only]
+        requested = set(fields.split(',')) if fields else set(readable)
+        excluded = set(exclude.split(',')) if exclude else set()
+        unknown = (requested | excluded) - set(readable)
+        if unknown:
+            raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}."})
+        return [name for name in readable if name in requested and name not in excluded]
+
+    # Lists are rendered from .values() rows when the serializer supports the fast
+    # path. ?format=ndjson and ?format=csv stream the whole list instead of a page.
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        fast_path = get_fast_path(serializer)
+        queryset = self.filter_queryset(self.get_queryset())
+        if fast_path is not None:
+            # The keyset pagination reads the ordering keys from each row, and
+            # sparse fields can leave them out of the rendered columns.
+            ordering = [key for key in self.get_ordering() if key not in fast_path.columns]
+            queryset = queryset.values(*fast_path.columns, *ordering)
+            to_representation = fast_path.to_representation
+        else:
+            to_representation = serializer.to_representation
+
+        renderer = request.accepted_renderer
+        if isinstance(renderer, StreamingRenderer):
+            queryset = queryset.order_by(*self.get_ordering())
+            rows = (to_representation(row) for row in queryset.iterator(chunk_size=self.export_chunk_size))
+            return stream_export(renderer, rows, self.basename)
+
+        if fast_path is None:
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast_path.render(page))
+        return Response(fast_path.render(queryset))
+
+    # A list payload is validated as one batch and inserted with bulk_create.
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        serializer = BulkCreateListSerializer(
+            child=self.get_serializer(), data=request.data, max_length=self.bulk_create_max_size,
+            context=self.get_serializer_context(),
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    # Deletes go through the set-based purge when no receiver needs the cascaded
+    # rows one by one. ?background=true purges after the response, with a 202.
+    def destroy(self, request, *args, **kwargs):
+        instance = self.get_object()
+        model = type(instance)
+        if not can_purge(model):
+            self.perform_destroy(instance)
+        elif request.query_params.get('background') in ('true', '1'):
+            purge_in_background(model, [instance.pk])
+            return Response(status=status.HTTP_202_ACCEPTED)
+        else:
+            purge(model, [instance.pk])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class NestedGenericViewSet(GenericViewSet):
+    # Serve only the records of the pet in the URL, in date order, so the
+    # read is a range scan on the model's (pet, date) index.
+    def get_queryset(self):
+        queryset = super().get_queryset().filter(pet_id=self.kwargs['pet_pk'])
+        return queryset.order_by(*self.get_ordering())
+
+    def get_ordering(self):
+        return (self.queryset.model._meta.get_latest_by, 'id')
+
+
+# Read-through cache for reference data. Responses are cached under a key made from
+# the request and the generation of every table they are built from, which doubles
+# as the ETag: a matching If-None-Match gets a 304 without touching the database.
+class CachedGenericViewSet(GenericViewSet):
+    # Seconds a cached response is kept; writes invalidate it earlier.
+    cache_timeout = 300
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        # bulk_create doesn't send post_save, so invalidate here.
+        if isinstance(request.data, list):
+            bump_generation_on_commit(self.queryset.model)
+        return response
+
+    # The viewset's model plus every model its serializer renders, including the
+    # collections embedded with ?include=.
+    def get_cache_models(self, serializer_class=None, include=None):
+        if serializer_class is None:
+            serializer_class, include = self.serializer_class, self.get_include()
+        model = serializer_class.Meta.model
+        models = [model]
+        select, prefetch = get_serializer_relations(model, serializer_class)
+        for lookup in select + prefetch:
+            related = model
+            for name in lookup.split('__'):
+                related = related._meta.get_field(name).related_model
+                models.append(related)
+        for name, nested in (include or {}).items():
+            models += self.get_cache_models(serializer_class.get_include_serializer(name), nested)
+        return models
+
+    def get_cached_response(self, view, request, *args, **kwargs):
+        if isinstance(request.accepted_renderer, StreamingRenderer):
+            return view(request, *args, **kwargs)
+
+        key = get_response_key(request, self.get_cache_models())
+        etag = f'"{key}"'
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and {etag, '*'} & set(parse_etags(if_none_match)):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        data = cache.get(f'response:{key}')
+        if data is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(f'response:{key}', response.data, self.cache_timeout)
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        return response
+
+
+# Reference tables are served through the cache, everything else directly.
+def get_viewset_base(model):
+    return CachedGenericViewSet if model in REFERENCE_MODELS else GenericViewSet
+
+
+# A pet's medical records of every type as one chronological stream.
+# ?types=weigh_ins,vaccines limits the stream to the given record types.
+# ?format=ndjson and ?format=csv stream the pet's full record unpaginated.
+class PetTimelineView(APIView):
+    pagination_class = TimelinePagination
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer, CSVRenderer]
+
+    def get(self, request, pk):
+        pet = get_object_or_404(Pets, pk=pk)
+        types = self.get_types(request)
+        context = {'request': request}
+
+        renderer = request.accepted_renderer
+        if isinstance(renderer, StreamingRenderer):
+            rows = (self.get_entry(entry, context) for entry in iter_timeline(pet.id, types))
+            return stream_export(renderer, rows, f'pet_{pet.id}_timeline')
+
+        paginator = self.pagination_class()
+        entries = paginator.paginate_timeline(pet.id, types, request)
+        return paginator.get_paginated_response([self.get_entry(entry, context) for entry in entries])
+
+    def get_entry(self, entry, context):
+        timestamp, type_name, record_id, record = entry
+        return {
+            'type': type_name,
+            'date': getattr(record, record._meta.get_latest_by),
+            'record': TIMELINE_TYPES[type_name][1](record, context=context).data,
+        }
+
+    def get_types(self, request):
+        types = request.query_params.get('types')
+        if not types:
+            return list(TIMELINE_TYPES)
+        types = [type_name.strip() for type_name in types.split(',') if type_name.strip()]
+        unknown = [type_name for type_name in types if type_name not in TIMELINE_TYPES]
+        if unknown:
+            raise ValidationError({'types': f"Unknown record types: {', '.join(unknown)}."})
+        return types
+
+
+# The signed-in user's pets with their latest weigh-in, next vaccine due, latest
+# vet visit and open illnesses, read in a single query.
+class MyPetsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'results': [get_dashboard_entry(owner) for owner in get_owner_dashboard(request.user)]})
+
+
+# Smoothed weight curve of a pet with weekly rate of change and anomaly flags.
+class WeightTrendView(APIView):
+    def get(self, request, pk):
+        pet = get_object_or_404(Pets, pk=pk)
+        weigh_ins = WeighIns.objects.filter(pet=pet).order_by('date', 'id').values_list('date', 'weight')
+        return Response({'pet': pet.id, 'points': get_weight_trend(weigh_ins)})
+
+
+# Weight percentiles of a breed's pets per age band, from precomputed stats.
+class BreedWeightPercentilesView(APIView):
+    def get(self, request, pk):
+        breed = get_object_or_404(Breeds, pk=pk)
+        return Response({'breed': breed.id, 'bands': get_breed_percentiles(breed.id)})
+
+
+# Name suggestions for a reference table, e.g. ?type=breeds&q=lab. Served from an
+# in-process index, without database queries once the index is built.
+class AutocompleteView(APIView):
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request):
+        type_name = request.query_params.get('type')
+        if type_name not in AUTOCOMPLETE_TYPES:
+            raise ValidationError({'type': f"Must be one of: {', '.join(AUTOCOMPLETE_TYPES)}."})
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+
+        query = request.query_params.get('q', '').strip()
+        return Response({'results': autocomplete(AUTOCOMPLETE_TYPES[type_name], query, limit)})
+
+
+# Ranked full-text search over clinical notes, e.g. ?q=limping&pet=3. Results can be
+# scoped with ?pet=, ?owner= (the caller's own user id; staff may pass any) and
+# ?types=, and come with highlighted snippets.
+class SearchView(APIView):
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This query parameter is required.'})
+
+        results = search(
+            query,
+            pet_id=self.get_int_param(request, 'pet'),
+            pet_ids=self.get_owner_pet_ids(request),
+            types=self.get_types(request),
+            limit=min(self.get_int_param(request, 'limit') or self.default_limit, self.max_limit),
+        )
+        return Response({'results': [self.get_result(*result, request) for result in results]})
+
+    def get_result(self, document, score, snippet, request):
+        model = SEARCH_TYPES[document.record_type][0]
+        return {
+            'type': document.record_type,
+            'id': document.record_id,
+            'url': reverse(f'{model._meta.model_name}-detail', kwargs={'pk': document.record_id}, request=request),
+            'pet': document.pet_id,
+            'score': score,
+            'snippet': snippet,
+        }
+
+    # Pets of the ?owner= user. The caller's own come from the cached principal when
+    # authenticated by token (see authentication.tokens.load_principal).
+    def get_owner_pet_ids(self, request):
+        owner_id = self.get_int_param(request, 'owner')
+        if owner_id is None:
+            return None
+        if owner_id == request.user.pk and hasattr(request.user, 'pet_ids'):
+            return request.user.pet_ids
+        if owner_id != request.user.pk and not request.user.is_staff:
+            raise PermissionDenied('You can only search your own pets.')
+        return PetOwners.objects.filter(user_id=owner_id).values('pet_id')
+
+    def get_int_param(self, request, name):
+        value = request.query_params.get(name)
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError({name: 'A valid integer is required.'})
+
+    def get_types(self, request):
+        types = request.query_params.get('types')
+        if not types:
+            return None
+        types = [type_name.strip() for type_name in types.split(',') if type_name.strip()]
+        unknown = [type_name for type_name in types if type_name not in SEARCH_TYPES]
+        if unknown:
+            raise ValidationError({'types': f"Unknown record types: {', '.join(unknown)}."})
+        return types
+
+
+# Several API requests in one round trip:
+# {"requests": [{"method": "GET", "path": "/api/pets/1/"}, ...], "parallel": true}
+# Sub-requests run in-process through the URL resolver and their views, with the
+# batch's credentials. "parallel" runs consecutive reads concurrently; "atomic"
+# runs everything in one transaction, rolled back if any request fails.
+class BatchView(APIView):
+    max_requests = 20
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            raise ValidationError({'requests': 'Expected an object with a list of requests.'})
+        subrequests = get_subrequests(request.data.get('requests'), self.max_requests, request.path)
+        atomic = bool(request.data.get('atomic'))
+        responses, rolled_back = run_batch(
+            request._request, subrequests, parallel=bool(request.data.get('parallel')), atomic=atomic,
+        )
+        data = {'responses': responses}
+        if atomic:
+            data['rolled_back'] = rolled_back
+        return Response(data)
+
 
 viewsets_info = [
     (PetTypes, PetTypesSerializer),
@@ -48,6 +446,6 @@ viewsets_info = [
 
 # Dynamically create viewsets
 globals().update({
-    f"{model.__name__}ViewSet": GenericViewSet.as_viewset(model, serializer)
+    f"{model.__name__}ViewSet": get_viewset_base(model).as_viewset(model, serializer)
     for model, serializer in viewsets_info
 })
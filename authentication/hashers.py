@@ -0,0 +1,10 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+# PBKDF2 with the work factor taken from PASSWORD_HASHING_ITERATIONS. Stored
+# hashes keep their own iteration count and are upgraded on the next login.
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING_ITERATIONS
@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import exceptions
+
+
+class PasswordHashingBusy(exceptions.APIException):
+    status_code = 503
+    default_detail = 'Too many sign-ins and sign-ups in progress; retry shortly.'
+    default_code = 'password_hashing_busy'
+
+
+# Password hashing is deliberately slow CPU work. It runs on a few dedicated
+# threads (PBKDF2 releases the GIL), so a burst of sign-ups uses at most
+# PASSWORD_HASHING_WORKERS cores and leaves the rest to other requests. Up to
+# PASSWORD_HASHING_QUEUE more hashes wait for a thread; beyond that requests are
+# shed with a 503. With no workers, hashing runs inline on the request thread.
+# The pool bounds how much hashing runs at once; the calling thread still waits
+# for its hash.
+class HashingPool:
+    def __init__(self, workers, queue_size):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='password-hashing') if workers else None
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def run(self, function, *args):
+        if self.executor is None:
+            return function(*args)
+        if not self.slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+        try:
+            return self.executor.submit(function, *args).result()
+        finally:
+            self.slots.release()
+
+
+_pool = None
+_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = HashingPool(settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_QUEUE)
+    return _pool
+
+
+@receiver(setting_changed)
+def reset_pool(setting, **kwargs):
+    global _pool
+    if setting in ('PASSWORD_HASHING_WORKERS', 'PASSWORD_HASHING_QUEUE'):
+        _pool = None
+
+
+def hash_password(password):
+    return get_pool().run(make_password, password)
+
+
+# Check a user's password off the request thread, upgrading the stored hash when
+# the hasher or its cost changed. Users without a usable password still cost one
+# hash, so response times don't tell them apart.
+def check_user_password(user, password):
+    if not user.has_usable_password():
+        hash_password(password)
+        return False
+    if not get_pool().run(check_password, password, user.password):
+        return False
+    hasher = identify_hasher(user.password)
+    if hasher.algorithm != get_hasher().algorithm or hasher.must_update(user.password):
+        user.password = hash_password(password)
+        user.save(update_fields=['password'])
+    return True
@@ -0,0 +1,90 @@
+import itertools
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from api.benchmark import get_percentile
+from authentication.models import CustomUser
+
+EMAIL_DOMAIN = 'loadtest.invalid'
+
+
+# Measure the latency of regular API reads on their own and during a burst of
+# sign-ups, with passwords hashed on the request threads and on the hashing pool.
+# Sign-ups come from distinct addresses and emails, as in a campaign, so the
+# throttles let them through. Runs against the configured database; the users
+# it registers are deleted afterwards.
+class Command(BaseCommand):
+    help = 'Compare API read latency during a sign-up spike with inline and pooled password hashing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='pet_types/', help='Endpoint path below /api/ for regular traffic.')
+        parser.add_argument('--clients', type=int, default=8, help='Concurrent clients reading the endpoint.')
+        parser.add_argument('--signups', type=int, default=16, help='Concurrent clients signing up.')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per phase.')
+
+    def handle(self, *args, **options):
+        phases = [
+            ('no sign-ups', 0, None),
+            ('sign-up spike, inline hashing', options['signups'], 0),
+            ('sign-up spike, hashing pool', options['signups'], settings.PASSWORD_HASHING_WORKERS),
+        ]
+        self.numbers = itertools.count()
+        self.stdout.write(f"{'phase':<34}{'reads':>8}{'p50 ms':>10}{'p99 ms':>10}{'sign-ups':>10}{'shed':>6}")
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                for name, signups, workers in phases:
+                    hashing = {} if workers is None else {'PASSWORD_HASHING_WORKERS': workers}
+                    with override_settings(**hashing):
+                        result = self.run(f"/api/{options['path']}", options['clients'], signups, options['duration'])
+                    self.stdout.write(
+                        f"{name:<34}{result['reads']:>8}{result['p50'] * 1000:>10.2f}{result['p99'] * 1000:>10.2f}"
+                        f"{result['created']:>10}{result['shed']:>6}"
+                    )
+        finally:
+            CustomUser.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()
+
+    def run(self, path, clients, signups, duration):
+        stop = threading.Event()
+        latencies, statuses = [], Counter()
+
+        def read():
+            client = Client()
+            while not stop.is_set():
+                start = time.perf_counter()
+                client.get(path)
+                latencies.append(time.perf_counter() - start)
+            connection.close()
+
+        def sign_up():
+            client = Client()
+            while not stop.is_set():
+                number = next(self.numbers)
+                response = client.post('/auth/register/', {
+                    'email': f'user{time.time_ns()}{number}@{EMAIL_DOMAIN}', 'username': f'loadtest{number}',
+                    'password': 'correct horse battery staple',
+                }, REMOTE_ADDR=f'10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}')
+                statuses[response.status_code] += 1
+            connection.close()
+
+        threads = [threading.Thread(target=read) for _ in range(clients)]
+        threads += [threading.Thread(target=sign_up) for _ in range(signups)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return {
+            'reads': len(latencies),
+            'p50': get_percentile(latencies, 50),
+            'p99': get_percentile(latencies, 99),
+            'created': statuses[201],
+            'shed': statuses[503] + statuses[429],
+        }
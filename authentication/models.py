@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 
+from .hashing import check_user_password, hash_password
+
 # Gender choices for users
 GENDER_CHOICES = (
         ('F', 'Female'),
@@ -32,11 +34,22 @@ class CustomUser(AbstractUser):
     birthdate = models.DateField(null=True)
     phone = models.CharField(max_length=15, null=True)
     address = models.CharField(max_length=255, null=True)
+    # Bumped to revoke every API token issued to the user
+    token_version = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
     objects = CustomUserManager()
 
+    # Passwords are hashed and checked on the bounded hashing pool, whoever sets
+    # them: the API, create_user, createsuperuser, the admin or a login form.
+    def set_password(self, raw_password):
+        self.password = hash_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        return check_user_password(self, raw_password)
+
     def __str__(self):
         return self.email
@@ -1,8 +1,40 @@
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
+from .hashing import check_user_password, hash_password
 from .models import CustomUser
 
 
 class CustomUserSerializer(serializers.ModelSerializer):
+    password = serializers.CharField(write_only=True, style={'input_type': 'password'})
+
     class Meta:
         model = CustomUser
-        fields = ['id', 'email', 'username', 'gender', 'birthdate', 'phone', 'address']
+        fields = ['id', 'email', 'username', 'password', 'gender', 'birthdate', 'phone', 'address']
+
+    def validate(self, attrs):
+        user = CustomUser(**{name: value for name, value in attrs.items() if name != 'password'})
+        try:
+            validate_password(attrs['password'], user)
+        except DjangoValidationError as error:
+            raise serializers.ValidationError({'password': list(error.messages)})
+        return attrs
+
+    def create(self, validated_data):
+        return CustomUser.objects.create_user(**validated_data)
+
+
+# Exchanges an email and password for the authenticated user.
+class TokenSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    password = serializers.CharField(write_only=True, style={'input_type': 'password'})
+
+    def validate(self, attrs):
+        user = CustomUser.objects.filter(email=attrs['email']).first()
+        if user is None:
+            # Cost the same as a wrong password, so emails can't be probed by timing.
+            hash_password(attrs['password'])
+        if user is None or not check_user_password(user, attrs['password']) or not user.is_active:
+            raise serializers.ValidationError('Unable to log in with the provided credentials.')
+        attrs['user'] = user
+        return attrs
@@ -1,3 +1,147 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password, make_password
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Pets, PetOwners
+from .hashing import HashingPool, PasswordHashingBusy
+from .models import CustomUser
+from .throttles import TokenBucketThrottle
+from .tokens import TOKEN_SALT, _principals
+
+
+@override_settings(PASSWORD_HASHING_ITERATIONS=1000)
+class TokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _principals.clear()
+        self.user = CustomUser.objects.create_user(email='owner@example.com', username='owner', password='secret')
+        self.pet = Pets.objects.create(name='Rex', sex='M', birthdate='2020-01-01', color='Brown')
+        PetOwners.objects.create(user=self.user, pet=self.pet)
+
+    def get_token(self, password='secret'):
+        return self.client.post('/auth/token/', {'email': 'owner@example.com', 'password': password})
+
+    def get(self, token, url='/api/me/pets/'):
+        return self.client.get(url, headers={'Authorization': f'Bearer {token}'})
+
+    def test_token_authenticates_without_queries_once_cached(self):
+        self.assertEqual(self.get_token('wrong').status_code, 400)
+        token = self.get_token().json()['token']
+        self.assertEqual(self.get(token).json()['results'][0]['name'], 'Rex')
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.get(token, '/api/pet_types/').status_code, 200)
+        self.assertFalse([query for query in context.captured_queries if 'authentication_customuser' in query['sql']
+                          or 'django_session' in query['sql'] or 'api_petowners' in query['sql']])
+        self.assertEqual(_principals[self.user.pk][1].pet_ids, {self.pet.pk})
+
+    def test_revoked_expired_and_forged_tokens_are_rejected(self):
+        token = self.get_token().json()['token']
+        response = self.client.post('/auth/token/revoke/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get(token).status_code, 401)
+        token = self.get_token().json()['token']
+        self.assertEqual(self.get(token).status_code, 200)
+
+        forged = signing.dumps({'user': self.user.pk, 'version': 1}, salt=TOKEN_SALT, key='other')
+        self.assertEqual(self.get(forged).status_code, 401)
+        with override_settings(AUTH_TOKEN_MAX_AGE=-1):
+            self.assertEqual(self.get(token).status_code, 401)
+
+    def test_principal_is_reloaded_after_the_cache_expires_or_ownership_changes(self):
+        token = self.get_token().json()['token']
+        self.get(token)
+        other = Pets.objects.create(name='Tom', sex='M', birthdate='2020-01-01', color='Black')
+        PetOwners.objects.create(user=self.user, pet=other)
+        self.assertNotIn(self.user.pk, _principals)
+        self.get(token)
+        self.assertEqual(_principals[self.user.pk][1].pet_ids, {self.pet.pk, other.pk})
+
+        # Revoked from another process: seen once the cached principal expires.
+        CustomUser.objects.filter(pk=self.user.pk).update(token_version=5)
+        self.assertEqual(self.get(token).status_code, 200)
+        with mock.patch('authentication.tokens.time.monotonic', return_value=10 ** 9):
+            self.assertEqual(self.get(token).status_code, 401)
+
+
+@override_settings(PASSWORD_HASHING_ITERATIONS=1000)
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def register(self, email, password='correct horse battery staple', **extra):
+        return self.client.post('/auth/register/', {'email': email, 'username': email.split('@')[0],
+                                                    'password': password}, **extra)
+
+    def test_registration_hashes_with_the_configured_cost(self):
+        response = self.register('new@example.com')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('password', response.json())
+        user = CustomUser.objects.get(email='new@example.com')
+        self.assertIn('$1000$', user.password)
+        self.assertTrue(user.check_password('correct horse battery staple'))
+        self.assertEqual(self.register('weak@example.com', password='123').status_code, 400)
+
+    def test_login_upgrades_hashes_made_at_another_cost(self):
+        with override_settings(PASSWORD_HASHING_ITERATIONS=500):
+            CustomUser.objects.create(email='old@example.com', username='old', password=make_password('secret'))
+        response = self.client.post('/auth/token/', {'email': 'old@example.com', 'password': 'secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('$1000$', CustomUser.objects.get(email='old@example.com').password)
+
+    # Every way of creating or logging in a user hashes on the pool.
+    def test_manager_and_model_hash_on_the_pool(self):
+        threads = []
+
+        def record_thread(function):
+            def run(*args):
+                threads.append(threading.current_thread().name)
+                return function(*args)
+            return run
+
+        with mock.patch('authentication.hashing.make_password', record_thread(make_password)), \
+                mock.patch('authentication.hashing.check_password', record_thread(check_password)):
+            user = CustomUser.objects.create_user(email='manager@example.com', username='manager', password='secret')
+            self.assertTrue(user.check_password('secret'))
+            self.assertTrue(self.client.login(email='manager@example.com', password='secret'))
+        self.assertEqual(len(threads), 3)
+        self.assertTrue(all(name.startswith('password-hashing') for name in threads))
+
+    def test_pool_sheds_work_beyond_its_queue(self):
+        pool = HashingPool(workers=1, queue_size=0)
+        started, release = threading.Event(), threading.Event()
+
+        def hold_worker():
+            started.set()
+            release.wait(5)
+
+        busy = threading.Thread(target=pool.run, args=(hold_worker,))
+        busy.start()
+        started.wait(5)
+        with self.assertRaises(PasswordHashingBusy):
+            pool.run(make_password, 'secret')
+        release.set()
+        busy.join()
+        self.assertTrue(pool.run(make_password, 'secret'))
+
+    def test_token_buckets_shed_repeated_attempts_per_email_and_ip(self):
+        rates = {'auth_ip': '3/min', 'auth_email': '2/min'}
+        with mock.patch.object(TokenBucketThrottle, 'THROTTLE_RATES', rates):
+            for _ in range(2):
+                self.client.post('/auth/token/', {'email': 'a@example.com', 'password': 'x'})
+            response = self.client.post('/auth/token/', {'email': 'A@example.com', 'password': 'x'})
+            self.assertEqual(response.status_code, 429)
+            self.assertIn('Retry-After', response)
+            self.assertEqual(self.register('b@example.com').status_code, 429)
+            self.assertEqual(self.register('b@example.com', REMOTE_ADDR='10.0.0.2').status_code, 201)
+
+            # A bucket refills at its rate: one token every 30 seconds here.
+            with mock.patch.object(TokenBucketThrottle, 'timer', return_value=cache.get(
+                    'throttle_auth_ip_127.0.0.1')[1] + 31):
+                self.assertEqual(self.register('c@example.com').status_code, 201)
@@ -0,0 +1,51 @@
+import hashlib
+import threading
+
+from rest_framework.throttling import SimpleRateThrottle
+
+_lock = threading.Lock()
+
+
+# Token bucket over a DRF rate: a bucket holds up to N tokens and refills at N
+# per period, so clients get a burst of N and then a steady N per period.
+# Requests are shed before the view runs, i.e. before any password hashing.
+class TokenBucketThrottle(SimpleRateThrottle):
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        with _lock:
+            now = self.timer()
+            tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+            tokens = min(self.num_requests, tokens + (now - updated) * self.num_requests / self.duration)
+            if tokens < 1:
+                self.wait_seconds = (1 - tokens) * self.duration / self.num_requests
+                return False
+            self.cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPRateThrottle(TokenBucketThrottle):
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+# Keyed by a digest of the normalised email, so one account can't be hammered
+# from many addresses.
+class EmailRateThrottle(TokenBucketThrottle):
+    scope = 'auth_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email:
+            return None
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import F
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from .models import CustomUser
+
+TOKEN_SALT = 'authentication.tokens'
+# Principals kept per process; the cache is emptied when it grows past this.
+MAX_PRINCIPALS = 10000
+
+
+# Signed, timestamped token carrying the user's id and token version. It is
+# verified with SECRET_KEY alone; nothing is stored server-side.
+def issue_token(user):
+    return signing.dumps({'user': user.pk, 'version': user.token_version}, salt=TOKEN_SALT, compress=True)
+
+
+def read_token(token):
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=settings.AUTH_TOKEN_MAX_AGE)
+    except signing.SignatureExpired:
+        raise exceptions.AuthenticationFailed('Token expired.')
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed('Invalid token.')
+    return payload['user'], payload['version']
+
+
+# Resolved users, as {user id: (expiry, user)}. Each user carries the ids of the
+# pets they own as `pet_ids`. Entries are shared between requests and must be
+# treated as read-only.
+_principals = {}
+_lock = threading.Lock()
+
+
+def load_principal(user_id):
+    from api.models import PetOwners
+
+    user = CustomUser.objects.filter(pk=user_id, is_active=True).first()
+    if user is not None:
+        user.pet_ids = frozenset(PetOwners.objects.filter(user_id=user_id).values_list('pet_id', flat=True))
+    return user
+
+
+def get_principal(user_id):
+    entry = _principals.get(user_id)
+    now = time.monotonic()
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    user = load_principal(user_id)
+    with _lock:
+        if len(_principals) >= MAX_PRINCIPALS:
+            _principals.clear()
+        _principals[user_id] = (now + settings.AUTH_PRINCIPAL_CACHE_SECONDS, user)
+    return user
+
+
+def evict_principal(user_id):
+    _principals.pop(user_id, None)
+
+
+# Invalidate every token issued to the user so far. Other processes stop
+# accepting them once their cached principal expires.
+def revoke_tokens(user):
+    CustomUser.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+    user.refresh_from_db(fields=['token_version'])
+    evict_principal(user.pk)
+
+
+# Authorization: Bearer <token>. Within AUTH_PRINCIPAL_CACHE_SECONDS of the last
+# lookup a request is authenticated without any query.
+class SignedTokenAuthentication(BaseAuthentication):
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        header = get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        user_id, version = read_token(header[1].decode(errors='replace'))
+        user = get_principal(user_id)
+        if user is None:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        if user.token_version != version:
+            raise exceptions.AuthenticationFailed('Token revoked.')
+        return user, None
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import RegisterView
+from .views import RegisterView, RevokeTokensView, TokenView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
+    path('token/', TokenView.as_view(), name='token'),
+    path('token/revoke/', RevokeTokensView.as_view(), name='token-revoke'),
 ]
\ No newline at end of file
@@ -1,8 +1,36 @@
-from rest_framework import generics
+from django.conf import settings
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import CustomUser
-from .serializers import CustomUserSerializer
+from .serializers import CustomUserSerializer, TokenSerializer
+from .throttles import EmailRateThrottle, IPRateThrottle
+from .tokens import issue_token, revoke_tokens
 
 
 class RegisterView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
+    throttle_classes = [IPRateThrottle, EmailRateThrottle]
+
+
+# Issue a signed API token for an email and password.
+class TokenView(APIView):
+    authentication_classes = []
+    permission_classes = []
+    throttle_classes = [IPRateThrottle, EmailRateThrottle]
+
+    def post(self, request):
+        serializer = TokenSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        return Response({'token': issue_token(user), 'expires_in': settings.AUTH_TOKEN_MAX_AGE})
+
+
+# Revoke every token of the current user, including the one used for this request.
+class RevokeTokensView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        revoke_tokens(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)